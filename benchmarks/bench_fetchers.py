@@ -0,0 +1,123 @@
+"""
+Measures data_fetchers throughput and retry behaviour against the replay server.
+
+Usage
+-----
+python -m benchmarks.bench_fetchers --days 2 --granularity 5m --latency-ms 50
+python -m benchmarks.bench_fetchers --error-rate 0.1 --skip-client-sleep
+"""
+
+import argparse
+import sys
+import time
+from unittest import mock
+import pandas as pd
+
+from benchmarks.replay_server import ReplayConfig, ReplayServer
+from benchmarks.synthetic import GRANULARITY_MINUTES
+from src.utils import data_fetchers
+
+
+def run(
+    currency: str = "BTC",
+    days: int = 2,
+    granularity: str = "5m",
+    limit: int = 144,
+    config: ReplayConfig = None,
+    skip_client_sleep: bool = False,
+) -> dict:
+    """
+    Fetches every perpetual of a currency from a local replay server.
+
+    Parameters
+    ----------
+    currency : str, optional
+        The currency to fetch. Default is "BTC".
+    days : int, optional
+        The length of the requested history. Default is 2.
+    granularity : str, optional
+        The granularity of the requested history. Default is "5m".
+    limit : int, optional
+        The page size. Default is 144.
+    config : ReplayConfig, optional
+        The latency, error and rate limit behaviour of the server.
+    skip_client_sleep : bool, optional
+        Whether to disable the fixed sleeps of data_fetchers to measure the
+        raw request throughput. Default is False.
+
+    Returns
+    -------
+    dict
+        Wall time, rows received versus expected and server counters.
+    """
+    start = "2024-01-01"
+    end = str((pd.Timestamp(start) + pd.Timedelta(days=days)).date())
+    rows_per_instrument = days * 1440 // GRANULARITY_MINUTES[granularity] + 1
+
+    with ReplayServer(config=config) as server:
+        patches = [mock.patch.object(data_fetchers, "base_url", server.base_url)]
+        if skip_client_sleep:
+            patches.append(mock.patch.object(data_fetchers, "sleep", lambda s: None))
+        for patch in patches:
+            patch.start()
+        try:
+            began = time.perf_counter()
+            df = data_fetchers.get_historical_all_perps(
+                currency, start, end, granularity, limit
+            )
+            seconds = time.perf_counter() - began
+        finally:
+            for patch in patches:
+                patch.stop()
+        stats = server.snapshot_stats()
+
+    expected = rows_per_instrument * len(
+        [i for i in server.instruments() if i["currency"] == currency]
+    )
+    requests = stats["served"] + stats["throttled"]
+    return {
+        "seconds": seconds,
+        "rows": len(df),
+        "expected_rows": expected,
+        "requests": requests,
+        "requests_per_second": requests / seconds if seconds else None,
+        **stats,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--currency", default="BTC")
+    parser.add_argument("--days", type=int, default=2)
+    parser.add_argument("--granularity", default="5m")
+    parser.add_argument("--limit", type=int, default=144)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--skip-client-sleep", action="store_true")
+    args = parser.parse_args(argv)
+
+    config = ReplayConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    result = run(
+        args.currency,
+        args.days,
+        args.granularity,
+        args.limit,
+        config,
+        args.skip_client_sleep,
+    )
+    for key, value in result.items():
+        print(f"{key:<20} {value}")
+    return 0 if result["rows"] == result["expected_rows"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
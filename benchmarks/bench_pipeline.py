@@ -0,0 +1,247 @@
+"""
+Times and memory-profiles the data pipeline on synthetic datasets.
+
+Usage
+-----
+python -m benchmarks.bench_pipeline --sizes 10k 1M
+python -m benchmarks.bench_pipeline --sizes 10k 1M 10M --save-baseline
+python -m benchmarks.bench_pipeline --sizes 10k 1M --compare
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+import bson
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import (
+    futures_documents,
+    perps_frames,
+    perps_items,
+    sizes_from_labels,
+)
+from src.marketdata.crypto_market_data import CryptoMarketData
+from src.services.mongodb_service import FUTURES_FIELDS, _decode, transform_data
+from src.utils import min_max_scale, process_futures, z_score_normalize
+from src.utils.data_fetchers import concat_perps, get_df_items
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "results", "baseline.json")
+
+
+class _Frame(CryptoMarketData):
+    """Minimal market-data object wrapping a DataFrame for z_score_cleaning."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.historical_data = df
+        super().__init__()
+
+
+def _raw_batches(documents: List[dict], batch_size: int = 10_000) -> List[bytes]:
+    """Flattened documents encoded as the raw BSON batches of a Mongo cursor."""
+    return [
+        b"".join(bson.encode(doc) for doc in documents[lo : lo + batch_size])
+        for lo in range(0, len(documents), batch_size)
+    ]
+
+
+def _transformed(n_rows: int) -> List[dict]:
+    """Synthetic futures documents flattened by transform_data."""
+    return [transform_data(doc) for doc in futures_documents(n_rows)]
+
+
+def _numeric(n_rows: int) -> pd.DataFrame:
+    """The numerical columns of synthetic perpetuals."""
+    return get_df_items(perps_items(n_rows, seed=1)).drop(columns=["date"])
+
+
+def _cases(n_rows: int) -> Dict[str, Tuple[Callable, Callable[[], object]]]:
+    """
+    The callable of every benchmarked stage and a builder of its input.
+
+    Inputs are built by run just before their stage is timed and freed right
+    after, so that only one stage's data is held in memory at a time.
+    """
+    return {
+        "get_df_items": (get_df_items, lambda: perps_items(n_rows)),
+        "transform_data": (
+            lambda docs: [transform_data(doc) for doc in docs],
+            lambda: futures_documents(n_rows),
+        ),
+        "decode_raw_batches": (
+            lambda batches: _decode(batches, FUTURES_FIELDS, as_frame=True),
+            lambda: _raw_batches(_transformed(n_rows)),
+        ),
+        "process_futures": (process_futures, lambda: _transformed(n_rows)),
+        "z_score_cleaning": (
+            lambda df: _Frame(df.copy()).z_score_cleaning(),
+            lambda: _numeric(n_rows),
+        ),
+        "z_score_normalize": (
+            lambda df: z_score_normalize(df.copy()),
+            lambda: _numeric(n_rows),
+        ),
+        "min_max_scale": (
+            lambda df: min_max_scale(df.copy()),
+            lambda: _numeric(n_rows),
+        ),
+        "concat_dedupe": (concat_perps, lambda: perps_frames(n_rows)),
+    }
+
+
+def _time(func: Callable, data, repeat: int) -> float:
+    """Best wall time of repeat runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_memory(func: Callable, data) -> int:
+    """Peak traced allocation of one run, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run(sizes: Dict[str, int], repeat: int = 3, memory: bool = True) -> dict:
+    """
+    Runs every stage at every size.
+
+    Parameters
+    ----------
+    sizes : Dict[str, int]
+        Size labels mapped to row counts.
+    repeat : int, optional
+        The number of timed runs per stage, the best one is kept. Default is 3.
+    memory : bool, optional
+        Whether to measure peak memory in a separate traced run. Default is True.
+
+    Returns
+    -------
+    dict
+        Environment information and one result per (stage, size).
+    """
+    results = []
+    for label, n_rows in sizes.items():
+        for stage, (func, build) in _cases(n_rows).items():
+            data = build()
+            seconds = _time(func, data, repeat)
+            peak = _peak_memory(func, data) if memory else None
+            del data
+            gc.collect()
+            results.append(
+                {
+                    "stage": stage,
+                    "size": label,
+                    "rows": n_rows,
+                    "seconds": seconds,
+                    "rows_per_second": n_rows / seconds if seconds else None,
+                    "peak_bytes": peak,
+                }
+            )
+            print(
+                f"{stage:<20} {label:>5} {seconds:10.4f}s"
+                + (f" {peak / 2**20:10.1f} MiB" if peak is not None else "")
+            )
+
+    return {
+        "environment": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> List[dict]:
+    """
+    Lists the stages slower than the baseline by more than tolerance.
+
+    Parameters
+    ----------
+    current : dict
+        The output of run.
+    baseline : dict
+        A previously saved output of run.
+    tolerance : float, optional
+        The accepted relative slowdown. Default is 0.2 (20%).
+
+    Returns
+    -------
+    List[dict]
+        One entry per regressed (stage, size) with both timings.
+    """
+    reference = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = reference.get((result["stage"], result["size"]))
+        if base is None:
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                {
+                    "stage": result["stage"],
+                    "size": result["size"],
+                    "baseline_seconds": base["seconds"],
+                    "seconds": result["seconds"],
+                    "ratio": ratio,
+                }
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", nargs="+", default=["10k", "1M"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run(sizes_from_labels(args.sizes), args.repeat, not args.no_memory)
+
+    paths = [args.output] if args.output else []
+    if args.save_baseline:
+        paths.append(args.baseline)
+    for path in paths:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {path}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for r in regressions:
+            print(
+                f"REGRESSION {r['stage']} {r['size']}: "
+                f"{r['baseline_seconds']:.4f}s -> {r['seconds']:.4f}s (x{r['ratio']:.2f})"
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+Local stand-in for the Laevitas API serving recorded or synthetic responses.
+
+The server mimics the endpoints used by src/utils/data_fetchers.py with the
+same 'items'/'meta' shape, and can add latency, inject 429 responses and
+enforce a rate limit so fetch concurrency and retries can be tuned offline.
+
+Usage
+-----
+python -m benchmarks.replay_server --port 8080 --latency-ms 50 --rate-limit 10
+LAEVITAS_BASE_URL=http://127.0.0.1:8080 python my_script.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+
+from benchmarks.synthetic import (
+    GRANULARITY_MINUTES,
+    MARKETS,
+    futures_items,
+    options_items,
+    perps_items,
+)
+
+INSTRUMENTS_PATH = "/analytics/futures/instruments"
+PERPETUALS_PREFIX = "/historical/derivs/perpetuals/"
+FUTURES_PREFIX = "/historical/derivs/futures/"
+OPTIONS_PREFIX = "/historical/options/"
+
+# Item generator of each historical endpoint
+GENERATORS = {
+    PERPETUALS_PREFIX: perps_items,
+    FUTURES_PREFIX: futures_items,
+    OPTIONS_PREFIX: options_items,
+}
+
+
+def record_key(path: str, params: dict) -> str:
+    """File name of a recorded response for a path and its query parameters."""
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params))
+    return hashlib.sha1(f"{path}?{query}".encode()).hexdigest() + ".json"
+
+
+def record(
+    base_url: str, path: str, params: dict, headers: dict, record_dir: str
+) -> str:
+    """
+    Fetches one response from a live API and stores it for replay.
+
+    Parameters
+    ----------
+    base_url : str
+        The live API base URL, e.g. 'https://api.laevitas.ch'.
+    path : str
+        The endpoint path.
+    params : dict
+        The query parameters.
+    headers : dict
+        The request headers, including the API key.
+    record_dir : str
+        The directory of recorded responses.
+
+    Returns
+    -------
+    str
+        The path of the recorded file.
+    """
+    import requests
+
+    response = requests.get(base_url + path, params=params, headers=headers)
+    response.raise_for_status()
+    os.makedirs(record_dir, exist_ok=True)
+    file_path = os.path.join(record_dir, record_key(path, params))
+    with open(file_path, "w") as f:
+        json.dump(response.json(), f)
+    return file_path
+
+
+@lru_cache(maxsize=256)
+def _synthetic_series(
+    prefix: str, market: str, symbol: str, start: str, end: str, granularity: str
+) -> Tuple[dict, ...]:
+    """Deterministic items of one instrument of an endpoint between start and end."""
+    minutes = GRANULARITY_MINUTES.get(granularity, 60)
+    span = pd.Timestamp(end) - pd.Timestamp(start)
+    n_rows = int(span / pd.Timedelta(minutes=minutes)) + 1
+    seed = int(hashlib.sha1(f"{market}/{symbol}".encode()).hexdigest()[:8], 16)
+    return tuple(GENERATORS[prefix](max(n_rows, 0), start, granularity, seed=seed))
+
+
+class ReplayConfig:
+    """
+    Behaviour of the replay server.
+
+    Parameters
+    ----------
+    latency_ms : float, optional
+        The fixed delay added to every response. Default is 0.
+    jitter_ms : float, optional
+        The maximum uniform random delay added on top of latency_ms. Default is 0.
+    error_rate : float, optional
+        The probability of answering 429 to any data request. Default is 0.
+    rate_limit : float, optional
+        The sustained requests per second allowed before answering 429,
+        None for no limit. Default is None.
+    burst : int, optional
+        The token bucket capacity of the rate limiter. Default is 1.
+    record_dir : str, optional
+        A directory of recorded responses served in priority. Default is None.
+    currencies : tuple, optional
+        The currencies listed by the instruments endpoint. Default is ("BTC", "ETH").
+    seed : int, optional
+        The seed of the latency and error draws. Default is 0.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: Optional[float] = None,
+        burst: int = 1,
+        record_dir: Optional[str] = None,
+        currencies: tuple = ("BTC", "ETH"),
+        seed: int = 0,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.record_dir = record_dir
+        self.currencies = currencies
+        self.random = random.Random(seed)
+        # Handler threads share the generator, one request draws at a time
+        self._random_lock = threading.Lock()
+
+    def draw(self) -> Tuple[float, bool]:
+        """Draws the delay in milliseconds of a request and whether it gets a 429."""
+        with self._random_lock:
+            delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+            error = self.random.random() < self.error_rate
+        return delay, error
+
+
+class _TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ReplayServer"
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        config = self.server.config
+
+        if url.path == "/__stats":
+            self._send_json(200, self.server.snapshot_stats())
+            return
+
+        delay, error = config.draw()
+        if delay:
+            time.sleep(delay / 1000)
+
+        limited = self.server.bucket is not None and not self.server.bucket.acquire()
+        if limited or error:
+            self.server.count("throttled")
+            self._send_json(429, {"message": "Too Many Requests"}, {"Retry-After": "1"})
+            return
+
+        payload = self._recorded(url.path, params)
+        if payload is None:
+            payload = self._synthetic(url.path, params)
+        if payload is None:
+            self.server.count("not_found")
+            self._send_json(404, {"message": f"Unknown endpoint {url.path}"})
+            return
+
+        self.server.count("served")
+        self.server.count("items", len(payload.get("items", [])))
+        self._send_json(200, payload)
+
+    def _recorded(self, path: str, params: dict) -> Optional[dict]:
+        record_dir = self.server.config.record_dir
+        if record_dir is None:
+            return None
+        file_path = os.path.join(record_dir, record_key(path, params))
+        if not os.path.exists(file_path):
+            return None
+        with open(file_path) as f:
+            return json.load(f)
+
+    def _synthetic(self, path: str, params: dict) -> Optional[dict]:
+        if path == INSTRUMENTS_PATH:
+            return {"data": self.server.instruments()}
+
+        for prefix in GENERATORS:
+            if path.startswith(prefix):
+                market, _, symbol = path[len(prefix) :].partition("/")
+                break
+        else:
+            return None
+
+        items = _synthetic_series(
+            prefix,
+            market,
+            symbol,
+            params.get("start", "2024-01-01"),
+            params.get("end", "2024-01-02"),
+            params.get("granularity", "1h"),
+        )
+        limit = int(params.get("limit", 144))
+        page = int(params.get("page", 1))
+        total = len(items)
+        page_items = list(items[(page - 1) * limit : page * limit])
+        # Same meta as synthetic.perps_pages: 'items' counts the items of the page
+        return {
+            "meta": {
+                "total": total,
+                "page": page,
+                "items": len(page_items),
+                "total_pages": max(1, -(-total // limit)),
+            },
+            "items": page_items,
+        }
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering like the Laevitas API.
+
+    Parameters
+    ----------
+    address : Tuple[str, int], optional
+        The host and port to bind, port 0 picks a free one. Default is ("127.0.0.1", 0).
+    config : ReplayConfig, optional
+        The latency, error and rate limit behaviour. Default is ReplayConfig().
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        config: Optional[ReplayConfig] = None,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.config = config or ReplayConfig()
+        self.bucket = (
+            _TokenBucket(self.config.rate_limit, self.config.burst)
+            if self.config.rate_limit
+            else None
+        )
+        self._stats = {"served": 0, "throttled": 0, "not_found": 0, "items": 0}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def instruments(self) -> list:
+        """Synthetic instrument listing, one perpetual per market and currency."""
+        return [
+            {
+                "market": market,
+                "instrument": f"{currency}-PERPETUAL",
+                "currency": currency,
+                "type": "perpetual",
+            }
+            for currency in self.config.currencies
+            for market in MARKETS[:4]
+        ]
+
+    def count(self, key: str, value: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += value
+
+    def snapshot_stats(self) -> dict:
+        """Counters of served, throttled and unknown requests since start."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def start(self) -> "ReplayServer":
+        """Serves in a background daemon thread and returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops serving and releases the port."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--record-dir", default=None)
+    args = parser.parse_args(argv)
+
+    config = ReplayConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        record_dir=args.record_dir,
+    )
+    server = ReplayServer((args.host, args.port), config)
+    print(f"Serving Laevitas API replay on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,401 @@
+"""
+Deterministic synthetic datasets shaped like the Laevitas API and the local
+`laevitas` MongoDB collections, for benchmarks and offline tests.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Sequence
+import numpy as np
+import pandas as pd
+
+GRANULARITY_MINUTES = {
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "2h": 120,
+    "4h": 240,
+    "6h": 360,
+    "12h": 720,
+    "1d": 1440,
+}
+
+MARKETS = [
+    "BINANCE",
+    "BYBIT",
+    "DERIBIT",
+    "OKX",
+    "BITMEX",
+    "HUOBI",
+    "KRAKEN",
+    "BITFINEX",
+]
+
+MONTHS = [
+    "jan",
+    "feb",
+    "mar",
+    "apr",
+    "may",
+    "jun",
+    "jul",
+    "aug",
+    "sep",
+    "oct",
+    "nov",
+    "dec",
+]
+
+
+def _random_walk(
+    rng: np.random.Generator, n: int, start: float, vol: float
+) -> np.ndarray:
+    """Geometric random walk starting at start."""
+    return start * np.exp(np.cumsum(rng.normal(0.0, vol, n)))
+
+
+def perps_items(
+    n_rows: int,
+    start: str = "2023-01-01",
+    granularity: str = "5m",
+    seed: int = 0,
+    missing_rate: float = 0.01,
+) -> List[dict]:
+    """
+    Generates API items for one perpetual, like /historical/derivs/perpetuals.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of items.
+    start : str, optional
+        The first timestamp in 'YYYY-MM-DD' format. Default is "2023-01-01".
+    granularity : str, optional
+        The spacing of the items. Default is "5m".
+    seed : int, optional
+        The random seed. Default is 0.
+    missing_rate : float, optional
+        The share of None values in the optional fields. Default is 0.01.
+
+    Returns
+    -------
+    List[dict]
+        The items, with 'date' in epoch milliseconds.
+    """
+    rng = np.random.default_rng(seed)
+    step_ms = GRANULARITY_MINUTES[granularity] * 60_000
+    first_ms = int(pd.Timestamp(start).value // 1_000_000)
+
+    dates = first_ms + step_ms * np.arange(n_rows, dtype=np.int64)
+    price = _random_walk(rng, n_rows, 30_000.0, 0.002)
+    columns = {
+        "price": price,
+        "index_price": price * (1 - rng.normal(0.0, 0.0005, n_rows)),
+        "basis": rng.normal(0.02, 0.05, n_rows),
+        "funding": rng.normal(0.0001, 0.0002, n_rows),
+        "volume": rng.lognormal(15.0, 1.0, n_rows),
+        "open_interest": _random_walk(rng, n_rows, 5e8, 0.001),
+        "long_short_ratio": rng.lognormal(0.0, 0.2, n_rows),
+    }
+    optional = ["funding", "long_short_ratio"]
+    missing = {col: rng.random(n_rows) < missing_rate for col in optional}
+
+    lists = {col: values.round(8).tolist() for col, values in columns.items()}
+    for col in optional:
+        for i in np.flatnonzero(missing[col]):
+            lists[col][i] = None
+
+    names = list(lists)
+    rows = zip(dates.tolist(), *(lists[col] for col in names))
+    return [dict(zip(["date"] + names, row)) for row in rows]
+
+
+def futures_items(
+    n_rows: int,
+    start: str = "2023-01-01",
+    granularity: str = "1h",
+    seed: int = 0,
+    days_to_expiry: int = 90,
+) -> List[dict]:
+    """
+    Generates API items for one futures contract, like /historical/derivs/futures.
+
+    The fields are those of the points of the `laevitas.futures` collection
+    (see futures_documents), with a basis converging to zero at expiry.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of items.
+    start : str, optional
+        The first timestamp in 'YYYY-MM-DD' format. Default is "2023-01-01".
+    granularity : str, optional
+        The spacing of the items. Default is "1h".
+    seed : int, optional
+        The random seed. Default is 0.
+    days_to_expiry : int, optional
+        The days from start to the expiry of the contract. Default is 90.
+
+    Returns
+    -------
+    List[dict]
+        The items, with 'date' in epoch milliseconds.
+    """
+    rng = np.random.default_rng(seed)
+    step_ms = GRANULARITY_MINUTES[granularity] * 60_000
+    first_ms = int(pd.Timestamp(start).value // 1_000_000)
+
+    dates = first_ms + step_ms * np.arange(n_rows, dtype=np.int64)
+    dte = np.maximum(days_to_expiry - (dates - first_ms) / 86_400_000, 1 / 24)
+    index_price = _random_walk(rng, n_rows, 30_000.0, 0.002)
+    basis = rng.normal(0.01, 0.005, n_rows) * dte / 30
+    columns = {
+        "price": index_price * (1 + basis / 100),
+        "index_price": index_price,
+        "basis": basis,
+        "yield": basis * 365 / dte,
+        "volume": rng.lognormal(17.0, 1.0, n_rows),
+        "open_interest": _random_walk(rng, n_rows, 5e8, 0.001),
+    }
+
+    names = list(columns)
+    rows = zip(dates.tolist(), *(columns[col].round(8).tolist() for col in names))
+    return [dict(zip(["date"] + names, row)) for row in rows]
+
+
+def options_items(
+    n_rows: int,
+    start: str = "2023-01-01",
+    granularity: str = "1h",
+    seed: int = 0,
+    missing_rate: float = 0.01,
+) -> List[dict]:
+    """
+    Generates API items for one option, like /historical/options.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of items.
+    start : str, optional
+        The first timestamp in 'YYYY-MM-DD' format. Default is "2023-01-01".
+    granularity : str, optional
+        The spacing of the items. Default is "1h".
+    seed : int, optional
+        The random seed. Default is 0.
+    missing_rate : float, optional
+        The share of None values in the bid/ask fields. Default is 0.01.
+
+    Returns
+    -------
+    List[dict]
+        The items, with 'date' in epoch milliseconds.
+    """
+    rng = np.random.default_rng(seed)
+    step_ms = GRANULARITY_MINUTES[granularity] * 60_000
+    first_ms = int(pd.Timestamp(start).value // 1_000_000)
+
+    dates = first_ms + step_ms * np.arange(n_rows, dtype=np.int64)
+    mark_iv = _random_walk(rng, n_rows, 55.0, 0.01)
+    spread = rng.lognormal(0.0, 0.3, n_rows)
+    columns = {
+        "underlying_price": _random_walk(rng, n_rows, 30_000.0, 0.002),
+        "mark_price": _random_walk(rng, n_rows, 0.05, 0.01),
+        "mark_iv": mark_iv,
+        "bid_iv": mark_iv - spread,
+        "ask_iv": mark_iv + spread,
+        "delta": rng.uniform(-1.0, 1.0, n_rows),
+        "volume": rng.lognormal(5.0, 1.0, n_rows),
+        "open_interest": _random_walk(rng, n_rows, 1_000.0, 0.005),
+    }
+    optional = ["bid_iv", "ask_iv"]
+    missing = {col: rng.random(n_rows) < missing_rate for col in optional}
+
+    lists = {col: values.round(8).tolist() for col, values in columns.items()}
+    for col in optional:
+        for i in np.flatnonzero(missing[col]):
+            lists[col][i] = None
+
+    names = list(lists)
+    rows = zip(dates.tolist(), *(lists[col] for col in names))
+    return [dict(zip(["date"] + names, row)) for row in rows]
+
+
+def perps_pages(items: List[dict], limit: int = 144) -> List[dict]:
+    """
+    Splits items into paginated API responses with the 'items'/'meta' shape.
+
+    Parameters
+    ----------
+    items : List[dict]
+        The items to paginate.
+    limit : int, optional
+        The number of items per page. Default is 144.
+
+    Returns
+    -------
+    List[dict]
+        One response dictionary per page.
+    """
+    total = len(items)
+    total_pages = max(1, int(np.ceil(total / limit)))
+    return [
+        {
+            "meta": {
+                "total": total,
+                "page": page + 1,
+                "items": len(items[page * limit : (page + 1) * limit]),
+                "total_pages": total_pages,
+            },
+            "items": items[page * limit : (page + 1) * limit],
+        }
+        for page in range(total_pages)
+    ]
+
+
+def perps_frames(
+    n_rows: int,
+    currency: str = "BTC",
+    n_instruments: int = 8,
+    granularity: str = "5m",
+    overlap: float = 0.01,
+    seed: int = 0,
+) -> List[pd.DataFrame]:
+    """
+    Generates per-instrument DataFrames as produced by get_historical_perps.
+
+    Parameters
+    ----------
+    n_rows : int
+        The total number of rows across all instruments.
+    currency : str, optional
+        The base currency of the symbols. Default is "BTC".
+    n_instruments : int, optional
+        The number of (market, symbol) pairs. Default is 8.
+    granularity : str, optional
+        The spacing of the rows. Default is "5m".
+    overlap : float, optional
+        The share of rows duplicated within each frame, as happens at page
+        boundaries. Default is 0.01.
+    seed : int, optional
+        The random seed. Default is 0.
+
+    Returns
+    -------
+    List[pd.DataFrame]
+        One DataFrame per instrument with 'market' and 'symbol' columns.
+    """
+    rng = np.random.default_rng(seed)
+    per_instrument = max(1, n_rows // n_instruments)
+    frames = []
+    for i in range(n_instruments):
+        items = perps_items(per_instrument, granularity=granularity, seed=seed + i)
+        df = pd.DataFrame(items)
+        df["date"] = pd.to_datetime(df["date"], unit="ms")
+        n_dup = int(per_instrument * overlap)
+        if n_dup:
+            df = pd.concat(
+                [df, df.iloc[rng.integers(0, len(df), n_dup)]], ignore_index=True
+            )
+        df["market"] = MARKETS[i % len(MARKETS)]
+        df["symbol"] = f"{currency}-PERPETUAL-{i // len(MARKETS)}"
+        frames.append(df)
+    return frames
+
+
+def _contract_name(currency: str, expiry: datetime) -> str:
+    """Contract name parsed by parse_expiry, e.g. 'btc-29dec23'."""
+    return f"{currency.lower()}-{expiry.day}{MONTHS[expiry.month - 1]}{expiry.year % 100:02d}"
+
+
+def futures_documents(
+    n_rows: int,
+    currency: str = "BTC",
+    start: str = "2023-01-01",
+    granularity: str = "1h",
+    expiries_per_date: int = 6,
+    seed: int = 0,
+) -> List[dict]:
+    """
+    Generates documents shaped like the `laevitas.futures` collection.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of documents.
+    currency : str, optional
+        The underlying currency. Default is "BTC".
+    start : str, optional
+        The first snapshot date in 'YYYY-MM-DD' format. Default is "2023-01-01".
+    granularity : str, optional
+        The spacing of the snapshots. Default is "1h".
+    expiries_per_date : int, optional
+        The number of listed contracts per snapshot. Default is 6.
+    seed : int, optional
+        The random seed. Default is 0.
+
+    Returns
+    -------
+    List[dict]
+        Documents with '_id', 'date', 'currency' and nested 'points' fields.
+    """
+    rng = np.random.default_rng(seed)
+    n_dates = int(np.ceil(n_rows / expiries_per_date))
+    step = timedelta(minutes=GRANULARITY_MINUTES[granularity])
+    first = datetime.fromisoformat(start)
+    spot = _random_walk(rng, n_dates, 30_000.0, 0.01)
+
+    # Monthly expiries on the 28th
+    monthly = pd.date_range(
+        first, periods=n_dates * step // timedelta(days=28) + 24, freq="ME"
+    )
+    expiry_dates = [d.to_pydatetime().replace(day=28) for d in monthly]
+
+    noise = rng.normal(0.01, 0.005, n_rows)
+    open_interest = rng.lognormal(19.0, 0.5, (n_rows, 2)).round(2)
+    volume = rng.lognormal(17.0, 1.0, (n_rows, 2)).round(2)
+    names = {e: _contract_name(currency, e) for e in expiry_dates}
+
+    documents = []
+    for i in range(n_dates):
+        date = first + i * step
+        listed = [e for e in expiry_dates if e > date][:expiries_per_date]
+        for expiry in listed:
+            j = len(documents)
+            if j == n_rows:
+                break
+            dte = (expiry - date).days + 1
+            basis = float(noise[j] * dte / 30)
+            price = round(float(spot[i] * (1 + basis / 100)), 2)
+            points = {
+                str(k): {
+                    "p": price,
+                    "oi": float(open_interest[j, k]),
+                    "v": float(volume[j, k]),
+                    "b": round(basis, 6),
+                    "y": round(basis * 365 / dte, 6),
+                }
+                for k in range(2)
+            }
+            documents.append(
+                {
+                    "_id": f"{j:024x}",
+                    "date": date,
+                    "currency": names[expiry],
+                    "points": points,
+                }
+            )
+    return documents
+
+
+def sizes_from_labels(labels: Sequence[str]) -> Dict[str, int]:
+    """Parses size labels such as '10k', '1M' or '10M' into row counts."""
+    factors = {"k": 1_000, "M": 1_000_000}
+    return {
+        label: (
+            int(float(label[:-1]) * factors[label[-1]])
+            if label[-1] in factors
+            else int(label)
+        )
+        for label in labels
+    }
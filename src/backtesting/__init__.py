@@ -0,0 +1,18 @@
+from .walk_forward import (
+    walk_forward_validation,
+    walk_forward_folds,
+    fit_ic_weights,
+    fit_equal_weights,
+    index_values,
+)
+from .bootstrap import block_bootstrap_indices, bootstrap_confidence_intervals
+
+__all__ = [
+    "walk_forward_validation",
+    "walk_forward_folds",
+    "fit_ic_weights",
+    "fit_equal_weights",
+    "index_values",
+    "block_bootstrap_indices",
+    "bootstrap_confidence_intervals",
+]
@@ -0,0 +1,246 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Literal, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from src.utils.instrumentation import stage
+
+Statistic = Literal["mean", "corr", "hit_rate"]
+
+# Block sums of the moments of the worker processes, set once per process
+_full: Optional[np.ndarray] = None
+_last: Optional[np.ndarray] = None
+
+
+def block_bootstrap_indices(
+    n: int,
+    n_resamples: int,
+    block_length: int,
+    rng: Union[np.random.Generator, int, None] = None,
+) -> np.ndarray:
+    """
+    Row indices of circular block bootstrap resamples, as one array.
+
+    Every resample concatenates blocks of block_length consecutive rows
+    starting at uniformly drawn rows, wrapping around the end, so that the
+    autocorrelation within blocks is preserved.
+
+    Parameters
+    ----------
+    n : int
+        The number of rows of the sample.
+    n_resamples : int
+        The number of resamples.
+    block_length : int
+        The number of consecutive rows of every block.
+    rng : np.random.Generator or int, optional
+        The random generator or its seed. Default is None.
+
+    Returns
+    -------
+    np.ndarray
+        An (n_resamples, n) array of row indices.
+    """
+    starts = _block_starts(n, n_resamples, block_length, rng)
+    indices = (starts[:, :, None] + np.arange(block_length)) % n
+    return indices.reshape(len(starts), -1)[:, :n]
+
+
+def _block_starts(
+    n: int,
+    n_resamples: int,
+    block_length: int,
+    rng: Union[np.random.Generator, int, None] = None,
+) -> np.ndarray:
+    """The (n_resamples, n_blocks) first rows of the blocks of every resample."""
+    n_blocks = -(-n // block_length)
+    return np.random.default_rng(rng).integers(0, n, size=(n_resamples, n_blocks))
+
+
+def _moments(x: np.ndarray, y: Optional[np.ndarray]) -> np.ndarray:
+    """
+    The (n, Q, K) per-row terms whose sums give every statistic.
+
+    Components and target are centred on their sample means first, so that
+    the one-pass covariance sums of resamples do not suffer from cancellation.
+    """
+    mask = np.isfinite(x)
+    terms = [mask, np.where(mask, x, 0.0)]
+    if y is not None:
+        y = y[:, None]
+        pair = mask & np.isfinite(y)
+        with np.errstate(invalid="ignore"):
+            xc = np.where(pair, x - np.nanmean(np.where(pair, x, np.nan), axis=0), 0)
+            yc = np.where(pair, y - np.nanmean(np.where(pair, y, np.nan), axis=0), 0)
+            signs = np.where(pair, np.sign(x) * np.sign(y), 0)
+        terms += [
+            pair,
+            xc,
+            yc,
+            xc * xc,
+            yc * yc,
+            xc * yc,
+            signs > 0,
+            signs != 0,
+        ]
+    return np.stack([np.asarray(t, dtype=float) for t in terms], axis=1)
+
+
+def _from_sums(
+    sums: np.ndarray, statistics: Sequence[Statistic]
+) -> Dict[str, np.ndarray]:
+    """Statistics of a batch of (b, Q, K) summed moments, one (b, K) array each."""
+    out = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if "mean" in statistics:
+            out["mean"] = sums[:, 1] / sums[:, 0]
+        if "corr" in statistics:
+            count, sx, sy, sxx, syy, sxy = (sums[:, q] for q in range(2, 8))
+            cov = sxy - sx * sy / count
+            var = (sxx - sx * sx / count) * (syy - sy * sy / count)
+            out["corr"] = np.clip(cov / np.sqrt(var), -1.0, 1.0)
+        if "hit_rate" in statistics:
+            out["hit_rate"] = sums[:, 8] / sums[:, 9]
+    return out
+
+
+def _block_sums(moments: np.ndarray, length: int) -> np.ndarray:
+    """Sums of the moments over the circular block of length rows at every row."""
+    n = len(moments)
+    wrapped = np.concatenate([moments, moments[: min(length, n)]])
+    cumsum = np.concatenate([np.zeros((1,) + moments.shape[1:]), wrapped.cumsum(0)])
+    return cumsum[length : length + n] - cumsum[:n]
+
+
+def _init_worker(full: np.ndarray, last: np.ndarray) -> None:
+    """Worker initializer: keeps the block sums, sent once per process."""
+    global _full, _last
+    _full, _last = full, last
+
+
+def _run_chunk(task: tuple) -> Dict[str, np.ndarray]:
+    """Draws a chunk of resamples and returns their statistics."""
+    seed, size, block_length, statistics = task
+    starts = _block_starts(len(_full), size, block_length, seed)
+    # Every resample is whole blocks then a last, possibly shorter, one
+    sums = _full[starts[:, :-1]].sum(axis=1) + _last[starts[:, -1]]
+    return _from_sums(sums, statistics)
+
+
+def bootstrap_confidence_intervals(
+    data: pd.DataFrame,
+    target: Union[str, pd.Series, None] = None,
+    statistics: Sequence[Statistic] = ("mean", "corr", "hit_rate"),
+    n_resamples: int = 1000,
+    block_length: Optional[int] = None,
+    confidence: float = 0.95,
+    seed: int = 0,
+    memory_limit: int = 256 * 1024**2,
+    max_workers: Optional[int] = 1,
+) -> pd.DataFrame:
+    """
+    Block-bootstrap confidence intervals of statistics of the index components.
+
+    Every statistic is a ratio of sums of per-row moments, so the sums over
+    each possible block are precomputed from cumulative sums and a resample
+    only adds up its blocks: block starts are drawn as one array per chunk and
+    all the resamples of the chunk are reduced at once, in O(n / block_length)
+    per resample instead of O(n). Chunks hold as many resamples as fit in
+    memory_limit and can run in a process pool; each chunk has its own seed
+    derived from seed, so the results do not depend on the number of workers.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The components, sorted by time, e.g. funding, basis and long/short
+        ratio. Only numerical columns are used.
+    target : str or pd.Series, optional
+        The forward returns to compare the components with, as a column of
+        data or a series aligned with it. Required for 'corr' and 'hit_rate'.
+        Default is None.
+    statistics : Sequence[str], optional
+        Any of 'mean', 'corr' (Pearson correlation with the target) and
+        'hit_rate' (share of rows where the component and the target have the
+        same sign). Default is all three.
+    n_resamples : int, optional
+        The number of bootstrap resamples. Default is 1000.
+    block_length : int, optional
+        The number of consecutive rows per block. Default is n ** (1/3).
+    confidence : float, optional
+        The coverage of the percentile intervals. Default is 0.95.
+    seed : int, optional
+        The seed of the resamples. Default is 0.
+    memory_limit : int, optional
+        The approximate number of bytes of temporaries per chunk. Default is 256MB.
+    max_workers : int, optional
+        The number of worker processes, None for os.cpu_count(). Default is 1.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by (component, statistic), with the 'estimate' on the sample,
+        the bootstrap 'std' and the 'lower' and 'upper' interval bounds.
+    """
+    if isinstance(target, str):
+        y = data[target]
+        data = data.drop(columns=target)
+    else:
+        y = None if target is None else target.reindex(data.index)
+    statistics = list(statistics)
+    if y is None:
+        if set(statistics) - {"mean"}:
+            raise ValueError("A target is required for 'corr' and 'hit_rate'")
+    else:
+        y = y.to_numpy(dtype=float)
+
+    columns = data.select_dtypes(include=[np.number]).columns
+    x = data[columns].to_numpy(dtype=float)
+    n = len(x)
+    block_length = block_length or max(1, round(n ** (1 / 3)))
+    n_blocks = -(-n // block_length)
+
+    moments = _moments(x, y)
+    full = _block_sums(moments, block_length)
+    last = _block_sums(moments, n - (n_blocks - 1) * block_length)
+
+    chunk = max(1, memory_limit // (n_blocks * moments[0].size * 8))
+    sizes = [min(chunk, n_resamples - lo) for lo in range(0, n_resamples, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [
+        (child, size, block_length, statistics) for child, size in zip(seeds, sizes)
+    ]
+    workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+
+    with stage("bootstrap") as metrics:
+        if workers == 1:
+            _init_worker(full, last)
+            try:
+                results = list(map(_run_chunk, tasks))
+            finally:
+                _init_worker(None, None)
+        else:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(full, last)
+            ) as executor:
+                results = list(executor.map(_run_chunk, tasks))
+        metrics.add(rows=n_resamples)
+
+    estimates = _from_sums(moments.sum(axis=0)[None], statistics)
+    alpha = (1 - confidence) / 2
+    rows = []
+    for statistic in statistics:
+        samples = np.concatenate([result[statistic] for result in results])
+        lower, upper = np.nanquantile(samples, [alpha, 1 - alpha], axis=0)
+        rows.append(
+            pd.DataFrame(
+                {
+                    "component": columns,
+                    "statistic": statistic,
+                    "estimate": estimates[statistic][0],
+                    "std": np.nanstd(samples, axis=0, ddof=1),
+                    "lower": lower,
+                    "upper": upper,
+                }
+            )
+        )
+    return pd.concat(rows).set_index(["component", "statistic"])
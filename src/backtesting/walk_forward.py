@@ -0,0 +1,260 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from scipy.stats import rankdata
+from src.utils.instrumentation import stage
+
+# Fitted normalization and weights: per-component mean, std and weight
+Params = Tuple[np.ndarray, np.ndarray, np.ndarray]
+FitFunc = Callable[[np.ndarray, np.ndarray], Params]
+
+# Input arrays of the worker processes, attached once per process
+_shared: Optional[shared_memory.SharedMemory] = None
+_data: Optional[np.ndarray] = None
+
+
+def walk_forward_folds(
+    n: int,
+    train: int,
+    test: int,
+    step: Optional[int] = None,
+    gap: int = 0,
+    expanding: bool = False,
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Row bounds of rolling train/test folds.
+
+    Parameters
+    ----------
+    n : int
+        The number of rows.
+    train : int
+        The number of rows of each train fold (the first one if expanding).
+    test : int
+        The number of rows of each test fold.
+    step : int, optional
+        The number of rows between consecutive folds. Default is test.
+    gap : int, optional
+        The number of rows skipped between train and test, e.g. the horizon of
+        a forward-return target so that train labels do not overlap the test
+        fold. Default is 0.
+    expanding : bool, optional
+        Whether every train fold starts at the first row. Default is False.
+
+    Returns
+    -------
+    List[Tuple[int, int, int, int]]
+        The (train_start, train_end, test_start, test_end) bounds, ends excluded.
+    """
+    folds = []
+    for train_end in range(train, n - gap - test + 1, step or test):
+        train_start = 0 if expanding else train_end - train
+        folds.append((train_start, train_end, train_end + gap, train_end + gap + test))
+    return folds
+
+
+def fit_ic_weights(x: np.ndarray, y: np.ndarray) -> Params:
+    """
+    Z-score parameters and information-coefficient weights of the components.
+
+    Each component is weighted by its rank correlation with the target on
+    the train fold, the absolute weights summing to one.
+    """
+    mean = np.nanmean(x, axis=0)
+    std = np.nanstd(x, axis=0, ddof=1)
+    ics = np.array([_rank_corr(x[:, k], y) for k in range(x.shape[1])])
+    ics = np.nan_to_num(ics)
+    total = np.abs(ics).sum()
+    weights = ics / total if total > 0 else np.full(len(ics), 1 / len(ics))
+    return mean, std, weights
+
+
+def fit_equal_weights(x: np.ndarray, y: np.ndarray) -> Params:
+    """Z-score parameters and equal weights of the components."""
+    mean = np.nanmean(x, axis=0)
+    std = np.nanstd(x, axis=0, ddof=1)
+    return mean, std, np.full(x.shape[1], 1 / x.shape[1])
+
+
+def index_values(x: np.ndarray, params: Params) -> np.ndarray:
+    """The index of every row: weighted sum of the normalized components."""
+    mean, std, weights = params
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (x - mean) / np.where(std > 0, std, np.nan)
+    return np.nan_to_num(z) @ weights
+
+
+def _rank_corr(a: np.ndarray, b: np.ndarray) -> float:
+    """Spearman correlation over the rows where both are finite."""
+    mask = np.isfinite(a) & np.isfinite(b)
+    if mask.sum() < 3:
+        return np.nan
+    ra, rb = rankdata(a[mask]), rankdata(b[mask])
+    if ra.std() == 0 or rb.std() == 0:
+        return np.nan
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def _attach(name: str, shape: Tuple[int, int]) -> None:
+    """Worker initializer: maps the shared input array, read-only."""
+    global _shared, _data
+    _shared = shared_memory.SharedMemory(name=name)
+    _data = np.ndarray(shape, dtype=np.float64, buffer=_shared.buf)
+    _data.flags.writeable = False
+
+
+def _set_local(values: Optional[np.ndarray]) -> None:
+    """Serial runs read the input array in-process."""
+    global _shared, _data
+    _shared, _data = None, values
+
+
+def _run_fold(task: Tuple[int, Tuple[int, int, int, int], FitFunc]) -> dict:
+    """Fits a fold on its train rows and scores the index on its test rows."""
+    fold, (train_start, train_end, test_start, test_end), fit = task
+    x, y = _data[:, :-1], _data[:, -1]
+
+    start = time.perf_counter()
+    params = fit(x[train_start:train_end], y[train_start:train_end])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = index_values(x[test_start:test_end], params)
+    target = y[test_start:test_end]
+    mask = np.isfinite(index) & np.isfinite(target)
+    if mask.sum() >= 3 and index[mask].std() > 0 and target[mask].std() > 0:
+        corr = float(np.corrcoef(index[mask], target[mask])[0, 1])
+    else:
+        corr = np.nan
+    signs = np.sign(index[mask]) * np.sign(target[mask])
+    hit_rate = float((signs > 0).sum() / max((signs != 0).sum(), 1))
+    result = {
+        "fold": fold,
+        "ic": _rank_corr(index, target),
+        "corr": corr,
+        "hit_rate": hit_rate,
+        "fit_seconds": fit_seconds,
+        "score_seconds": time.perf_counter() - start,
+        "pid": os.getpid(),
+    }
+    result.update({f"weight_{k}": w for k, w in enumerate(params[2])})
+    return result
+
+
+def walk_forward_validation(
+    data: pd.DataFrame,
+    target: Union[str, pd.Series],
+    train: int,
+    test: int,
+    step: Optional[int] = None,
+    gap: int = 0,
+    expanding: bool = False,
+    fit: FitFunc = fit_ic_weights,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Walk-forward validation of the index built from the components of data.
+
+    Rows are split into rolling train/test folds. On every train fold the fit
+    function estimates the normalization and weights of the components; the
+    index of the test fold is the weighted sum of its components normalized
+    with those parameters, and is scored against the target.
+
+    Folds run in a process pool. The components and the target are copied
+    once into a shared memory block mapped read-only by every worker, so a
+    task only carries its fold bounds whatever the size of the data.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        The components, sorted by time, e.g. historical_data or features.
+        Only numerical columns are used.
+    target : str or pd.Series
+        The value to predict, e.g. forward returns, as a column of data or a
+        series aligned with it.
+    train : int
+        The number of rows of each train fold.
+    test : int
+        The number of rows of each test fold.
+    step : int, optional
+        The number of rows between consecutive folds. Default is test.
+    gap : int, optional
+        The number of rows between train and test folds. Default is 0.
+    expanding : bool, optional
+        Whether train folds grow from the first row. Default is False.
+    fit : Callable, optional
+        fit(x_train, y_train) returning the (mean, std, weights) arrays of the
+        components, a top-level function so that it can be sent to workers.
+        Default is fit_ic_weights.
+    max_workers : int, optional
+        The number of worker processes. Use 1 to run serially. Default is os.cpu_count().
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per fold with its bounds, the rank correlation ('ic'),
+        Pearson correlation ('corr') and sign 'hit_rate' of the index against
+        the target on the test fold, the fit and score timings, the worker
+        'pid' and the fitted 'weight_{column}' of every component.
+    """
+    if isinstance(target, str):
+        y = data[target]
+        data = data.drop(columns=target)
+    else:
+        y = target.reindex(data.index)
+    columns = data.select_dtypes(include=[np.number]).columns
+    values = np.column_stack(
+        [data[columns].to_numpy(dtype=float), y.to_numpy(dtype=float)]
+    )
+    folds = walk_forward_folds(len(values), train, test, step, gap, expanding)
+    if not folds:
+        raise ValueError(
+            f"{len(values)} rows are not enough for a fold of {train} train "
+            f"and {test} test rows"
+        )
+    tasks = [(fold, bounds, fit) for fold, bounds in enumerate(folds)]
+    workers = min(max_workers or os.cpu_count() or 1, max(len(tasks), 1))
+
+    with stage("walk_forward") as metrics:
+        if workers == 1:
+            _set_local(values)
+            try:
+                results = list(map(_run_fold, tasks))
+            finally:
+                _set_local(None)
+        else:
+            shared = shared_memory.SharedMemory(create=True, size=values.nbytes)
+            try:
+                view = np.ndarray(values.shape, dtype=np.float64, buffer=shared.buf)
+                np.copyto(view, values)
+                del view
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_attach,
+                    initargs=(shared.name, values.shape),
+                ) as executor:
+                    results = list(executor.map(_run_fold, tasks))
+            finally:
+                shared.close()
+                shared.unlink()
+        metrics.add(rows=len(results))
+
+    rows = []
+    for (train_start, train_end, test_start, test_end), result in zip(folds, results):
+        rows.append(
+            {
+                "train_start": data.index[train_start],
+                "train_end": data.index[train_end - 1],
+                "test_start": data.index[test_start],
+                "test_end": data.index[test_end - 1],
+                **result,
+            }
+        )
+    df = pd.DataFrame(rows)
+    return df.rename(
+        columns={f"weight_{k}": f"weight_{column}" for k, column in enumerate(columns)}
+    ).set_index("fold")
@@ -0,0 +1,7 @@
+from .feature_store import FeatureDefinition, FeatureStore, default_features
+
+__all__ = [
+    "FeatureDefinition",
+    "FeatureStore",
+    "default_features",
+]
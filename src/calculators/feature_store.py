@@ -0,0 +1,306 @@
+import logging
+import pickle
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from src.utils import slice_time
+from src.utils.instrumentation import stage
+
+features_logger = logging.getLogger("features_logger")
+
+FeatureFunc = Callable[[pd.DataFrame], Union[pd.Series, pd.DataFrame]]
+
+# Perpetual funding rates are quoted per 8 hour funding interval
+FUNDING_PERIODS_PER_YEAR = 3 * 365
+
+
+class FeatureDefinition:
+    """
+    A named derived series computed from sources or other features.
+
+    Parameters
+    ----------
+    name : str
+        The feature name, also the column name when func returns a Series.
+    func : Callable
+        Computes the feature from its input frame and returns a Series or a
+        DataFrame indexed by date. With one input the frame is that input; with
+        several they are joined on their date index.
+    inputs : Sequence[str]
+        The names of the sources (e.g. 'perpetuals', 'futures') or features
+        the feature is computed from.
+    lookback : int, optional
+        The number of input timestamps before the first new one that func
+        needs to compute it, e.g. window - 1 for a rolling window. Default is 0.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: FeatureFunc,
+        inputs: Sequence[str],
+        lookback: int = 0,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.lookback = lookback
+
+    def __repr__(self) -> str:
+        return (
+            f"FeatureDefinition(name={self.name!r}, inputs={self.inputs!r}, "
+            f"lookback={self.lookback})"
+        )
+
+
+class FeatureStore:
+    """
+    Materializes derived features of market-data objects, refreshed incrementally.
+
+    Every feature keeps its computed rows and the last timestamp computed.
+    On refresh only the input rows after that timestamp are processed,
+    preceded by the feature's lookback warm-up rows; features are refreshed
+    after the features they depend on. If an input now starts earlier than the
+    materialized rows (e.g. after extending start), the feature is fully
+    recomputed.
+
+    Parameters
+    ----------
+    sources : Dict[str, object]
+        Named market-data objects exposing a time-sorted `historical_data`,
+        e.g. {"perpetuals": PerpetualsData(...), "futures": FuturesData(...)}.
+    features : Iterable[FeatureDefinition], optional
+        The feature definitions to register. Default is None.
+
+    Examples
+    --------
+    >>> sources = {"perpetuals": perps, "futures": futures}
+    >>> store = FeatureStore(sources, default_features())
+    >>> store.refresh()
+    >>> perps.end = "2024-11-01"
+    >>> store.refresh()  # computes the new rows only
+    >>> store.get("basis_zscore")
+    """
+
+    def __init__(
+        self,
+        sources: Dict[str, object],
+        features: Optional[Iterable[FeatureDefinition]] = None,
+    ) -> None:
+        self.sources = dict(sources)
+        self.__definitions: Dict[str, FeatureDefinition] = {}
+        self.__values: Dict[str, pd.DataFrame] = {}
+        for feature in features or ():
+            self.register(feature)
+
+    def register(self, feature: FeatureDefinition) -> None:
+        """Adds or replaces a feature definition, forgetting its computed rows."""
+        for name in feature.inputs:
+            if name not in self.sources and name not in self.__definitions:
+                raise ValueError(
+                    f"Unknown input '{name}' of feature '{feature.name}': "
+                    "register its source or feature first."
+                )
+        self.__definitions[feature.name] = feature
+        self.invalidate(feature.name)
+
+    @property
+    def features(self) -> List[str]:
+        return list(self.__definitions)
+
+    def dependencies(self, name: str) -> List[str]:
+        """The features name depends on, directly or not, in computation order."""
+        order: List[str] = []
+
+        def visit(feature_name: str) -> None:
+            for input_name in self.__definitions[feature_name].inputs:
+                if input_name in self.__definitions and input_name not in order:
+                    visit(input_name)
+                    order.append(input_name)
+
+        visit(name)
+        return order
+
+    def last_timestamp(self, name: str) -> Optional[pd.Timestamp]:
+        """The last computed timestamp of a feature, None if never computed."""
+        values = self.__values.get(name)
+        if values is None or values.empty:
+            return None
+        return values.index[-1]
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """Forgets the computed rows of a feature and its dependents, or of all."""
+        if name is None:
+            self.__values.clear()
+            return
+        self.__values.pop(name, None)
+        for other, feature in self.__definitions.items():
+            if name in feature.inputs:
+                self.invalidate(other)
+
+    def get(self, name: str, refresh: bool = True) -> pd.DataFrame:
+        """
+        The materialized rows of a feature.
+
+        Parameters
+        ----------
+        name : str
+            The feature name.
+        refresh : bool, optional
+            Whether to compute new rows first. Default is True.
+
+        Returns
+        -------
+        pd.DataFrame
+            The feature indexed by date.
+        """
+        if refresh:
+            self.refresh(name)
+        return self.__values.get(name, pd.DataFrame())
+
+    def refresh(self, names: Union[str, Sequence[str], None] = None) -> Dict[str, int]:
+        """
+        Computes the new rows of features and their dependencies.
+
+        Parameters
+        ----------
+        names : str or Sequence[str], optional
+            The features to refresh. Default is None (all).
+
+        Returns
+        -------
+        Dict[str, int]
+            The number of rows added per refreshed feature.
+        """
+        if names is None:
+            names = self.features
+        elif isinstance(names, str):
+            names = [names]
+
+        order: List[str] = []
+        for name in names:
+            for dependency in self.dependencies(name) + [name]:
+                if dependency not in order:
+                    order.append(dependency)
+        return {name: self.__refresh_one(name) for name in order}
+
+    def __input(self, feature: FeatureDefinition) -> pd.DataFrame:
+        frames = []
+        for name in feature.inputs:
+            if name in self.sources:
+                frames.append(self.sources[name].historical_data)
+            else:
+                frames.append(self.__values.get(name, pd.DataFrame()))
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, axis=1, join="outer").sort_index()
+
+    def __refresh_one(self, name: str) -> int:
+        feature = self.__definitions[name]
+        data = self.__input(feature)
+        if data.empty:
+            return 0
+
+        previous = self.__values.get(name)
+        last = self.last_timestamp(name)
+        if last is not None and data.index[0] < previous.index[0]:
+            features_logger.info("Inputs of %s start earlier, recomputing", name)
+            previous, last = None, None
+
+        if last is not None:
+            times = data.index.unique()
+            first_new = times.searchsorted(last, "right")
+            if first_new == len(times):
+                return 0
+            data = slice_time(data, start=times[max(0, first_new - feature.lookback)])
+
+        with stage("feature_refresh") as metrics:
+            result = feature.func(data)
+            if isinstance(result, pd.Series):
+                result = result.to_frame(name)
+            if last is not None:
+                result = result[result.index > last]
+            metrics.add(rows=len(result))
+
+        self.__values[name] = (
+            result if previous is None else pd.concat([previous, result])
+        )
+        features_logger.info("Refreshed %s: %s new rows", name, len(result))
+        return len(result)
+
+    def save(self, file_name: str) -> None:
+        if not file_name.endswith(".pkl"):
+            file_name += ".pkl"
+        with open(file_name, "wb") as f:
+            pickle.dump(self, f)
+        print(f"FeatureStore object saved to {file_name}")
+
+    @classmethod
+    def load(cls, file_name: str):
+        if not file_name.endswith(".pkl"):
+            file_name += ".pkl"
+        with open(file_name, "rb") as f:
+            store = pickle.load(f)
+        print(f"FeatureStore object loaded from {file_name}")
+        return store
+
+
+# ----------------------------------------------------------------
+# Default features
+# ----------------------------------------------------------------
+
+
+def annualized_funding(perpetuals: pd.DataFrame) -> pd.Series:
+    """Open-interest weighted funding rate of all perpetuals, annualized."""
+    weights = perpetuals["open_interest"].fillna(0)
+    weighted = (perpetuals["funding"] * weights).groupby(level=0).sum(min_count=1)
+    total = weights.groupby(level=0).sum()
+    return weighted / total.replace(0, np.nan) * FUNDING_PERIODS_PER_YEAR
+
+
+def oi_change(perpetuals: pd.DataFrame) -> pd.Series:
+    """Relative change of the total open interest of all perpetuals."""
+    return perpetuals["open_interest"].groupby(level=0).sum().pct_change()
+
+
+def annualized_basis(futures: pd.DataFrame) -> pd.Series:
+    """The annualized basis of processed futures."""
+    return futures["annualized_basis"]
+
+
+def rolling_zscore(column: str, window: int) -> FeatureFunc:
+    """A feature function computing the rolling z-score of a column."""
+
+    def func(data: pd.DataFrame) -> pd.Series:
+        series = data[column]
+        rolling = series.rolling(window)
+        return (series - rolling.mean()) / rolling.std()
+
+    return func
+
+
+def default_features(zscore_window: int = 30) -> List[FeatureDefinition]:
+    """
+    The common derived series, for sources named 'perpetuals' and 'futures'.
+
+    Parameters
+    ----------
+    zscore_window : int, optional
+        The number of timestamps of the basis z-score window. Default is 30.
+
+    Returns
+    -------
+    List[FeatureDefinition]
+        annualized_funding, oi_change, annualized_basis and basis_zscore.
+    """
+    return [
+        FeatureDefinition("annualized_funding", annualized_funding, ["perpetuals"]),
+        FeatureDefinition("oi_change", oi_change, ["perpetuals"], lookback=1),
+        FeatureDefinition("annualized_basis", annualized_basis, ["futures"]),
+        FeatureDefinition(
+            "basis_zscore",
+            rolling_zscore("annualized_basis", zscore_window),
+            ["annualized_basis"],
+            lookback=zscore_window - 1,
+        ),
+    ]
@@ -1,2 +1,3 @@
-#from .perpetuals_data import PerpetualsData
+from .perpetuals_data import PerpetualsData  # noqa: F401
 from .futures_data import FuturesData  # noqa: F401
+from .multi_currency import MultiCurrencyData  # noqa: F401
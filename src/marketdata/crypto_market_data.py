@@ -1,11 +1,14 @@
 import pickle
 import numpy as np
+import pandas as pd
 import copy
+from src.utils.instrumentation import instrument
 
 class CryptoMarketData:
     def __init__(self):
         pass
 
+    @instrument("cleaning", count_rows=False)
     def z_score_cleaning(self, threshold: float = 3.0):
         """
         Winsorizes outliers from all numerical columns in the DataFrame using the Z-score method.
@@ -68,5 +71,66 @@ class CryptoMarketData:
         print(f"PerpetualsData object loaded from {file_name}")
         return perp_data
 
+    def snapshot(self):
+        """
+        Returns a copy of the object with its own historical_data frame.
+
+        With pandas copy-on-write enabled, nothing is duplicated up front: the
+        snapshot shares the column buffers and a column is only materialized
+        when it is modified in one of the frames, so branching cleaned and raw
+        versions of the data is cheap. Copy-on-write changes pandas semantics
+        globally (chained assignment no longer writes through), so it is not
+        turned on here; opt in with
+
+        >>> pd.set_option("mode.copy_on_write", True)
+
+        Otherwise the data is deep-copied, as modifying a frame that shares
+        buffers would also modify the original.
+
+        Returns
+        -------
+        CryptoMarketData
+            A new object of the same type with its own historical_data frame.
+        """
+        self.historical_data  # waits for a pending lazy load
+        shared = pd.get_option("mode.copy_on_write") is True
+        snap = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, pd.DataFrame):
+                setattr(snap, name, value.copy(deep=not shared))
+        return snap
+
     def copy(self):
-        return copy.deepcopy(self)
\ No newline at end of file
+        return self.snapshot()
+
+    def memory_report(self, *snapshots) -> pd.DataFrame:
+        """
+        Memory used by each column of historical_data and how much of it is shared.
+
+        Parameters
+        ----------
+        *snapshots : CryptoMarketData
+            Other objects, e.g. obtained with snapshot(), to compare buffers with.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by column, with the 'bytes' of the column and the bytes
+            'shared' with at least one of the snapshots. Totals are given by sum().
+        """
+        others = [
+            other.historical_data[column].to_numpy()
+            for other in snapshots
+            for column in other.historical_data.columns
+        ]
+        rows = {}
+        for column in self.historical_data.columns:
+            values = self.historical_data[column].to_numpy()
+            shared = any(np.shares_memory(values, other) for other in others)
+            rows[column] = {
+                'bytes': values.nbytes,
+                'shared': values.nbytes if shared else 0,
+            }
+        return pd.DataFrame.from_dict(
+            rows, orient='index', columns=['bytes', 'shared']
+        )
\ No newline at end of file
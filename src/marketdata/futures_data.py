@@ -1,8 +1,22 @@
-from typing import Literal
+from typing import Literal, Optional, Sequence, Tuple
 import pandas as pd
 from .crypto_market_data import CryptoMarketData
-from src.utils import geq, process_futures
+from src.utils import (
+    ValidationReport,
+    constant_maturity_basis,
+    expiry_basis,
+    geq,
+    merge_append,
+    process_futures,
+    slice_time,
+    sort_by_time,
+    validate_futures,
+)
 from src.services import get_data
+from .loader import PendingLoad
+
+# A fetch: processed rows, validation report and annualized basis per expiry
+Fetched = Tuple[pd.DataFrame, Optional[ValidationReport], pd.DataFrame]
 
 
 class FuturesData(CryptoMarketData):
@@ -13,24 +27,152 @@ class FuturesData(CryptoMarketData):
         currency: Literal["BTC", "ETH"],
         start: str,
         end: str,
+        granularity: Optional[
+            Literal["5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d"]
+        ] = None,
+        lazy: bool = False,
+        prefetch: bool = False,
+        validate: bool = True,
     ) -> None:
         self.__currency = currency
         self.__start = start
         self.__end = end
+        self.__granularity = granularity
+        self.__lazy = lazy or prefetch
+        self.__prefetch = prefetch
+        self.__validate = validate
+        self.__validation = None
 
-        self.__historical_data = process_futures(
-            get_data(self.__currency, self.type(), self.__start, self.__end)
-        )
+        self.__historical_data = None
+        self.__expiries = None
+        self.__pending = None
+        self.__load()
         super().__init__()
 
+    def __load(self) -> None:
+        """
+        Loads the whole start to end range, eagerly or as a pending request.
+
+        See PerpetualsData for the lazy and prefetch modes: fetches leave the
+        object untouched, their data and report are only kept by __keep.
+        """
+        if self.__pending is not None:
+            self.__pending.cancel()
+        if self.__lazy:
+            self.__pending = PendingLoad(
+                self.__fetch, self.__start, self.__end, prefetch=self.__prefetch
+            )
+        else:
+            self.__pending = None
+            self.__historical_data, self.__expiries = self.__keep(
+                self.__fetch(self.__start, self.__end)
+            )
+
+    def __fetch(self, start: str, end: str) -> Fetched:
+        """
+        Processed futures between start and end, sorted by a unique date index.
+
+        Without granularity the midnight snapshots are read (daily data);
+        otherwise MongoDB buckets the snapshots and returns the first one of
+        every contract per bucket. Unless validate is off, the snapshots are
+        first checked by validate_futures. The annualized basis of every
+        (date, expiry) is kept alongside for term_structure. Returns the rows,
+        the report and the basis per expiry without touching the object.
+        """
+        snapshots = get_data(
+            self.__currency,
+            self.type(),
+            start,
+            end,
+            granularity=self.__granularity,
+            as_frame=True,
+        )
+        report = self.__check(snapshots, start, end)
+        return (
+            sort_by_time(process_futures(snapshots)),
+            report,
+            sort_by_time(expiry_basis(snapshots), ("expiry",)),
+        )
+
+    def __keep(self, fetched: Fetched) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Keeps the report of a fetch and returns its rows and basis per expiry."""
+        df, report, expiries = fetched
+        if report is not None:
+            self.__validation = report
+        return df, expiries
+
     @classmethod
     def type(cls):
         return cls.__type
 
+    def __check(
+        self, df: pd.DataFrame, start: str, end: str
+    ) -> Optional[ValidationReport]:
+        """Validates fetched rows, None if validate is off."""
+        if not self.__validate:
+            return None
+        report = validate_futures(df, self.__granularity)
+        report.log(f"{self.__currency} futures {start} to {end}")
+        return report
+
+    def __materialize(self) -> None:
+        """Waits for the pending fetch, if any, and keeps its result."""
+        if self.__pending is not None:
+            self.__historical_data, self.__expiries = self.__keep(
+                self.__pending.result()
+            )
+            self.__pending = None
+
     @property
     def historical_data(self):
+        self.__materialize()
         return self.__historical_data
 
+    @property
+    def validation(self) -> Optional[ValidationReport]:
+        """
+        The data-quality report of the last fetch, None if validate is off.
+
+        Its masks are aligned with the rows as fetched, before sorting and
+        deduplication; failed rules are also logged as warnings.
+        """
+        self.__materialize()
+        return self.__validation
+
+    @property
+    def loaded(self) -> bool:
+        """Whether historical_data is available without waiting for a fetch."""
+        return self.__pending is None or self.__pending.done
+
+    def term_structure(self, tenors: Sequence[int] = (7, 30, 90, 180)) -> pd.DataFrame:
+        """
+        Constant-maturity annualized basis for every date between start and end.
+
+        It is interpolated from the basis per expiry kept with the loaded
+        data, without querying MongoDB again.
+
+        Parameters
+        ----------
+        tenors : Sequence[int], optional
+            Target maturities in days. Default is (7, 30, 90, 180).
+
+        Returns
+        -------
+        pd.DataFrame
+            A DataFrame indexed by date with one 'annualized_basis_{tenor}d' column per tenor.
+        """
+        self.__materialize()
+        return constant_maturity_basis(self.__expiries, tenors)
+
+    @property
+    def granularity(self) -> Optional[str]:
+        return self.__granularity
+
+    @granularity.setter
+    def granularity(self, granularity: Optional[str]) -> None:
+        self.__granularity = granularity
+        self.__load()
+
     @property
     def currency(self) -> Literal["BTC", "ETH"]:
         return self.__currency
@@ -41,9 +183,7 @@ class FuturesData(CryptoMarketData):
             pass
         else:
             self.__currency = currency
-            self.__historical_data = process_futures(
-                get_data(self.__currency, self.type(), self.__start, self.__end)
-            )
+            self.__load()
 
     @property
     def start(self) -> str:
@@ -51,17 +191,19 @@ class FuturesData(CryptoMarketData):
 
     @start.setter
     def start(self, start: str) -> None:
+        if not self.loaded:
+            # Nothing fetched yet: only the pending request changes
+            self.__start = start
+            self.__load()
+            return
+        self.__materialize()
         if geq(start, self.__start):
-            self.__historical_data = self.__historical_data[
-                self.__historical_data.index >= start
-            ]
+            self.__historical_data = slice_time(self.__historical_data, start=start)
+            self.__expiries = slice_time(self.__expiries, start=start)
         else:
-            df = process_futures(
-                get_data(self.__currency, self.type(), start, self.__start)
-            )[:-1]
-            self.__historical_data = pd.concat(
-                [df, self.__historical_data], axis=0, ignore_index=True
-            )
+            df, expiries = self.__keep(self.__fetch(start, self.__start))
+            self.__historical_data = merge_append(self.__historical_data, df)
+            self.__expiries = merge_append(self.__expiries, expiries, ("expiry",))
         self.__start = start
 
     @property
@@ -70,15 +212,16 @@ class FuturesData(CryptoMarketData):
 
     @end.setter
     def end(self, end: str) -> None:
+        if not self.loaded:
+            self.__end = end
+            self.__load()
+            return
+        self.__materialize()
         if geq(self.__end, end):
-            self.__historical_data = self.__historical_data[
-                self.__historical_data.index <= end
-            ]
+            self.__historical_data = slice_time(self.__historical_data, end=end)
+            self.__expiries = slice_time(self.__expiries, end=end)
         else:
-            df = process_futures(
-                get_data(self.__currency, self.type(), self.__end, end)
-            )[1:]
-            self.__historical_data = pd.concat(
-                [self.__historical_data, df], axis=0, ignore_index=True
-            )
+            df, expiries = self.__keep(self.__fetch(self.__end, end))
+            self.__historical_data = merge_append(self.__historical_data, df)
+            self.__expiries = merge_append(self.__expiries, expiries, ("expiry",))
         self.__end = end
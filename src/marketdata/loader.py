@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+# Size of the thread pool shared by every background prefetch
+MAX_WORKERS = 8
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """The thread pool running background prefetches, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_WORKERS, thread_name_prefix="marketdata"
+            )
+        return _executor
+
+
+class PendingLoad:
+    """
+    A deferred call whose result is computed once, on demand or in the background.
+
+    Parameters
+    ----------
+    fn : Callable
+        The loading function, e.g. a fetch between start and end.
+    *args
+        The arguments of fn.
+    prefetch : bool, optional
+        Whether to start the call right away on the shared thread pool,
+        otherwise it runs on the first result(). Default is False.
+
+    Notes
+    -----
+    Pickling a pending load waits for its result and stores only the result,
+    so market-data objects can be saved in any state.
+
+    A prefetch can only be cancelled while it waits in the pool queue: once
+    running, the call goes on to the end and its result is discarded.
+    """
+
+    def __init__(self, fn: Callable, *args, prefetch: bool = False) -> None:
+        self._fn: Optional[Callable] = partial(fn, *args)
+        self._future: Optional[Future] = (
+            get_executor().submit(self._fn) if prefetch else None
+        )
+        self._lock = threading.Lock()
+        self._done = False
+        self._value: Any = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the result is available without blocking."""
+        return self._done or (
+            self._future is not None
+            and self._future.done()
+            and not self._future.cancelled()
+        )
+
+    def result(self) -> Any:
+        """Waits for (or runs) the call and returns its result."""
+        with self._lock:
+            if not self._done:
+                if self._future is not None and not self._future.cancelled():
+                    self._value = self._future.result()
+                else:
+                    self._value = self._fn()
+                self._done = True
+                self._fn = self._future = None
+            return self._value
+
+    def cancel(self) -> None:
+        """
+        Cancels the background call if it has not started yet.
+
+        A call already running cannot be stopped. A later result() runs a
+        cancelled call in the calling thread.
+        """
+        if self._future is not None:
+            self._future.cancel()
+
+    def __getstate__(self) -> dict:
+        return {"value": self.result()}
+
+    def __setstate__(self, state: dict) -> None:
+        self._fn = self._future = None
+        self._lock = threading.Lock()
+        self._done = True
+        self._value = state["value"]
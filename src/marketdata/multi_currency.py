@@ -0,0 +1,314 @@
+from typing import List, Literal, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from .crypto_market_data import CryptoMarketData
+from .perpetuals_data import INSTRUMENT_KEYS
+from src.utils import (
+    ValidationReport,
+    process_futures,
+    rolling_percentile_rank,
+    sort_by_time,
+    validate_futures,
+    validate_perpetuals,
+)
+from src.utils.data_fetchers import (
+    PERPS_COLUMNS,
+    get_historical_all_perps,
+    get_instruments_data,
+)
+from src.utils.instrumentation import instrument
+from src.services import get_data
+
+
+class MultiCurrencyData(CryptoMarketData):
+    """
+    Perpetuals or futures of several currencies stacked in one DataFrame.
+
+    All currencies are loaded together: futures and stored perpetuals with a
+    single MongoDB query, perpetuals from the API with a single instrument
+    listing. Rows carry a 'currency' column and are sorted by date then
+    currency (then instrument for perpetuals), so cleaning and normalization
+    run once over the stacked data, grouped by currency, instead of once per
+    object.
+
+    Parameters
+    ----------
+    currencies : Sequence[str]
+        The currencies, e.g. ("BTC", "ETH").
+    start : str
+        The first date, 'YYYY-MM-DD' format.
+    end : str
+        The last date, 'YYYY-MM-DD' format.
+    type : Literal['perpetual', 'futures'], optional
+        The instruments. Default is 'futures'.
+    granularity : str, optional
+        As for PerpetualsData and FuturesData. Required for perpetuals from
+        the API. Default is None.
+    source : Literal['api', 'mongo'], optional
+        Where perpetuals are read from, futures always come from MongoDB.
+        Default is 'mongo'.
+    validate : bool, optional
+        Whether to check the fetched rows, see PerpetualsData. Default is True.
+    """
+
+    def __init__(
+        self,
+        currencies: Sequence[str],
+        start: str,
+        end: str,
+        type: Literal["perpetual", "futures"] = "futures",
+        granularity: Optional[
+            Literal["5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d"]
+        ] = None,
+        source: Literal["api", "mongo"] = "mongo",
+        validate: bool = True,
+    ) -> None:
+        self.__currencies = [currency.upper() for currency in currencies]
+        self.__start = start
+        self.__end = end
+        self.__type = type
+        self.__granularity = granularity
+        self.__source = source
+        self.__validate = validate
+        self.__validation = None
+        self.__historical_data = self.__fetch()
+        super().__init__()
+
+    def __fetch(self) -> pd.DataFrame:
+        if self.__type == "futures":
+            return self.__fetch_futures()
+        return self.__fetch_perpetuals()
+
+    def __fetch_futures(self) -> pd.DataFrame:
+        """Reads the snapshots of every currency at once and processes them together."""
+        snapshots = get_data(
+            self.__currencies,
+            "futures",
+            self.__start,
+            self.__end,
+            granularity=self.__granularity,
+            as_frame=True,
+        )
+        if self.__validate:
+            self.__validation = validate_futures(snapshots, self.__granularity)
+            self.__validation.log(f"{'/'.join(self.__currencies)} futures")
+        if snapshots.empty:
+            return pd.DataFrame(columns=["date", "currency"])
+
+        # 'currency' holds the contract, e.g. btc-27dec24
+        snapshots["underlying"] = self.__underlying(snapshots["currency"])
+        df = process_futures(snapshots, by=("underlying",)).reset_index()
+        df = df.rename(columns={"underlying": "currency"})
+        return sort_by_time(df, ("currency",))
+
+    def __fetch_perpetuals(self) -> pd.DataFrame:
+        if self.__source == "mongo":
+            df = get_data(
+                self.__currencies,
+                "perpetuals",
+                self.__start,
+                self.__end,
+                granularity=self.__granularity,
+                as_frame=True,
+            )
+            if not df.empty:
+                df["currency"] = df["currency"].str.upper()
+        else:
+            # One listing for every currency
+            instruments = get_instruments_data(None, "perpetual")
+            frames = []
+            for currency in self.__currencies:
+                listed = instruments[instruments["currency"] == currency]
+                df = get_historical_all_perps(
+                    currency,
+                    self.__start,
+                    self.__end,
+                    self.__granularity,
+                    instruments=listed[["market", "instrument"]],
+                    dedupe=False,
+                )
+                if not df.empty:
+                    frames.append(df.assign(currency=currency))
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        if df.empty:
+            # No currency returned data: keep the columns xs and aligned use
+            df = pd.DataFrame(columns=[*PERPS_COLUMNS, "currency"])
+        if self.__validate:
+            self.__validation = validate_perpetuals(df, self.__granularity)
+            self.__validation.log(f"{'/'.join(self.__currencies)} perpetuals")
+        return sort_by_time(df, self.keys)
+
+    def __underlying(self, contracts: pd.Series) -> pd.Series:
+        """The requested currency of every contract name, matched like get_data."""
+        pattern = f"({'|'.join(self.__currencies)})"
+        return contracts.str.upper().str.extract(pattern, expand=False)
+
+    @property
+    def currencies(self) -> List[str]:
+        return list(self.__currencies)
+
+    @property
+    def start(self) -> str:
+        return self.__start
+
+    @property
+    def end(self) -> str:
+        return self.__end
+
+    @property
+    def granularity(self) -> Optional[str]:
+        return self.__granularity
+
+    def type(self) -> str:
+        return self.__type
+
+    @property
+    def keys(self) -> Tuple[str, ...]:
+        """The columns identifying a series: the currency, then the instrument."""
+        if self.__type == "futures":
+            return ("currency",)
+        return ("currency", *INSTRUMENT_KEYS)
+
+    @property
+    def historical_data(self) -> pd.DataFrame:
+        return self.__historical_data
+
+    @property
+    def validation(self) -> Optional[ValidationReport]:
+        """The data-quality report of the stacked rows, None if validate is off."""
+        return self.__validation
+
+    def xs(self, currency: str) -> pd.DataFrame:
+        """The rows of one currency, as a single-currency object would hold them."""
+        df = self.__historical_data
+        return df[df["currency"].to_numpy() == currency.upper()]
+
+    def aligned(
+        self, columns: Optional[Sequence[str]] = None, aggfunc: str = "mean"
+    ) -> pd.DataFrame:
+        """
+        The numerical columns on a common date index, one column per currency.
+
+        Parameters
+        ----------
+        columns : Sequence[str], optional
+            The columns to align. Default is None (all numerical columns).
+        aggfunc : str, optional
+            How the instruments of a currency are combined for perpetuals,
+            e.g. 'mean' or 'sum'. Default is 'mean'.
+
+        Returns
+        -------
+        pd.DataFrame
+            Indexed by date, with (column, currency) columns; dates missing
+            for a currency are NaN.
+        """
+        df = self.__historical_data
+        if columns is None:
+            columns = self.__numerical_columns()
+        grouped = df.groupby([df.index, "currency"])[list(columns)].agg(aggfunc)
+        aligned = grouped.unstack("currency").rename_axis("date")
+        return aligned.reindex(
+            columns=pd.MultiIndex.from_product([columns, self.__currencies])
+        )
+
+    def to_array(
+        self, columns: Optional[Sequence[str]] = None, aggfunc: str = "mean"
+    ) -> np.ndarray:
+        """
+        The aligned columns as a (date, currency, column) array.
+
+        Parameters
+        ----------
+        columns : Sequence[str], optional
+            The columns, see aligned. Default is None.
+        aggfunc : str, optional
+            How perpetuals of a currency are combined. Default is 'mean'.
+
+        Returns
+        -------
+        np.ndarray
+            A (T, len(currencies), len(columns)) array.
+        """
+        aligned = self.aligned(columns, aggfunc)
+        n_columns = len(aligned.columns) // len(self.__currencies)
+        values = aligned.to_numpy(dtype=float)
+        return values.reshape(len(aligned), n_columns, -1).transpose(0, 2, 1)
+
+    def __numerical_columns(self) -> List[str]:
+        df = self.__historical_data
+        return list(df.select_dtypes(include=[np.number]).columns)
+
+    @instrument("cleaning", count_rows=False)
+    def z_score_cleaning(self, threshold: float = 3.0):
+        """
+        Winsorizes outliers of every numerical column with per-currency Z-scores.
+
+        Same as CryptoMarketData.z_score_cleaning on each currency separately,
+        computed once for all currencies with grouped transforms.
+
+        Parameters
+        ----------
+        threshold : float, optional
+            The Z-score threshold above which data points are considered outliers (default is 3.0).
+
+        Returns
+        -------
+        MultiCurrencyData
+            self.
+        """
+        df = self.__historical_data
+        columns = self.__numerical_columns()
+        grouped = df.groupby("currency")[columns]
+        mean, std = grouped.transform("mean"), grouped.transform("std")
+        df[columns] = df[columns].clip(
+            lower=mean - threshold * std, upper=mean + threshold * std
+        )
+        return self
+
+    @instrument("normalization")
+    def normalize(
+        self,
+        method: Literal["z_score", "min_max", "percentile_rank"] = "z_score",
+        window: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Normalized numerical columns, computed per series for all currencies at once.
+
+        Parameters
+        ----------
+        method : Literal['z_score', 'min_max', 'percentile_rank'], optional
+            Like z_score_normalize, min_max_scale or percentile_rank_normalize,
+            applied within each currency (and instrument for perpetuals).
+            Default is 'z_score'.
+        window : int, optional
+            The rolling window of 'percentile_rank'. Default is None.
+
+        Returns
+        -------
+        pd.DataFrame
+            A copy of historical_data with normalized numerical columns.
+        """
+        df = self.__historical_data.copy()
+        columns = self.__numerical_columns()
+        by = df.groupby(list(self.keys), sort=False)
+        grouped = by[columns]
+
+        if method == "z_score":
+            # StandardScaler uses the population standard deviation
+            mean, std = grouped.transform("mean"), grouped.transform("std", ddof=0)
+            df[columns] = (df[columns] - mean) / std
+        elif method == "min_max":
+            low, high = grouped.transform("min"), grouped.transform("max")
+            df[columns] = (df[columns] - low) / (high - low)
+        elif method == "percentile_rank":
+            if window is None:
+                raise ValueError("A window is required for percentile_rank.")
+            for column in columns:
+                df[column] = by[column].transform(
+                    lambda series: rolling_percentile_rank(series, window)
+                )
+        else:
+            raise ValueError(f"Unknown normalization method {method}")
+        return df
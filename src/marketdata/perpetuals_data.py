@@ -1,8 +1,21 @@
-from typing import Literal
+from typing import Literal, Optional, Tuple
 import pandas as pd
 import pickle
 #from .crypto_market_data import CryptoMarketData
-from src.utils import geq, get_historical_all_perps
+from src.utils import (
+    ValidationReport,
+    geq,
+    merge_append,
+    slice_time,
+    sort_by_time,
+    validate_perpetuals,
+)
+from src.utils.data_fetchers import get_historical_all_perps
+from src.services import get_data, save_perpetuals
+from .loader import PendingLoad
+
+# Columns identifying one instrument, rows are unique per (date, market, symbol)
+INSTRUMENT_KEYS = ("market", "symbol")
 
 
 class PerpetualsData:
@@ -14,23 +27,138 @@ class PerpetualsData:
         start: str,
         end: str,
         granularity: Literal["5m", "15m", "30m", "1h", "2h", "4h", "6h", "12h", "1d"],
+        source: Literal["api", "mongo"] = "api",
+        store: bool = False,
+        lazy: bool = False,
+        prefetch: bool = False,
+        validate: bool = True,
     ) -> None:
         self.__currency = currency
         self.__start = start
         self.__end = end
         self.__granularity = granularity
-        self.__historical_data = get_historical_all_perps(
-            self.__currency, self.__start, self.__end, self.__granularity
-        )
+        self.__source = source
+        self.__store = store
+        self.__lazy = lazy or prefetch
+        self.__prefetch = prefetch
+        self.__validate = validate
+        self.__validation = None
+        self.__historical_data = None
+        self.__pending = None
+        self.__load()
+
+    def __load(self) -> None:
+        """
+        Loads the whole start to end range.
+
+        Eagerly by default. With lazy=True only the request is recorded and
+        the data is fetched on the first access to historical_data; with
+        prefetch=True the fetch starts at once on a shared thread pool, so
+        several objects load concurrently. Changing the range of a pending
+        object cancels its prefetch, but a fetch already running cannot be
+        stopped: it completes in the background and its result is discarded.
+        Fetches therefore leave the object untouched, their data and report
+        are only kept by __keep once waited for.
+        """
+        if self.__pending is not None:
+            self.__pending.cancel()
+        if self.__lazy:
+            self.__pending = PendingLoad(
+                self.__fetch, self.__start, self.__end, prefetch=self.__prefetch
+            )
+        else:
+            self.__pending = None
+            self.__historical_data = self.__keep(self.__fetch(self.__start, self.__end))
+
+    def __fetch(
+        self, start: str, end: str
+    ) -> Tuple[pd.DataFrame, Optional[ValidationReport]]:
+        """
+        Loads perpetuals between start and end from the API or the local store.
+
+        With source="mongo" the rows are read from the `perpetuals` collection,
+        otherwise they are fetched over HTTP. Rows are sorted by date then
+        instrument and indexed by date, so that start/end trims are binary
+        searches. Unless validate is off, the rows are first checked by
+        validate_perpetuals: API pages are checked as received, before rows
+        repeated across pages are dropped. Returns the rows and the report
+        without touching the object, so a superseded fetch has no effect.
+        """
+        if self.__source == "mongo":
+            df = get_data(
+                self.__currency,
+                "perpetuals",
+                start,
+                end,
+                granularity=self.__granularity,
+                as_frame=True,
+            )
+        else:
+            df = get_historical_all_perps(
+                self.__currency, start, end, self.__granularity, dedupe=False
+            )
+        report = self.__check(df, start, end)
+        return sort_by_time(df, INSTRUMENT_KEYS), report
+
+    def __keep(
+        self, fetched: Tuple[pd.DataFrame, Optional[ValidationReport]]
+    ) -> pd.DataFrame:
+        """Keeps the report of a fetch, stores its rows if asked and returns them."""
+        df, report = fetched
+        if report is not None:
+            self.__validation = report
+        if self.__source != "mongo" and self.__store and not df.empty:
+            save_perpetuals(df, self.__currency)
+        return df
+
+    @property
+    def source(self) -> str:
+        return self.__source
 
     @classmethod
     def type(cls):
         return cls.__type
 
+    def __check(
+        self, df: pd.DataFrame, start: str, end: str
+    ) -> Optional[ValidationReport]:
+        """Validates fetched rows, None if validate is off."""
+        if not self.__validate:
+            return None
+        report = validate_perpetuals(df, self.__granularity)
+        report.log(f"{self.__currency} perpetuals {start} to {end}")
+        return report
+
+    def __materialize(self) -> None:
+        """Waits for the pending fetch, if any, and keeps its result."""
+        if self.__pending is not None:
+            self.__historical_data = self.__keep(self.__pending.result())
+            self.__pending = None
+
     @property
     def historical_data(self):
+        self.__materialize()
         return self.__historical_data
 
+    @property
+    def validation(self) -> Optional[ValidationReport]:
+        """
+        The data-quality report of the last fetch, None if validate is off.
+
+        Its masks are aligned with the rows as fetched, before sorting. From
+        the API these are the concatenated pages, so rows re-sent on several
+        pages are flagged as duplicates; rows read from MongoDB are already
+        unique per (date, market, symbol). Failed rules are also logged as
+        warnings.
+        """
+        self.__materialize()
+        return self.__validation
+
+    @property
+    def loaded(self) -> bool:
+        """Whether historical_data is available without waiting for a fetch."""
+        return self.__pending is None or self.__pending.done
+
     @property
     def currency(self) -> Literal["BTC", "ETH"]:
         return self.__currency
@@ -41,9 +169,7 @@ class PerpetualsData:
             pass
         else:
             self.__currency = currency
-            self.__historical_data = get_historical_all_perps(
-                self.__currency, self.__start, self.__end, self.__granularity
-            )
+            self.__load()
 
     @property
     def start(self) -> str:
@@ -51,16 +177,19 @@ class PerpetualsData:
 
     @start.setter
     def start(self, start: str) -> None:
+        if not self.loaded:
+            # Nothing fetched yet: only the pending request changes
+            self.__start = start
+            self.__load()
+            return
+        self.__materialize()
         if geq(start, self.__start):
-            self.__historical_data = self.__historical_data[
-                self.__historical_data["date"] >= start
-            ]
+            self.__historical_data = slice_time(self.__historical_data, start=start)
         else:
-            df = get_historical_all_perps(
-                self.__currency, start, self.__start, self.__granularity
-            )[:-1]
-            self.__historical_data = pd.concat(
-                [df, self.__historical_data], axis=0, ignore_index=True
+            self.__historical_data = merge_append(
+                self.__historical_data,
+                self.__keep(self.__fetch(start, self.__start)),
+                INSTRUMENT_KEYS,
             )
         self.__start = start
 
@@ -70,16 +199,18 @@ class PerpetualsData:
 
     @end.setter
     def end(self, end: str) -> None:
+        if not self.loaded:
+            self.__end = end
+            self.__load()
+            return
+        self.__materialize()
         if geq(self.__end, end):
-            self.__historical_data = self.__historical_data[
-                self.__historical_data["date"] <= end
-            ]
+            self.__historical_data = slice_time(self.__historical_data, end=end)
         else:
-            df = get_historical_all_perps(
-                self.__currency, self.__end, end, self.__granularity
-            )[1:]
-            self.__historical_data = pd.concat(
-                [self.__historical_data, df], axis=0, ignore_index=True
+            self.__historical_data = merge_append(
+                self.__historical_data,
+                self.__keep(self.__fetch(self.__end, end)),
+                INSTRUMENT_KEYS,
             )
         self.__end = end
 
@@ -90,9 +221,7 @@ class PerpetualsData:
     @granularity.setter
     def granularity(self, granularity: str) -> None:
         self.__granularity = granularity
-        self.__historical_data = get_historical_all_perps(
-            self.__currency, self.__start, self.__end, self.__granularity
-        )
+        self.__load()
 
     def save(self, file_name: str) -> None:
         if not file_name.endswith(".pkl"):
@@ -1,3 +1,12 @@
-from .mongodb_service import get_data
+from .mongodb_service import get_client, get_data, save_perpetuals
+from .live_feed import LiveFeed
+from .index_server import IndexCache, IndexServer
 
-__all__ = ["get_data"]
+__all__ = [
+    "get_client",
+    "get_data",
+    "save_perpetuals",
+    "LiveFeed",
+    "IndexCache",
+    "IndexServer",
+]
@@ -0,0 +1,350 @@
+"""
+Local HTTP endpoint serving Fear & Greed index values from memory.
+
+The pipeline publishes each currency's index history (a 'value' column plus
+one column per component, indexed by date) into an IndexCache; responses are
+encoded once per publication and reused until the next one, with ETags so
+unchanged data is answered with 304.
+
+Endpoints
+---------
+GET /health
+GET /v1/index/{currency}/latest       latest value and component breakdown (JSON)
+GET /v1/index/{currency}/history      ?start=&end=&format=json|csv|arrow
+
+Usage
+-----
+python -m src.services.index_server --port 8000 --history BTC=btc_index.parquet
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+from src.utils import configure_logging, slice_time, sort_by_time
+
+index_logger = logging.getLogger("index_logger")
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+def _etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(map(str, parts)).encode()).hexdigest()[:16]
+    return f'"{digest}"'
+
+
+class _Published:
+    """A published history with its precomputed latest payload."""
+
+    __slots__ = ("digest", "history", "latest", "latest_etag")
+
+    def __init__(self, history: pd.DataFrame, latest: bytes) -> None:
+        # Content based, so ETags stay valid across server restarts
+        hashes = pd.util.hash_pandas_object(history, index=True).to_numpy()
+        self.digest = hashlib.sha1(hashes.tobytes()).hexdigest()
+        self.history = history
+        self.latest = latest
+        self.latest_etag = _etag(self.digest, "latest")
+
+
+class IndexCache:
+    """
+    In-memory, thread-safe store of index histories per currency.
+
+    Parameters
+    ----------
+    value_column : str, optional
+        The column holding the index value, the others are components.
+        Default is "value".
+    max_encoded : int, optional
+        The number of encoded history responses kept per currency. Default is 64.
+    """
+
+    def __init__(self, value_column: str = "value", max_encoded: int = 64) -> None:
+        self.value_column = value_column
+        self.max_encoded = max_encoded
+        self._lock = threading.Lock()
+        self._published: Dict[str, _Published] = {}
+        self._encoded: Dict[str, OrderedDict] = {}
+
+    def publish(self, currency: str, history: pd.DataFrame) -> str:
+        """
+        Replaces the history of a currency, usually after a pipeline run.
+
+        Parameters
+        ----------
+        currency : str
+            The currency, e.g. "BTC".
+        history : pd.DataFrame
+            The index values and components, indexed by date.
+
+        Returns
+        -------
+        str
+            The ETag of the new latest payload.
+        """
+        if "date" in history.columns:
+            history = history.set_index("date")
+        history = sort_by_time(history)
+        if history.empty:
+            raise ValueError(f"Empty index history published for {currency}")
+
+        # to_json turns numpy scalars into JSON numbers and NaN into null
+        components = json.loads(history.iloc[-1].to_json())
+        latest = {
+            "currency": currency.upper(),
+            "date": history.index[-1].isoformat(),
+            "value": components.pop(self.value_column),
+            "components": components,
+        }
+        body = json.dumps(latest).encode()
+
+        entry = _Published(history, body)
+        with self._lock:
+            self._published[currency.upper()] = entry
+            self._encoded[currency.upper()] = OrderedDict()
+        index_logger.info("Published %s rows of %s index", len(history), currency)
+        return entry.latest_etag
+
+    def currencies(self):
+        with self._lock:
+            return sorted(self._published)
+
+    def latest(self, currency: str) -> Optional[Tuple[str, bytes]]:
+        """The ETag and JSON body of the latest value, None if unknown."""
+        entry = self._published.get(currency.upper())
+        if entry is None:
+            return None
+        return entry.latest_etag, entry.latest
+
+    def history_etag(
+        self, currency: str, start: Optional[str], end: Optional[str], fmt: str
+    ) -> Optional[str]:
+        """The ETag of a history response, computed without encoding it."""
+        entry = self._published.get(currency.upper())
+        if entry is None:
+            return None
+        return _etag(entry.digest, start, end, fmt)
+
+    def history(
+        self, currency: str, start: Optional[str], end: Optional[str], fmt: str
+    ) -> Optional[Tuple[str, bytes]]:
+        """
+        The ETag and encoded body of a history range, None if unknown.
+
+        Encoded responses are kept in a small LRU cache per currency, so
+        dashboards polling the same range are served from memory.
+        """
+        key = currency.upper()
+        entry = self._published.get(key)
+        if entry is None:
+            return None
+        etag = _etag(entry.digest, start, end, fmt)
+
+        with self._lock:
+            encoded = self._encoded.get(key)
+            if encoded is not None and etag in encoded:
+                encoded.move_to_end(etag)
+                return etag, encoded[etag]
+
+        body = _encode(slice_time(entry.history, start, end), fmt)
+        with self._lock:
+            encoded = self._encoded.get(key)
+            if encoded is not None and self._published.get(key) is entry:
+                encoded[etag] = body
+                while len(encoded) > self.max_encoded:
+                    encoded.popitem(last=False)
+        return etag, body
+
+
+def _encode(df: pd.DataFrame, fmt: str) -> bytes:
+    """Encodes a history range in a response format."""
+    df = df.rename_axis("date").reset_index()
+    if fmt == "csv":
+        return df.to_csv(index=False, date_format="%Y-%m-%dT%H:%M:%S").encode()
+    if fmt == "arrow":
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    return df.to_json(orient="records", date_format="iso").encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "IndexServer"
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment on kept-alive connections
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(
+        self,
+        status: int,
+        body: bytes = b"",
+        content_type: str = "application/json",
+        etag: Optional[str] = None,
+    ) -> None:
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _error(self, status: int, message: str) -> None:
+        self._send(status, json.dumps({"message": message}).encode())
+
+    def _not_modified(self, etag: str) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is None:
+            return False
+        return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        cache = self.server.cache
+
+        if parts == ["health"]:
+            body = json.dumps({"currencies": cache.currencies()}).encode()
+            self._send(200, body)
+            return
+        if len(parts) != 4 or parts[:2] != ["v1", "index"]:
+            self._error(404, f"Unknown endpoint {url.path}")
+            return
+
+        currency, resource = parts[2], parts[3]
+        if resource == "latest":
+            latest = cache.latest(currency)
+            if latest is None:
+                self._error(404, f"No index published for {currency}")
+            elif self._not_modified(latest[0]):
+                self._send(304, etag=latest[0])
+            else:
+                self._send(200, latest[1], etag=latest[0])
+            return
+
+        if resource == "history":
+            fmt = params.get("format", "json")
+            if fmt not in CONTENT_TYPES:
+                self._error(400, f"Unknown format {fmt}, use json, csv or arrow")
+                return
+            start, end = params.get("start"), params.get("end")
+            try:
+                etag = cache.history_etag(currency, start, end, fmt)
+                if etag is not None and self._not_modified(etag):
+                    self._send(304, etag=etag)
+                    return
+                history = cache.history(currency, start, end, fmt)
+            except ValueError as e:
+                self._error(400, str(e))
+                return
+            if history is None:
+                self._error(404, f"No index published for {currency}")
+            else:
+                self._send(200, history[1], CONTENT_TYPES[fmt], etag=history[0])
+            return
+
+        self._error(404, f"Unknown endpoint {url.path}")
+
+
+class IndexServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server answering index requests from an IndexCache.
+
+    Parameters
+    ----------
+    address : Tuple[str, int], optional
+        The host and port to bind, port 0 picks a free one. Default is ("127.0.0.1", 0).
+    cache : IndexCache, optional
+        The cache the pipeline publishes to. Default is a new IndexCache().
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        cache: Optional[IndexCache] = None,
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.cache = cache or IndexCache()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "IndexServer":
+        """Serves in a background daemon thread and returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops serving and releases the port."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "IndexServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--history",
+        action="append",
+        default=[],
+        help="CURRENCY=path of a Parquet or CSV index history, repeatable",
+    )
+    args = parser.parse_args(argv)
+    configure_logging()
+
+    server = IndexServer((args.host, args.port))
+    for item in args.history:
+        currency, _, path = item.partition("=")
+        if path.endswith(".csv"):
+            history = pd.read_csv(path, index_col=0, parse_dates=True)
+        else:
+            history = pd.read_parquet(path)
+        server.cache.publish(currency, history)
+
+    print(f"Serving Fear & Greed index on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
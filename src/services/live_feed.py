@@ -0,0 +1,291 @@
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Literal, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+from .mongodb_service import get_client, transform_data
+
+feed_logger = logging.getLogger("feed_logger")
+
+# Error code of $changeStream on a standalone server (no replica set)
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+DEFAULT_TRANSFORMS: Dict[str, Callable[[dict], dict]] = {
+    "futures": transform_data,
+}
+
+
+class LiveFeed:
+    """
+    Streams new documents of MongoDB collections into an in-memory buffer.
+
+    Each watched collection is followed by a background thread using a change
+    stream, or, on a standalone server without change streams, by polling
+    documents above a high-watermark on `_id` (or `(date, _id)`). Incoming documents
+    are transformed (futures with transform_data) and appended to a bounded
+    buffer numbered by a monotonically increasing offset, so several
+    consumers can read incrementally with read(offset). An exception raised
+    by a follower thread is kept and raised again by read and stop.
+
+    Parameters
+    ----------
+    collections : Iterable[str], optional
+        The collections of the `laevitas` database to watch. Default is ("futures",).
+    coin : str, optional
+        Only keep documents whose currency matches this regex, e.g. "BTC". Default is None.
+    mode : str, optional
+        - auto: change streams, falling back to polling when unsupported
+        - change_stream: change streams only
+        - poll: polling only
+
+        Default is "auto".
+    watermark : str, optional
+        The increasing field used by polling, "_id" or "date". Documents
+        sharing a date are ordered by `_id`, so none is skipped when a batch
+        ends within a date. Default is "_id".
+    poll_interval : float, optional
+        The seconds between two polls. Default is 1.0.
+    batch_size : int, optional
+        The maximum number of documents read per poll. Default is 10,000.
+    buffer_size : int, optional
+        The number of documents kept in memory, older ones are evicted. Default is 100,000.
+    transforms : Dict[str, Callable], optional
+        Per-collection document transforms. Default is DEFAULT_TRANSFORMS.
+    """
+
+    def __init__(
+        self,
+        collections: Iterable[str] = ("futures",),
+        coin: Optional[str] = None,
+        mode: Literal["auto", "change_stream", "poll"] = "auto",
+        watermark: Literal["_id", "date"] = "_id",
+        poll_interval: float = 1.0,
+        batch_size: int = 10_000,
+        buffer_size: int = 100_000,
+        transforms: Optional[Dict[str, Callable[[dict], dict]]] = None,
+    ) -> None:
+        self.collections = list(collections)
+        self.coin = coin
+        self.mode = mode
+        self.watermark = watermark
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.transforms = DEFAULT_TRANSFORMS if transforms is None else transforms
+
+        self._buffer: deque = deque(maxlen=buffer_size)
+        self._next_offset = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._error: Optional[BaseException] = None
+
+    # ----------------------------------------------------------------
+    # Consumer API
+    # ----------------------------------------------------------------
+
+    @property
+    def offset(self) -> int:
+        """The offset the next incoming document will get."""
+        with self._condition:
+            return self._next_offset
+
+    def read(
+        self, offset: int = 0, timeout: Optional[float] = None
+    ) -> Tuple[List[dict], int]:
+        """
+        Returns the buffered documents from offset onwards.
+
+        Parameters
+        ----------
+        offset : int, optional
+            The first offset to return, usually the value returned by the
+            previous call. Evicted offsets are skipped. Default is 0.
+        timeout : float, optional
+            Seconds to wait for at least one document when none is available,
+            None to return immediately. Default is None.
+
+        Returns
+        -------
+        Tuple[List[dict], int]
+            The documents, each with its 'collection', and the offset to pass
+            to the next call.
+
+        Raises
+        ------
+        Exception :
+            The error that stopped a follower thread, if any.
+        """
+        with self._condition:
+            if timeout is not None:
+                self._condition.wait_for(
+                    lambda: self._next_offset > offset
+                    or self._stop.is_set()
+                    or self._error is not None,
+                    timeout,
+                )
+            if self._error is not None:
+                raise self._error
+            first = self._next_offset - len(self._buffer)
+            start = max(offset, first) - first
+            items = [self._buffer[i] for i in range(start, len(self._buffer))]
+            return items, self._next_offset
+
+    def _publish(self, collection: str, documents: List[dict]) -> None:
+        transform = self.transforms.get(collection)
+        items = []
+        for document in documents:
+            item = transform(document) if transform is not None else dict(document)
+            item["collection"] = collection
+            items.append(item)
+        with self._condition:
+            self._buffer.extend(items)
+            self._next_offset += len(items)
+            self._condition.notify_all()
+
+    # ----------------------------------------------------------------
+    # Lifecycle
+    # ----------------------------------------------------------------
+
+    def start(self) -> "LiveFeed":
+        """Starts one background follower thread per collection."""
+        self._stop.clear()
+        self._error = None
+        for name in self.collections:
+            thread = threading.Thread(
+                target=self._run, args=(name,), name=f"feed-{name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stops the follower threads, raising the error of a failed one if any."""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "LiveFeed":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ----------------------------------------------------------------
+    # Followers
+    # ----------------------------------------------------------------
+
+    def _run(self, name: str) -> None:
+        """Thread target: keeps the error of the follower for the consumers."""
+        try:
+            self._follow(name)
+        except Exception as e:
+            feed_logger.error("Follower of %s stopped: %s", name, e)
+            with self._condition:
+                if self._error is None:
+                    self._error = e
+                self._condition.notify_all()
+
+    def _follow(self, name: str) -> None:
+        collection = get_client()["laevitas"][name]
+        if self.mode != "poll":
+            try:
+                self._watch(name, collection)
+                return
+            except OperationFailure as e:
+                if self.mode == "change_stream" or e.code != CHANGE_STREAM_UNSUPPORTED:
+                    feed_logger.error("Change stream on %s failed: %s", name, e)
+                    raise
+                feed_logger.info(
+                    "Change streams unsupported, polling %s on %s", name, self.watermark
+                )
+        self._poll(name, collection)
+
+    def _watch(self, name: str, collection) -> None:
+        match = {"operationType": {"$in": ["insert", "replace", "update"]}}
+        if self.coin is not None:
+            match["fullDocument.currency"] = {"$regex": self.coin, "$options": "i"}
+
+        resume_token = None
+        while not self._stop.is_set():
+            try:
+                with collection.watch(
+                    [{"$match": match}],
+                    full_document="updateLookup",
+                    resume_after=resume_token,
+                    max_await_time_ms=int(self.poll_interval * 1000),
+                ) as stream:
+                    while not self._stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        # Advances on empty batches too, so that a stream
+                        # interrupted before its first event resumes where
+                        # it was opened rather than from now
+                        resume_token = stream.resume_token
+                        if change is None:
+                            continue
+                        if change.get("fullDocument") is not None:
+                            self._publish(name, [change["fullDocument"]])
+            except OperationFailure:
+                raise
+            except PyMongoError as e:
+                feed_logger.warning("Change stream on %s interrupted: %s", name, e)
+                self._stop.wait(self.poll_interval)
+
+    def _poll(self, name: str, collection) -> None:
+        query = {}
+        if self.coin is not None:
+            query["currency"] = {"$regex": self.coin, "$options": "i"}
+
+        # Start from the current high-watermark: only new documents are streamed
+        last = collection.find_one(query, sort=self._watermark_sort(DESCENDING))
+        high = self._watermark_of(last) if last is not None else None
+
+        while not self._stop.is_set():
+            try:
+                documents, high = self._poll_batch(collection, query, high)
+            except PyMongoError as e:
+                feed_logger.warning("Polling %s failed: %s", name, e)
+                documents = []
+
+            if documents:
+                self._publish(name, documents)
+            if len(documents) < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+    def _watermark_sort(self, direction: int) -> List[Tuple[str, int]]:
+        # A date is shared by many documents (one per futures contract), so
+        # it is made unique with `_id` as a tie-breaker
+        if self.watermark == "_id":
+            return [("_id", direction)]
+        return [(self.watermark, direction), ("_id", direction)]
+
+    def _watermark_of(self, document: dict) -> tuple:
+        return tuple(document[field] for field, _ in self._watermark_sort(ASCENDING))
+
+    def _poll_batch(
+        self, collection, query: dict, high: Optional[tuple]
+    ) -> Tuple[List[dict], Optional[tuple]]:
+        """Reads the next batch above the high-watermark, returning the new one."""
+        batch_query = dict(query)
+        if high is not None:
+            if self.watermark == "_id":
+                batch_query["_id"] = {"$gt": high[0]}
+            else:
+                value, _id = high
+                batch_query["$or"] = [
+                    {self.watermark: {"$gt": value}},
+                    {self.watermark: value, "_id": {"$gt": _id}},
+                ]
+        documents = list(
+            collection.find(batch_query)
+            .sort(self._watermark_sort(ASCENDING))
+            .limit(self.batch_size)
+        )
+        if documents:
+            high = self._watermark_of(documents[-1])
+        return documents, high
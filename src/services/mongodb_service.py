@@ -1,6 +1,60 @@
-from pymongo import MongoClient
-from typing import Literal, Optional
+import re
+from bson import decode_all
+from pymongo import ASCENDING, MongoClient, UpdateOne
+from typing import Iterable, List, Literal, Optional, Sequence, Union
 from datetime import datetime
+import pandas as pd
+from src.utils.instrumentation import stage
+
+PERPETUALS_FIELDS = [
+    "date",
+    "market",
+    "symbol",
+    "price",
+    "basis",
+    "funding",
+    "volume",
+    "open_interest",
+    "long_short_ratio",
+]
+
+# Flat output field -> key of the nested points["0"] snapshot of futures/options
+POINT_FIELDS = {
+    "price": "p",
+    "open_interest": "oi",
+    "volume": "v",
+    "basis": "b",
+    "yield": "y",
+}
+
+FUTURES_FIELDS = ["_id", "date", "currency", *POINT_FIELDS]
+
+GRANULARITY_MS = {
+    "5m": 5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h": 60 * 60_000,
+    "2h": 2 * 60 * 60_000,
+    "4h": 4 * 60 * 60_000,
+    "6h": 6 * 60 * 60_000,
+    "12h": 12 * 60 * 60_000,
+    "1d": 24 * 60 * 60_000,
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+_client: Optional[MongoClient] = None
+
+# The client on which the unique key of `perpetuals` has been created
+_perpetuals_indexed: Optional[MongoClient] = None
+
+
+def get_client(uri: str = "mongodb://localhost:27017/") -> MongoClient:
+    """Returns a MongoClient shared by the process (it keeps its own connection pool)."""
+    global _client
+    if _client is None:
+        _client = MongoClient(uri)
+    return _client
 
 
 def transform_data(input_data: dict) -> dict:
@@ -23,21 +77,69 @@ def transform_data(input_data: dict) -> dict:
 
 
 def get_data(
-    coin: Literal["BTC", "ETH"],
+    coin: Union[Literal["BTC", "ETH"], Sequence[str]],
     type: Literal["futures", "options", "perpetuals"],
     start: Optional[str] = None,
     end: Optional[str] = None,
     limit: Optional[int] = None,
-) -> list:
-    client = MongoClient("mongodb://localhost:27017/")
+    granularity: Optional[str] = None,
+    as_frame: bool = False,
+) -> Union[list, pd.DataFrame]:
+    """
+    Reads market data of a coin from the `laevitas` database.
+
+    Documents are flattened server-side (futures and options snapshots get
+    the POINT_FIELDS of points["0"] as top-level fields, like transform_data)
+    and read as raw BSON batches decoded in C, so no Python code runs per
+    document.
+
+    Parameters
+    ----------
+    coin : Literal['BTC', 'ETH'] or Sequence[str]
+        The currency, matched exactly but case-insensitively, or several
+        currencies read in a single query (perpetuals then also get their
+        'currency' field).
+    type : Literal['futures', 'options', 'perpetuals']
+        The collection.
+    start : str, optional
+        The first date, ISO format. Default is None.
+    end : str, optional
+        The last date, ISO format. Default is None.
+    limit : int, optional
+        The maximum number of rows. Default is None.
+    granularity : str, optional
+        Futures/options: bucket snapshots to 5m-1d instead of reading the
+        midnight ones. Perpetuals: keep rows aligned on it. Default is None.
+    as_frame : bool, optional
+        Whether to return a DataFrame built batch by batch instead of a list
+        of dicts. Default is False.
+
+    Returns
+    -------
+    list or pd.DataFrame
+        The flat rows.
+    """
+    client = get_client()
     db = client["laevitas"]
     collection = db[type]
 
+    coins = [coin] if isinstance(coin, str) else list(coin)
+
     # Create the base query for currency and hour
+    pattern = "^(?:" + "|".join(re.escape(c) for c in coins) + ")$"
     query = {
-        "currency": {"$regex": coin, "$options": "i"},
+        "currency": {"$regex": pattern, "$options": "i"},
         "$expr": {"$eq": [{"$hour": "$date"}, 0]},
     }
+    if type == "perpetuals":
+        # Stored perpetuals keep their fetched granularity, keep aligned rows only
+        del query["$expr"]
+        if granularity is not None:
+            step = GRANULARITY_MS[granularity]
+            query["$expr"] = {"$eq": [{"$mod": [{"$toLong": "$date"}, step]}, 0]}
+    elif granularity is not None:
+        # Intraday snapshots are bucketed server-side instead of the midnight filter
+        del query["$expr"]
 
     # Add date range filter if start and end dates are provided
     if start:
@@ -45,11 +147,190 @@ def get_data(
     if end:
         query.setdefault("date", {})["$lte"] = datetime.fromisoformat(end)
 
-    projection = {"currency": 1, "date": 1, "points.0": 1}
+    if type == "perpetuals":
+        fields = (
+            PERPETUALS_FIELDS
+            if isinstance(coin, str)
+            else PERPETUALS_FIELDS + ["currency"]
+        )
+        return _get_perpetuals(collection, query, limit, as_frame, fields)
+    if granularity is not None:
+        return _get_bucketed(collection, query, granularity, limit, as_frame)
+
+    pipeline = [{"$match": query}]
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+    pipeline.append(
+        {
+            "$project": {
+                "date": 1,
+                "currency": 1,
+                **{field: f"$points.0.{key}" for field, key in POINT_FIELDS.items()},
+            }
+        }
+    )
+
+    with stage("mongo_query") as metrics:
+        data = _decode(
+            collection.aggregate_raw_batches(pipeline), FUTURES_FIELDS, as_frame
+        )
+        metrics.add(rows=len(data))
+
+    return data
+
 
+def _decode(
+    batches: Iterable[bytes], fields: List[str], as_frame: bool
+) -> Union[list, pd.DataFrame]:
+    """
+    Decodes raw BSON batches of flat documents.
+
+    Every batch is decoded at once by the C extension of bson; with as_frame
+    the documents of a batch are turned into column arrays straight away and
+    only the per-batch frames are kept. Fields missing or null in a whole batch
+    are only added after concatenation, so they do not change the dtypes.
+    """
+    if not as_frame:
+        documents = []
+        for batch in batches:
+            documents.extend(decode_all(batch))
+        return documents
+
+    frames = [
+        pd.DataFrame(decode_all(batch)).dropna(axis=1, how="all") for batch in batches
+    ]
+    if not frames:
+        return pd.DataFrame(columns=fields)
+    return pd.concat(frames, ignore_index=True).reindex(columns=fields)
+
+
+def _get_perpetuals(
+    collection,
+    query: dict,
+    limit: Optional[int],
+    as_frame: bool,
+    fields: List[str] = PERPETUALS_FIELDS,
+) -> Union[list, pd.DataFrame]:
+    """Reads flat perpetuals documents sorted by (date, market, symbol)."""
+    projection = {field: 1 for field in fields}
+    projection["_id"] = 0
+
+    with stage("mongo_query") as metrics:
+        batches = collection.find_raw_batches(query, projection).sort(
+            [("date", ASCENDING), ("market", ASCENDING), ("symbol", ASCENDING)]
+        )
+        if limit is not None:
+            batches = batches.limit(limit)
+        results = _decode(batches, fields, as_frame)
+        metrics.add(rows=len(results))
+
+    return results
+
+
+def _get_bucketed(
+    collection, query: dict, granularity: str, limit: Optional[int], as_frame: bool
+) -> Union[list, pd.DataFrame]:
+    """
+    Reads the first snapshot of every contract in each time bucket.
+
+    Dates are truncated to the bucket start, a multiple of the granularity
+    since the epoch like the bins of pandas resample, and documents are
+    grouped per (contract, bucket) in MongoDB, so only one flattened row per
+    bucket and contract is transferred.
+    """
+    # date - ((date - epoch) mod step), date arithmetic every server version supports
+    since_epoch = {"$subtract": ["$date", EPOCH]}
+    step = GRANULARITY_MS[granularity]
+    bucket = {"$subtract": ["$date", {"$mod": [since_epoch, step]}]}
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"date": ASCENDING}},
+        {
+            "$group": {
+                "_id": {"currency": "$currency", "date": bucket},
+                "first_id": {"$first": "$_id"},
+                "point": {"$first": "$points.0"},
+            }
+        },
+        {"$sort": {"_id.date": ASCENDING, "_id.currency": ASCENDING}},
+        {
+            "$project": {
+                "_id": "$first_id",
+                "date": "$_id.date",
+                "currency": "$_id.currency",
+                **{field: f"$point.{key}" for field, key in POINT_FIELDS.items()},
+            }
+        },
+    ]
     if limit is not None:
-        results = collection.find(query, projection).limit(limit)
-    else:
-        results = collection.find(query, projection)
+        pipeline.append({"$limit": limit})
+
+    with stage("mongo_query") as metrics:
+        batches = collection.aggregate_raw_batches(pipeline, allowDiskUse=True)
+        results = _decode(batches, FUTURES_FIELDS, as_frame)
+        metrics.add(rows=len(results))
+
+    return results
+
+
+def save_perpetuals(
+    df: pd.DataFrame,
+    currency: Literal["BTC", "ETH"],
+    batch_size: int = 10_000,
+) -> int:
+    """
+    Upserts fetched perpetuals into the `perpetuals` collection.
+
+    Documents are keyed on (date, market, symbol) and written with unordered
+    bulk_write batches, so re-saving an overlapping range only updates it.
+    The unique index on that key is created on the first save of the process.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Perpetuals as returned by get_historical_all_perps.
+    currency : Literal['BTC', 'ETH']
+        The currency of the perpetuals, stored for the currency filter of get_data.
+    batch_size : int, optional
+        The number of upserts sent per bulk_write. Default is 10,000.
+
+    Returns
+    -------
+    int
+        The number of inserted or modified documents.
+    """
+    global _perpetuals_indexed
+    client = get_client()
+    collection = client["laevitas"]["perpetuals"]
+    if _perpetuals_indexed is not client:
+        collection.create_index(
+            [("date", ASCENDING), ("market", ASCENDING), ("symbol", ASCENDING)],
+            unique=True,
+        )
+        _perpetuals_indexed = client
+
+    columns = [c for c in PERPETUALS_FIELDS if c in df.columns]
+    records = df[columns].astype(object).where(df[columns].notna(), None)
+    records["date"] = pd.to_datetime(df["date"]).astype(object)
+    records["currency"] = currency
+
+    written = 0
+    with stage("mongo_upsert") as metrics:
+        for lo in range(0, len(records), batch_size):
+            operations = [
+                UpdateOne(
+                    {
+                        "date": doc["date"],
+                        "market": doc["market"],
+                        "symbol": doc["symbol"],
+                    },
+                    {"$set": doc},
+                    upsert=True,
+                )
+                for doc in records.iloc[lo : lo + batch_size].to_dict("records")
+            ]
+            result = collection.bulk_write(operations, ordered=False)
+            written += result.upserted_count + result.modified_count
+        metrics.add(rows=written)
 
-    return [transform_data(res) for res in list(results)]
+    return written
@@ -1,18 +1,70 @@
-from .scaling import z_score_normalize, min_max_scale
+from . import instrumentation
+from .logging_setup import configure_logging, stop_logging
+from .scaling import (
+    z_score_normalize,
+    min_max_scale,
+    percentile_rank_normalize,
+    RollingPercentileRank,
+)
 from .compare_date import geq
-from .futures_preprocessing import process_futures
+from .time_index import sort_by_time, slice_time, merge_append
+from .futures_preprocessing import (
+    process_futures,
+    process_futures_term_structure,
+    constant_maturity_basis,
+    expiry_basis,
+)
+from .downsampling import downsample_series
+from .rolling_corr import rolling_corr, RollingCorrelation
+from .validation import (
+    ValidationReport,
+    validate_market_data,
+    validate_perpetuals,
+    validate_futures,
+)
+from .kernels import rolling_zscore, rolling_winsorize, ewma, rolling_percentile_rank
 from .plotting import plot_series_analysis, corr_heatmap, pairplot, signal_decomp
-from .stats_tests import adf_test
+from .stats_tests import (
+    adf_test,
+    kpss_test,
+    batch_stationarity_tests,
+    clear_stationarity_cache,
+)
 
 
 __all__ = [
+    "instrumentation",
+    "configure_logging",
+    "stop_logging",
     "pairplot",
     "adf_test",
+    "kpss_test",
+    "batch_stationarity_tests",
+    "clear_stationarity_cache",
     "signal_decomp",
+    "downsample_series",
     "geq",
+    "sort_by_time",
+    "slice_time",
+    "merge_append",
     "plot_series_analysis",
     "corr_heatmap",
+    "rolling_corr",
+    "RollingCorrelation",
+    "ValidationReport",
+    "validate_market_data",
+    "validate_perpetuals",
+    "validate_futures",
+    "rolling_zscore",
+    "rolling_winsorize",
+    "ewma",
+    "rolling_percentile_rank",
     "min_max_scale",
     "process_futures",
+    "process_futures_term_structure",
+    "constant_maturity_basis",
+    "expiry_basis",
     "z_score_normalize",
+    "percentile_rank_normalize",
+    "RollingPercentileRank",
 ]
@@ -0,0 +1,403 @@
+import glob
+import json
+import logging
+import os
+from typing import Callable, Iterator, List, Literal, Optional, Sequence
+import pandas as pd
+from .data_fetchers import PERPS_COLUMNS, get_historical_all_perps, get_instruments_data
+from .instrumentation import stage
+
+chunked_logger = logging.getLogger("chunked_logger")
+
+Step = Callable[[pd.DataFrame], pd.DataFrame]
+
+# Bounds of the written and failed partitions of a directory
+MANIFEST = "_manifest.json"
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "The chunked mode writes Parquet partitions and requires pyarrow, "
+            "install it with `pip install pyarrow`."
+        ) from e
+    return pyarrow
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _partition_path(out_dir: str, start: pd.Timestamp) -> str:
+    return os.path.join(out_dir, f"part-{start:%Y%m%dT%H%M}.parquet")
+
+
+def _granularity_delta(granularity: str) -> pd.Timedelta:
+    """The Timedelta of an API granularity such as '5m', '4h' or '1d'."""
+    return pd.Timedelta(granularity.replace("m", "min"))
+
+
+def _manifest_path(out_dir: str) -> str:
+    return os.path.join(out_dir, MANIFEST)
+
+
+def _read_manifest(out_dir: str) -> dict:
+    """The partitions and failures recorded in out_dir, empty if none."""
+    path = _manifest_path(out_dir)
+    if not os.path.exists(path):
+        return {"partitions": [], "failed": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_manifest(out_dir: str, manifest: dict) -> None:
+    """Writes the manifest atomically, so an interrupted run leaves it readable."""
+    path = _manifest_path(out_dir)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def _overlaps(
+    entry: dict, lower: pd.Timestamp, upper: pd.Timestamp, closed: bool
+) -> bool:
+    """Whether a recorded partition shares dates with lower to upper."""
+    start, end = pd.Timestamp(entry["start"]), pd.Timestamp(entry["end"])
+    before = start <= upper if closed else start < upper
+    after = end >= lower if entry["closed"] else end > lower
+    return before and after
+
+
+def _resize(
+    span: pd.Timedelta,
+    size: int,
+    memory_limit: int,
+    min_span: pd.Timedelta,
+    max_span: pd.Timedelta,
+) -> pd.Timedelta:
+    """The next partition length, so that its size stays under memory_limit."""
+    if size <= 0:
+        return span
+    ratio = 0.8 * memory_limit / size
+    return max(min_span, min(max_span, span * ratio)).floor(min_span)
+
+
+def process_perps_chunked(
+    currency: Literal["BTC", "ETH"],
+    start: str,
+    end: str,
+    granularity: str,
+    out_dir: str,
+    steps: Sequence[Step] = (),
+    partition: str = "30D",
+    memory_limit: int = 512 * 1024**2,
+    limit: int = 144,
+    resume: bool = True,
+) -> List[str]:
+    """
+    Fetches and processes all perpetuals of a currency one time-partition at a time.
+
+    The start to end range is cut into consecutive partitions. Each one is
+    fetched, passed through steps (cleaning, alignment, aggregation...) and
+    written to its own Parquet file in out_dir before the next one is
+    fetched, so only one partition is ever held in memory. The partition
+    length adapts to the observed size: each partition is sized from the
+    measured size of the previous one, shrinking when it exceeded
+    memory_limit and growing up to the initial length when there is room.
+    Nothing is measured before the first partition, so it always spans
+    `partition` and is not bounded by memory_limit: pick a partition length
+    whose data fits in memory. merge_partitions or read_partitions combine
+    the files afterwards.
+
+    The bounds of every written partition are recorded in a manifest in
+    out_dir. A partition that comes back empty, because the API failed or
+    there is no data in its range, is not written: it is recorded as failed
+    and fetched again by the next run. A partition where some perpetuals
+    failed is written with the rows that were fetched and recorded with the
+    'missing' perpetuals, so it is fetched again, and replaced, by the next
+    run as well.
+
+    Parameters
+    ----------
+    currency : Literal['BTC', 'ETH']
+        The currency of the perpetuals.
+    start : str
+        The start date, inclusive.
+    end : str
+        The end date, inclusive.
+    granularity : str
+        The time interval of the data, e.g. '5m'.
+    out_dir : str
+        The directory of the Parquet partitions, created if needed.
+    steps : Sequence[Callable], optional
+        Functions applied in order to each partition, taking and returning a
+        DataFrame. They only see one partition: statistics such as z-scores are
+        computed per partition. Default is ().
+    partition : str, optional
+        The initial and maximum length of a partition, a pandas Timedelta
+        string. Default is '30D'.
+    memory_limit : int, optional
+        The target size in bytes of a processed partition. Default is 512MB.
+    limit : int, optional
+        The number of data points per API page. Default is 144.
+    resume : bool, optional
+        Whether to keep the partitions of the manifest whose files are still
+        in out_dir and only fetch the rest of the range. Default is True.
+
+    Returns
+    -------
+    List[str]
+        The paths of the partitions covering start to end, in time order.
+    """
+    _require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = _read_manifest(out_dir) if resume else {"partitions": [], "failed": []}
+    instruments = None
+    max_span = pd.Timedelta(partition)
+    min_span = _granularity_delta(granularity)
+    span = max_span
+    current, stop = pd.Timestamp(start), pd.Timestamp(end)
+    paths = []
+
+    while current <= stop:
+        recorded = {
+            pd.Timestamp(entry["start"]): entry
+            for entry in manifest["partitions"]
+            if os.path.exists(os.path.join(out_dir, entry["path"]))
+        }
+        entry = recorded.get(current)
+        # The last partition includes its end, the others stop before it; a
+        # partial partition is fetched again
+        reusable = (
+            entry is not None
+            and not entry.get("missing")
+            and (
+                pd.Timestamp(entry["end"]) == stop
+                if entry["closed"]
+                else pd.Timestamp(entry["end"]) <= stop
+            )
+        )
+        if reusable:
+            chunked_logger.info("Skipping partition %s, already written", entry["path"])
+            upper = pd.Timestamp(entry["end"])
+            span = _resize(
+                upper - current, entry["bytes"], memory_limit, min_span, max_span
+            )
+            paths.append(os.path.join(out_dir, entry["path"]))
+            if entry["closed"]:
+                break
+            current = upper
+            continue
+
+        # Stop at the next partition kept from a previous run
+        following = [bound for bound in recorded if current < bound < stop]
+        upper = min([current + span, stop, *following])
+        last = upper == stop
+        path = _partition_path(out_dir, current)
+
+        if instruments is None:
+            instruments = get_instruments_data(currency, "perpetual")
+        missing = []
+        with stage("chunk_partition") as metrics:
+            df = get_historical_all_perps(
+                currency,
+                f"{current:%Y-%m-%d %H:%M:%S}",
+                f"{upper:%Y-%m-%d %H:%M:%S}",
+                granularity,
+                limit,
+                instruments=instruments,
+                failed=missing,
+            )
+            if not df.empty:
+                # The end of a partition is the start of the next one
+                df = df[df["date"] < upper] if not last else df
+            if df.empty or missing:
+                metrics.error = True
+            if not df.empty:
+                for step in steps:
+                    df = step(df)
+                size = _frame_bytes(df)
+                metrics.add(rows=len(df), bytes=size)
+
+        bounds = {
+            "start": current.isoformat(),
+            "end": upper.isoformat(),
+            "closed": last,
+        }
+        manifest["failed"] = [
+            failure
+            for failure in manifest["failed"]
+            if not _overlaps(failure, current, upper, last)
+        ]
+        if df.empty:
+            chunked_logger.warning(
+                "No data for partition %s to %s, it will be fetched again on resume",
+                current,
+                upper,
+            )
+            manifest["failed"].append(bounds)
+        else:
+            df.to_parquet(path, index=False)
+            chunked_logger.info(
+                "Wrote partition %s: %s rows, %.1f MB", path, len(df), size / 1024**2
+            )
+            if missing:
+                chunked_logger.warning(
+                    "Partition %s misses %s, it will be fetched again on resume",
+                    path,
+                    missing,
+                )
+                bounds["missing"] = [list(instrument) for instrument in missing]
+            # Partitions of previous runs overlapping this one are replaced
+            for old in manifest["partitions"]:
+                old_path = os.path.join(out_dir, old["path"])
+                if _overlaps(old, current, upper, last) and old_path != path:
+                    if os.path.exists(old_path):
+                        os.remove(old_path)
+            manifest["partitions"] = [
+                old
+                for old in manifest["partitions"]
+                if not _overlaps(old, current, upper, last)
+            ] + [
+                {
+                    **bounds,
+                    "path": os.path.basename(path),
+                    "rows": len(df),
+                    "bytes": size,
+                }
+            ]
+            manifest["partitions"].sort(key=lambda old: old["start"])
+            paths.append(path)
+            # Resize the next partition to stay under the memory ceiling
+            span = _resize(upper - current, size, memory_limit, min_span, max_span)
+        _write_manifest(out_dir, manifest)
+        del df
+
+        if last:
+            break
+        current = upper
+
+    return paths
+
+
+def _partition_files(out_dir: str) -> List[str]:
+    """The partition files of out_dir in time order, as listed by its manifest."""
+    if not os.path.exists(_manifest_path(out_dir)):
+        return sorted(glob.glob(os.path.join(out_dir, "part-*.parquet")))
+    paths = [
+        os.path.join(out_dir, entry["path"])
+        for entry in _read_manifest(out_dir)["partitions"]
+    ]
+    return [path for path in paths if os.path.exists(path)]
+
+
+def iter_partitions(
+    out_dir: str, columns: Optional[Sequence[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Reads the partitions of out_dir one at a time, in time order.
+
+    Parameters
+    ----------
+    out_dir : str
+        The directory written by process_perps_chunked.
+    columns : Sequence[str], optional
+        The columns to read. Default is None (all).
+
+    Yields
+    ------
+    pd.DataFrame
+        One partition.
+    """
+    _require_pyarrow()
+    for path in _partition_files(out_dir):
+        yield pd.read_parquet(path, columns=columns)
+
+
+def read_partitions(
+    out_dir: str,
+    columns: Optional[Sequence[str]] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Loads a time range of the partitions of out_dir into one DataFrame.
+
+    Parameters
+    ----------
+    out_dir : str
+        The directory written by process_perps_chunked.
+    columns : Sequence[str], optional
+        The columns to read, 'date' is always included. Default is None (all).
+    start : str, optional
+        The first date to keep. Default is None.
+    end : str, optional
+        The last date to keep. Default is None.
+
+    Returns
+    -------
+    pd.DataFrame
+        The selected rows; only the partitions overlapping start to end are read.
+    """
+    pa = _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    if columns is not None and "date" not in columns:
+        columns = ["date", *columns]
+    paths = _partition_files(out_dir)
+    if not paths:
+        return pd.DataFrame(columns=PERPS_COLUMNS if columns is None else columns)
+    dataset = ds.dataset(paths, format="parquet")
+    condition = None
+    if start is not None:
+        condition = ds.field("date") >= pa.scalar(pd.Timestamp(start))
+    if end is not None:
+        upper = ds.field("date") <= pa.scalar(pd.Timestamp(end))
+        condition = upper if condition is None else condition & upper
+    return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+
+def merge_partitions(
+    out_dir: str, path: str, columns: Sequence[str] = PERPS_COLUMNS
+) -> str:
+    """
+    Merges the partitions of out_dir into a single Parquet file.
+
+    Partitions are streamed one by one as row groups of the output file, so
+    the merge runs in the memory of the largest partition.
+
+    Parameters
+    ----------
+    out_dir : str
+        The directory written by process_perps_chunked.
+    path : str
+        The merged Parquet file.
+    columns : Sequence[str], optional
+        The columns of the merged file; each partition is conformed to them.
+        Default is PERPS_COLUMNS.
+
+    Returns
+    -------
+    str
+        The path of the merged file.
+    """
+    pa = _require_pyarrow()
+    writer = None
+    try:
+        for df in iter_partitions(out_dir):
+            if df.empty:
+                continue
+            table = pa.Table.from_pandas(
+                df.reindex(columns=list(columns)), preserve_index=False
+            )
+            if writer is None:
+                writer = pa.parquet.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    return path
@@ -1,4 +1,10 @@
 from datetime import datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def _parse(date_str: str, date_format: str) -> datetime:
+    return datetime.strptime(date_str, date_format)
 
 def geq(date_str1: str, date_str2: str, date_format: str = '%Y-%m-%d') -> bool:
     """
@@ -18,7 +24,7 @@ def geq(date_str1: str, date_str2: str, date_format: str = '%Y-%m-%d') -> bool:
     bool
         True if date1 is greater than or equal to date2, False otherwise.
     """
-    date1 = datetime.strptime(date_str1, date_format)
-    date2 = datetime.strptime(date_str2, date_format)
+    date1 = _parse(date_str1, date_format)
+    date2 = _parse(date_str2, date_format)
 
     return date1 >= date2
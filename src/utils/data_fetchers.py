@@ -1,33 +1,27 @@
 from time import sleep
+import asyncio
+import os
 import requests
-from typing import Literal
+from typing import AsyncIterator, Iterator, List, Literal, Optional
 import yaml
 import pandas as pd
 import numpy as np
 import logging
-from logging.handlers import RotatingFileHandler
 import warnings
-
-handler = RotatingFileHandler(
-    'logs/data_fetchers.log', maxBytes=5*1024*1024, backupCount=3  # 5MB file size with 3 backups
-)
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[handler]
-)
+from .instrumentation import stage
 
 perps_logger = logging.getLogger('perps_logger')
 futures_logger = logging.getLogger('futures_logger')
 options_logger = logging.getLogger('options_logger')
 instruments_logger = logging.getLogger('instruments_logger')
 
-base_url = 'https://api.laevitas.ch'
+# Point at a local replay server (benchmarks/replay_server.py) to test offline
+base_url = os.environ.get('LAEVITAS_BASE_URL', 'https://api.laevitas.ch')
 
-with open('config/secrets.yml', 'r') as file:
-    secrets = yaml.safe_load(file)
+secrets = {}
+if os.path.exists('config/secrets.yml'):
+    with open('config/secrets.yml', 'r') as file:
+        secrets = yaml.safe_load(file) or {}
 
 token = secrets.get('api', {}).get('crypto_data', {}).get('key')
 
@@ -104,15 +98,15 @@ def get_instruments_data(currency: Literal['BTC', 'ETH'] = None,
         if type is None:
             target_cols += ['type']
 
-        instruments_logger.info(f"Successfully retrieved and filtered instrument data (Currency: {currency}, Type: {type})")
+        instruments_logger.info("Successfully retrieved and filtered instrument data (Currency: %s, Type: %s)", currency, type)
         return filtered_df[target_cols].drop_duplicates().reset_index(drop=True)
 
     except requests.exceptions.RequestException as e:
-        instruments_logger.error(f"API request error: {e}")
+        instruments_logger.error("API request error: %s", e)
         return pd.DataFrame()
     
     except ValueError as ve:
-        instruments_logger.error(f"Data validation error: {ve}")
+        instruments_logger.error("Data validation error: %s", ve)
         return pd.DataFrame()
 
 # ----------------------------------------------------------------
@@ -151,7 +145,7 @@ def get_historical_perps_page(market: str,
     dict 
         A json containing a page of the historical data for the specified perpetual.
     """
-    perps_logger.info(f"Requesting historical perps data (Market: {market}, Symbol: {symbol}, Page: {page})")
+    perps_logger.info("Requesting historical perps data (Market: %s, Symbol: %s, Page: %s)", market, symbol, page)
     
     sleep(1)
     url = f'{base_url}/historical/derivs/perpetuals/{market}/{symbol}'
@@ -164,26 +158,62 @@ def get_historical_perps_page(market: str,
         'legacy': 'true'
     }
 
-    try:
-        response = requests.get(url=url, params=params, headers=headers)
-        response.raise_for_status()
-        perps_logger.info(f"Successfully retrieved page {page} of historical perps data for {symbol}")
-        return response.json()
-
-    except requests.exceptions.HTTPError as http_err:
-        perps_logger.error(f"HTTP error occurred: {http_err} | Retrying... (Market: {market}, Symbol: {symbol}, Page: {page})")
-        sleep(2)  # Wait before retrying
+    with stage('api_page_fetch') as metrics:
         try:
             response = requests.get(url=url, params=params, headers=headers)
             response.raise_for_status()
-            perps_logger.info(f"Successfully retrieved data after retry (Market: {market}, Symbol: {symbol}, Page: {page})")
-            return response.json()
-        except requests.exceptions.RequestException as err:
-            perps_logger.error(f"Failed on retry for {symbol} | Error: {err}")
+            perps_logger.info("Successfully retrieved page %s of historical perps data for %s", page, symbol)
+            data = response.json()
+            metrics.add(rows=len(data.get('items', [])), bytes=len(response.content))
+            return data
+
+        except requests.exceptions.HTTPError as http_err:
+            perps_logger.error("HTTP error occurred: %s | Retrying... (Market: %s, Symbol: %s, Page: %s)", http_err, market, symbol, page)
+            sleep(2)  # Wait before retrying
+            metrics.add(retries=1)
+            try:
+                response = requests.get(url=url, params=params, headers=headers)
+                response.raise_for_status()
+                perps_logger.info("Successfully retrieved data after retry (Market: %s, Symbol: %s, Page: %s)", market, symbol, page)
+                data = response.json()
+                metrics.add(rows=len(data.get('items', [])), bytes=len(response.content))
+                return data
+            except requests.exceptions.RequestException as err:
+                perps_logger.error("Failed on retry for %s | Error: %s", symbol, err)
+                metrics.error = True
+                return None
+        except Exception as e:
+            perps_logger.error("Unexpected error: %s", e)
+            metrics.error = True
             return None
-    except Exception as e:
-        perps_logger.error(f"Unexpected error: {e}")
-        return None
+
+
+def _iter_perps_items(market: str, symbol: str, start: str, end: str, granularity: str, limit: int = 144,
+                      failed_pages: Optional[List[int]] = None) -> Iterator[list]:
+    """
+    Yields the items of every page of a perpetual, in page order, as they arrive.
+
+    Pages that cannot be fetched are skipped and, if failed_pages is given,
+    their numbers are appended to it.
+    """
+    historical_data = get_historical_perps_page(market, symbol, start, end, granularity, limit)
+    if not historical_data or 'items' not in historical_data:
+        if failed_pages is not None:
+            failed_pages.append(1)
+        return
+
+    total_items = historical_data['meta']['total']
+    pages = int(np.ceil(total_items / limit))
+    perps_logger.info("Total items: %s, Pages to retrieve: %s", total_items, pages)
+    yield historical_data['items']
+
+    for page in range(2, pages + 1):
+        perps_logger.info("Fetching page %s for %s", page, symbol)
+        more_data = get_historical_perps_page(market, symbol, start, end, granularity, limit, page)
+        if more_data and 'items' in more_data:
+            yield more_data['items']
+        elif failed_pages is not None:
+            failed_pages.append(page)
 
 
 def get_historical_perps(market: str, 
@@ -191,7 +221,8 @@ def get_historical_perps(market: str,
                          start: str, 
                          end: str, 
                          granularity: str, 
-                         limit: int = 144) -> pd.DataFrame:
+                         limit: int = 144,
+                         failed_pages: Optional[List[int]] = None) -> pd.DataFrame:
     """
     Fetches historical data for a specified perpetual from the Laevitas API.
 
@@ -209,6 +240,9 @@ def get_historical_perps(market: str,
         The time interval for the data. Options: 5m, 15m, 30m, 1h, 2h, 4h, 6h, 12h, 1d.
     limit : int, optional 
         The maximum number of data points per page to retrieve. Default is 144.
+    failed_pages : List[int], optional
+        Filled with the numbers of the pages that could not be fetched, which
+        are missing from the result. Default is None.
 
     Returns
     -------
@@ -217,35 +251,60 @@ def get_historical_perps(market: str,
     """
     if market =='OKEX':
         market = 'OKX'
-    perps_logger.info(f"Fetching full historical perps data for {market}'s {symbol}")
+    perps_logger.info("Fetching full historical perps data for %s's %s", market, symbol)
 
-    historical_data = get_historical_perps_page(market, symbol, start, end, granularity, limit)
-    
-    if historical_data and 'items' in historical_data:
-        items = historical_data['items']
-        total_items = historical_data['meta']['total']
-        pages = int(np.ceil(total_items / limit))
+    items = []
+    for page_items in _iter_perps_items(market, symbol, start, end, granularity, limit, failed_pages):
+        items += page_items
 
-        perps_logger.info(f"Total items: {total_items}, Pages to retrieve: {pages}")
+    if items:
+        perps_logger.info("Successfully retrieved full historical data for %s's %s", market, symbol)
+        return get_df_items(items)
 
-        for page in range(2, pages + 1):
-            perps_logger.info(f"Fetching page {page} for {symbol}")
-            more_data = get_historical_perps_page(market, symbol, start, end, granularity, limit, page)
-            if more_data and 'items' in more_data:
-                items += more_data['items']
+    perps_logger.error("No data returned for %s's %s", market, symbol)
+    return pd.DataFrame()
 
-        if items:
-            perps_logger.info(f"Successfully retrieved full historical data for {market}'s {symbol}")
-            return get_df_items(items)
+PERPS_COLUMNS = ['date', 'market', 'symbol', 'price', 'basis', 'funding', 'volume', 'open_interest', 'long_short_ratio']
 
-    perps_logger.error(f"No data returned for {market}'s {symbol}")
-    return pd.DataFrame()
+def concat_perps(frames: list, dedupe: bool = True) -> pd.DataFrame:
+    """
+    Concatenates per-instrument perpetuals into one DataFrame, once.
+
+    Parameters
+    ----------
+    frames : list
+        DataFrames returned by get_historical_perps, with 'market' and 'symbol' columns.
+    dedupe : bool, optional
+        Whether to drop rows repeated across pages. Default is True.
+
+    Returns
+    -------
+    pd.DataFrame
+        The PERPS_COLUMNS of every frame, unique per (date, market, symbol) if dedupe.
+    """
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        combined_df = pd.concat(frames, axis=0, ignore_index=True)
+
+        for warning in w:
+            if issubclass(warning.category, FutureWarning):
+                perps_logger.warning("FutureWarning: %s", warning.message)
+            else:
+                perps_logger.warning("Warning: %s", warning.message)
+
+    combined_df = combined_df[PERPS_COLUMNS]
+    if not dedupe:
+        return combined_df
+    return combined_df.drop_duplicates(subset=['date', 'market', 'symbol'])
 
 def get_historical_all_perps(currency: Literal['BTC', 'ETH'], 
                              start: str, 
                              end: str, 
                              granularity: str, 
-                             limit: int = 144) -> pd.DataFrame:
+                             limit: int = 144,
+                             instruments: pd.DataFrame = None,
+                             dedupe: bool = True,
+                             failed: Optional[list] = None) -> pd.DataFrame:
     """
     Fetches historical data for all perpetuals for a specified currency.
 
@@ -261,6 +320,16 @@ def get_historical_all_perps(currency: Literal['BTC', 'ETH'],
         The time interval for the data. Options include: '5m', '15m', '30m', '1h', '2h', '4h', '6h', '12h', '1d'.
     limit : int, optional
         The maximum number of data points to retrieve per page (default is 144).
+    instruments : pd.DataFrame, optional
+        The 'market' and 'instrument' columns of the perpetuals to fetch, as returned by
+        get_instruments_data. Default is None (listed from the API).
+    dedupe : bool, optional
+        Whether to drop rows repeated across pages. Disable it to validate the
+        pages as they were received. Default is True.
+    failed : list, optional
+        Filled with the (market, symbol) of the perpetuals with pages that
+        could not be fetched, so that a failure can be told apart from a range
+        without data. Their rows are partial or missing. Default is None.
 
     Returns
     -------
@@ -268,46 +337,190 @@ def get_historical_all_perps(currency: Literal['BTC', 'ETH'],
         A DataFrame containing historical perpetual data for the specified currency across all markets.
     """
     perps_logger.info("*********************************************************************************************")
-    perps_logger.info(f"Fetching historical data for all available perpetuals of {currency} from {start} to {end}")
+    perps_logger.info("Fetching historical data for all available perpetuals of %s from %s to %s", currency, start, end)
 
     try:
-        instrument_df = get_instruments_data(currency, 'perpetual')
+        instrument_df = get_instruments_data(currency, 'perpetual') if instruments is None else instruments
         L_dfs = []
-        perps_logger.info(f"Found {len(instrument_df)} perpetuals for {currency}")
+        perps_logger.info("Found %s perpetuals for %s", len(instrument_df), currency)
 
         for row in instrument_df.itertuples():
             market = row.market
             symbol = row.instrument
             pd.set_option("future.no_silent_downcasting", True)
             
-            df = get_historical_perps(market, symbol, start, end, granularity, limit)
+            failed_pages = []
+            df = get_historical_perps(market, symbol, start, end, granularity, limit, failed_pages)
+            if failed_pages:
+                perps_logger.warning("Pages %s of %s's %s could not be fetched", failed_pages, market, symbol)
+                if failed is not None:
+                    failed.append((market, symbol))
             if df is not None and not df.empty:
                 df['market'] = market
                 df['symbol'] = symbol
                 L_dfs.append(df)
 
         if L_dfs:
-            with warnings.catch_warnings(record=True) as w:
-                warnings.simplefilter("always")
-                combined_df = pd.concat(L_dfs, axis=0, ignore_index=True)
-
-                for warning in w:
-                    if issubclass(warning.category, FutureWarning):
-                        perps_logger.warning(f"FutureWarning: {warning.message}")
-                    else:
-                        perps_logger.warning(f"Warning: {warning.message}")
-                        
-            combined_df = pd.concat(L_dfs, axis=0, ignore_index=True)
+            combined_df = concat_perps(L_dfs, dedupe)
             perps_logger.info("Successfully concatenated all fetched data")
-            return combined_df[['date', 'market', 'symbol', 'price', 'basis', 'funding', 'volume', 'open_interest', 'long_short_ratio']].drop_duplicates(subset=['date', 'market', 'symbol'])
+            return combined_df
         else:
-            perps_logger.warning(f"No data found for any perpetual in {currency}")
+            perps_logger.warning("No data found for any perpetual in %s", currency)
             return pd.DataFrame()
 
     except Exception as e:
-        perps_logger.error(f"An error occurred while fetching historical perps data: {e}")
+        perps_logger.error("An error occurred while fetching historical perps data: %s", e)
         return pd.DataFrame()
 
+def iter_historical_perps(market: str, 
+                          symbol: str, 
+                          start: str, 
+                          end: str, 
+                          granularity: str, 
+                          limit: int = 144) -> Iterator[pd.DataFrame]:
+    """
+    Yields the historical data of a perpetual page by page, as pages arrive.
+
+    Parameters
+    ----------
+    market : str
+        The market for which the data is required.
+    symbol : str 
+        The symbol of the asset for which the data is required.
+    start : str 
+        The start date for the data in 'YYYY-MM-DD' format.
+    end : str 
+        The end date for the data in 'YYYY-MM-DD' format.
+    granularity : str 
+        The time interval for the data. Options: 5m, 15m, 30m, 1h, 2h, 4h, 6h, 12h, 1d.
+    limit : int, optional 
+        The maximum number of data points per page to retrieve. Default is 144.
+
+    Yields
+    ------
+    pd.DataFrame
+        The data points of one page, like get_historical_perps.
+    """
+    if market == 'OKEX':
+        market = 'OKX'
+
+    for items in _iter_perps_items(market, symbol, start, end, granularity, limit):
+        if items:
+            yield get_df_items(items)
+
+def _time_windows(start: str, end: str, window: pd.Timedelta) -> list:
+    """Consecutive (lower, upper) bounds covering start to end, oldest first."""
+    lower, stop = pd.Timestamp(start), pd.Timestamp(end)
+    windows = []
+    while True:
+        upper = min(lower + window, stop)
+        windows.append((lower, upper))
+        if upper >= stop:
+            return windows
+        lower = upper
+
+def iter_historical_all_perps(currency: Literal['BTC', 'ETH'], 
+                              start: str, 
+                              end: str, 
+                              granularity: str, 
+                              limit: int = 144,
+                              newest_first: bool = False,
+                              window: str = None,
+                              instruments: pd.DataFrame = None) -> Iterator[pd.DataFrame]:
+    """
+    Yields the historical data of all perpetuals of a currency in chunks, as pages arrive.
+
+    Unlike get_historical_all_perps nothing waits for the whole history: every
+    fetched page is yielded at once, so consumers can render or compute on the
+    first chunks while the rest is still being fetched. With newest_first the
+    range is split into time windows fetched from the most recent one back to
+    start, all perpetuals of a window before the next one, so recent data comes
+    first and older history backfills.
+
+    Parameters
+    ----------
+    currency : Literal['BTC', 'ETH']
+        The currency for which to fetch historical perpetual data (BTC or ETH).
+    start : str
+        The start date for the data in 'YYYY-MM-DD' format.
+    end : str
+        The end date for the data in 'YYYY-MM-DD' format.
+    granularity : str
+        The time interval for the data. Options include: '5m', '15m', '30m', '1h', '2h', '4h', '6h', '12h', '1d'.
+    limit : int, optional
+        The maximum number of data points to retrieve per page (default is 144).
+    newest_first : bool, optional
+        Whether to fetch the most recent window first. Default is False.
+    window : str, optional
+        The length of the time windows, a pandas Timedelta string such as '7D'.
+        Default is None: one page per perpetual when newest_first, otherwise
+        the whole range at once.
+    instruments : pd.DataFrame, optional
+        The 'market' and 'instrument' columns of the perpetuals to fetch, as returned by
+        get_instruments_data. Default is None (listed from the API).
+
+    Yields
+    ------
+    pd.DataFrame
+        The PERPS_COLUMNS of one page of one perpetual, unique per (date, market, symbol).
+        Rows on the boundary of two windows are only yielded with the newer one.
+    """
+    instrument_df = get_instruments_data(currency, 'perpetual') if instruments is None else instruments
+    if instrument_df is None or instrument_df.empty:
+        perps_logger.warning("No perpetuals found for %s", currency)
+        return
+
+    if window is None and newest_first:
+        # The rows of one window fit in a single page
+        window = pd.Timedelta(granularity.replace('m', 'min')) * (limit - 1)
+    windows = _time_windows(start, end, pd.Timedelta(window) if window else pd.Timestamp(end) - pd.Timestamp(start))
+    if newest_first:
+        windows = windows[::-1]
+
+    perps_logger.info("Streaming historical data of %s perpetuals of %s from %s to %s in %s windows (newest first: %s)",
+                      len(instrument_df), currency, start, end, len(windows), newest_first)
+
+    stop = pd.Timestamp(end)
+    for lower, upper in windows:
+        for row in instrument_df.itertuples():
+            for df in iter_historical_perps(row.market, row.instrument, f"{lower:%Y-%m-%d %H:%M:%S}",
+                                            f"{upper:%Y-%m-%d %H:%M:%S}", granularity, limit):
+                df['market'] = row.market
+                df['symbol'] = row.instrument
+                if upper < stop:
+                    # The upper bound is the lower bound of the next window
+                    df = df[df['date'] < upper]
+                if df.empty:
+                    continue
+                yield df[PERPS_COLUMNS].drop_duplicates(subset=['date', 'market', 'symbol'])
+
+async def aiter_historical_all_perps(currency: Literal['BTC', 'ETH'], 
+                                     start: str, 
+                                     end: str, 
+                                     granularity: str, 
+                                     limit: int = 144,
+                                     newest_first: bool = False,
+                                     window: str = None,
+                                     instruments: pd.DataFrame = None) -> AsyncIterator[pd.DataFrame]:
+    """
+    Asynchronous iterator over the chunks of iter_historical_all_perps.
+
+    Pages are fetched in a worker thread, one at a time, so the event loop of a
+    dashboard or server keeps running while the history is fetched.
+
+    Examples
+    --------
+    >>> async for chunk in aiter_historical_all_perps('BTC', '2024-01-01', '2024-06-01', '1h', newest_first=True):
+    ...     render(chunk)
+    """
+    chunks = iter_historical_all_perps(currency, start, end, granularity, limit, newest_first, window, instruments)
+    done = object()
+    while True:
+        chunk = await asyncio.to_thread(next, chunks, done)
+        if chunk is done:
+            return
+        yield chunk
+
 
 # ----------------------------------------------------------------
 # Futures Data Fetchers
@@ -353,9 +566,12 @@ def get_historical_futures_page(market: str, symbol: str, start: str, end: str,
     
     url = base_url + f'/historical/derivs/futures/{market}/{symbol}'
     
-    response = requests.get(url=url, params=params, headers=headers)
-    
-    return response.json()
+    with stage('api_page_fetch') as metrics:
+        response = requests.get(url=url, params=params, headers=headers)
+        data = response.json()
+        metrics.add(rows=len(data.get('items', [])), bytes=len(response.content))
+
+    return data
 
 def get_historical_futures(market: str, 
                            symbol: str, 
@@ -451,9 +667,12 @@ def get_historical_options_page(market: str,
     
     url = f'{base_url}/historical/options/{market}/{instrument}'
     
-    response = requests.get(url=url, params=params, headers=headers)
-    
-    return response.json()
+    with stage('api_page_fetch') as metrics:
+        response = requests.get(url=url, params=params, headers=headers)
+        data = response.json()
+        metrics.add(rows=len(data.get('items', [])), bytes=len(response.content))
+
+    return data
 
 def get_historical_options(market: str, 
                            instrument: str, 
@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from typing import Literal, Optional
+
+
+def _as_float(x: np.ndarray) -> np.ndarray:
+    """Convert x values (numbers or datetimes) to floats."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The x values (numbers or datetimes), sorted in ascending order.
+    y : np.ndarray
+        The y values.
+    n_out : int
+        The number of points to keep (at least 3).
+
+    Returns
+    -------
+    np.ndarray
+        The sorted positions of the selected points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    # Missing values would poison the triangle areas, treat them as flat
+    y = np.where(np.isfinite(y), y, np.nanmean(y) if np.isfinite(y).any() else 0.0)
+
+    # Bucket edges for the n - 2 points between the fixed first and last ones
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        areas = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select the first and last points, and the minimum and maximum of each of
+    (n_out - 2) // 2 equal buckets in between.
+
+    Parameters
+    ----------
+    y : np.ndarray
+        The y values.
+    n_out : int
+        The number of points to keep (at least 2).
+
+    Returns
+    -------
+    np.ndarray
+        The sorted, unique positions of the selected points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    inner = np.asarray(y, dtype=float)[1:-1]
+    n_buckets = (n_out - 2) // 2
+    if n_buckets == 0:
+        return np.array([0, n - 1])
+    size = int(np.ceil(len(inner) / n_buckets))
+    # Rounding up the size may leave trailing buckets made of padding only
+    n_buckets = int(np.ceil(len(inner) / size))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[: len(inner)] = inner
+    buckets = padded.reshape(n_buckets, size)
+
+    offsets = 1 + np.arange(n_buckets) * size
+    lows = offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample_series(
+    series: pd.Series,
+    max_points: Optional[int] = 5000,
+    method: Literal["lttb", "minmax"] = "lttb",
+) -> pd.Series:
+    """
+    Reduce a series to at most max_points points for rendering.
+
+    Parameters
+    ----------
+    series : pd.Series
+        The series to downsample, indexed by time or position.
+    max_points : int, optional
+        The target point budget, None disables downsampling. Default is 5000.
+    method : str, optional
+        - lttb: Largest-Triangle-Three-Buckets, preserves the visual shape
+        - minmax: keeps each bucket's extremes, preserves spikes
+
+        Both keep the first and last points. Default is "lttb".
+
+    Returns
+    -------
+    pd.Series
+        The series itself if it fits the budget, otherwise the selected points.
+    """
+    if max_points is None or len(series) <= max_points:
+        return series
+
+    if method == "lttb":
+        x = series.index.to_numpy()
+        if not (
+            np.issubdtype(x.dtype, np.number) or np.issubdtype(x.dtype, np.datetime64)
+        ):
+            x = np.arange(len(series))
+        positions = lttb_indices(x, series.to_numpy(), max_points)
+    else:
+        positions = minmax_indices(series.to_numpy(), max_points)
+    return series.iloc[positions]
@@ -1,6 +1,9 @@
 from datetime import datetime
+from typing import Sequence
 import re
+import numpy as np
 import pandas as pd
+from .instrumentation import instrument
 
 
 def parse_expiry(currency):
@@ -23,15 +26,24 @@ def parse_expiry(currency):
 
 def add_expiry_column(df: pd.DataFrame) -> pd.DataFrame:
     """Add expiry column to df DataFrame."""
-    df["expiry"] = df["currency"].apply(parse_expiry)
+    # Parsed once per contract, not once per row
+    contracts = df["currency"].unique()
+    df["expiry"] = df["currency"].map(
+        dict(zip(contracts, map(parse_expiry, contracts)))
+    )
     return df
 
 
+def days_to_expiry(date: pd.Series, expiry: pd.Series) -> pd.Series:
+    """Whole days from date to expiry, the tenor of the annualized basis."""
+    return (pd.to_datetime(expiry) - pd.to_datetime(date)).dt.days
+
+
 def calculate_days_to_expiry(df: pd.DataFrame) -> pd.DataFrame:
     """Calculate days to expiry and add it to the DataFrame."""
     df["date"] = pd.to_datetime(df["date"])
     df["expiry"] = pd.to_datetime(df["expiry"])
-    df["days_to_expiry"] = (df["expiry"] - df["date"]).dt.days
+    df["days_to_expiry"] = days_to_expiry(df["date"], df["expiry"])
     return df
 
 
@@ -41,20 +53,126 @@ def calculate_annualized_basis(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def filter_and_aggregate(df: pd.DataFrame) -> pd.DataFrame:
-    """Filter and group the df DataFrame."""
+def filter_and_aggregate(df: pd.DataFrame, by: Sequence[str] = ()) -> pd.DataFrame:
+    """Filter and group the df DataFrame by date, then by the columns of by."""
     df = df[~(df["days_to_expiry"] == 0)]
-    df1 = df.groupby("date").mean(numeric_only=True)[["price", "annualized_basis"]]
-    df2 = df.groupby("date").sum(numeric_only=True)[["open_interest", "volume"]]
+    keys = ["date", *by]
+    df1 = df.groupby(keys).mean(numeric_only=True)[["price", "annualized_basis"]]
+    df2 = df.groupby(keys).sum(numeric_only=True)[["open_interest", "volume"]]
     df = pd.concat([df1, df2], axis=1)
     return df
 
 
-def process_futures(futures: pd.DataFrame) -> pd.DataFrame:
-    """Process the futures DataFrame."""
+@instrument()
+def process_futures(futures: pd.DataFrame, by: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Process the futures DataFrame.
+
+    Contracts are aggregated per date, or per (date, *by) to process several
+    underlyings stacked in one frame, e.g. by=("underlying",).
+    """
+    df = pd.DataFrame(futures).copy()
+    df = add_expiry_column(df)
+    df = calculate_days_to_expiry(df)
+    df = calculate_annualized_basis(df)
+    df = filter_and_aggregate(df, by)
+    return df[["price", "annualized_basis", "open_interest", "volume"]]
+
+
+def constant_maturity_basis(
+    df: pd.DataFrame, tenors: Sequence[int] = (7, 30, 90, 180)
+) -> pd.DataFrame:
+    """
+    Interpolate the annualized basis at constant maturities for every date.
+
+    The per-expiry rows are sorted once by (date, days_to_expiry) and every
+    tenor is located with a single binary search over the sorted keys, so
+    the cost is O(N log N) regardless of how many dates or expiries there are.
+    Tenors outside the range of listed expiries on a given date are NaN.
+    Maturities are whole days to expiry, like the annualization of the basis
+    in calculate_annualized_basis, so intraday rows get consistent tenors.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Per-expiry futures rows with 'date', 'expiry' and 'annualized_basis'.
+    tenors : Sequence[int], optional
+        Target maturities in days. Default is (7, 30, 90, 180).
+
+    Returns
+    -------
+    pd.DataFrame
+        A DataFrame indexed by date with one 'annualized_basis_{tenor}d' column per tenor.
+    """
+    dates = pd.to_datetime(df["date"]).to_numpy()
+    dte = days_to_expiry(df["date"], df["expiry"]).to_numpy(dtype=float)
+    basis = df["annualized_basis"].to_numpy(dtype=float)
+
+    valid = (dte > 0) & np.isfinite(basis)
+    dates, dte, basis = dates[valid], dte[valid], basis[valid]
+
+    order = np.lexsort((dte, dates))
+    dates, dte, basis = dates[order], dte[order], basis[order]
+
+    # Consecutive group code per date on the sorted arrays
+    new_group = np.empty(len(dates), dtype=bool)
+    new_group[:1] = True
+    new_group[1:] = dates[1:] != dates[:-1]
+    codes = np.cumsum(new_group) - 1
+    unique_dates = dates[new_group]
+    n_groups = len(unique_dates)
+
+    # Composite key (date code, days_to_expiry) that is sorted as a single array
+    span = (dte.max() if len(dte) else 0.0) + max(tenors) + 1.0
+    keys = codes * span + dte
+
+    columns = {}
+    group_offsets = np.arange(n_groups) * span
+    for tenor in tenors:
+        targets = group_offsets + tenor
+        hi = np.searchsorted(keys, targets, side="left")
+        lo = hi - 1
+        hi_c = np.clip(hi, 0, len(keys) - 1)
+        lo_c = np.clip(lo, 0, len(keys) - 1)
+        groups = np.arange(n_groups)
+
+        exact = (hi < len(keys)) & (keys[hi_c] == targets)
+        bracketed = (
+            (hi < len(keys))
+            & (lo >= 0)
+            & (codes[hi_c] == groups)
+            & (codes[lo_c] == groups)
+        )
+
+        width = dte[hi_c] - dte[lo_c]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = (tenor - dte[lo_c]) / width
+            interpolated = basis[lo_c] + weight * (basis[hi_c] - basis[lo_c])
+
+        columns[f"annualized_basis_{tenor}d"] = np.where(
+            exact, basis[hi_c], np.where(bracketed, interpolated, np.nan)
+        )
+
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(unique_dates, name="date"))
+
+
+def expiry_basis(futures: pd.DataFrame) -> pd.DataFrame:
+    """
+    The annualized basis of every (date, expiry) of the futures DataFrame.
+
+    Duplicated quotes of a date and expiry are averaged; the rows are the
+    input of constant_maturity_basis.
+    """
     df = pd.DataFrame(futures).copy()
     df = add_expiry_column(df)
     df = calculate_days_to_expiry(df)
     df = calculate_annualized_basis(df)
-    df = filter_and_aggregate(df)
-    return df[["price", "annualized_basis", "open_interest", "volume"]]
\ No newline at end of file
+    return df.groupby(["date", "expiry"], as_index=False)["annualized_basis"].mean()
+
+
+@instrument()
+def process_futures_term_structure(
+    futures: pd.DataFrame, tenors: Sequence[int] = (7, 30, 90, 180)
+) -> pd.DataFrame:
+    """Process the futures DataFrame into a constant-maturity basis term structure."""
+    return constant_maturity_basis(expiry_basis(futures), tenors)
@@ -0,0 +1,283 @@
+import json
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+# Upper bounds of the wall time histogram buckets, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_enabled = False
+_lock = threading.Lock()
+_stages: Dict[str, dict] = {}
+
+
+def enable() -> None:
+    """Start recording pipeline metrics."""
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording pipeline metrics, already recorded ones are kept."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    """Forget every recorded metric."""
+    with _lock:
+        _stages.clear()
+
+
+def record(
+    name: str,
+    seconds: float,
+    rows: int = 0,
+    bytes: int = 0,
+    retries: int = 0,
+    error: bool = False,
+) -> None:
+    """
+    Adds one observation of a stage to the in-process aggregates.
+
+    Parameters
+    ----------
+    name : str
+        The stage name, e.g. 'api_page_fetch'.
+    seconds : float
+        The wall time of the observation.
+    rows : int, optional
+        The number of rows produced. Default is 0.
+    bytes : int, optional
+        The number of bytes transferred. Default is 0.
+    retries : int, optional
+        The number of retries needed. Default is 0.
+    error : bool, optional
+        Whether the stage raised an exception. Default is False.
+    """
+    with _lock:
+        stage = _stages.get(name)
+        if stage is None:
+            stage = _stages[name] = {
+                "count": 0,
+                "seconds": 0.0,
+                "max_seconds": 0.0,
+                "buckets": [0] * (len(BUCKETS) + 1),
+                "rows": 0,
+                "bytes": 0,
+                "retries": 0,
+                "errors": 0,
+            }
+        stage["count"] += 1
+        stage["seconds"] += seconds
+        stage["max_seconds"] = max(stage["max_seconds"], seconds)
+        stage["buckets"][bisect_left(BUCKETS, seconds)] += 1
+        stage["rows"] += rows
+        stage["bytes"] += bytes
+        stage["retries"] += retries
+        stage["errors"] += int(error)
+
+
+class _Stage:
+    """
+    Times a block and records it with the counters added inside the block.
+
+    The stage counts as an error if the block raises or sets error to True,
+    e.g. when a failure is handled inside the block.
+    """
+
+    __slots__ = ("name", "rows", "bytes", "retries", "error", "_start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.rows = 0
+        self.bytes = 0
+        self.retries = 0
+        self.error = False
+
+    def add(self, rows: int = 0, bytes: int = 0, retries: int = 0) -> None:
+        self.rows += rows
+        self.bytes += bytes
+        self.retries += retries
+
+    def __enter__(self) -> "_Stage":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        record(
+            self.name,
+            time.perf_counter() - self._start,
+            self.rows,
+            self.bytes,
+            self.retries,
+            self.error or exc_type is not None,
+        )
+
+
+class _NullStage:
+    """Shared no-op stand-in used while metrics are disabled."""
+
+    __slots__ = ()
+
+    def add(self, rows: int = 0, bytes: int = 0, retries: int = 0) -> None:
+        pass
+
+    @property
+    def error(self) -> bool:
+        return False
+
+    @error.setter
+    def error(self, value: bool) -> None:
+        pass
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str):
+    """
+    Context manager timing a pipeline stage.
+
+    Counters are attached with the `add` method of the returned object and a
+    failure handled inside the block is flagged by setting its `error`
+    attribute. While metrics are disabled a shared no-op object is returned.
+
+    Examples
+    --------
+    >>> with stage("api_page_fetch") as s:
+    ...     response = requests.get(url)
+    ...     s.add(bytes=len(response.content))
+    """
+    return _Stage(name) if _enabled else _NULL_STAGE
+
+
+def instrument(name: Optional[str] = None, count_rows: bool = True) -> Callable:
+    """
+    Decorator timing every call of a function as a pipeline stage.
+
+    Parameters
+    ----------
+    name : str, optional
+        The stage name. Default is the function name.
+    count_rows : bool, optional
+        Whether to record len() of the returned value as rows. Default is True.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        stage_name = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(stage_name) as s:
+                result = func(*args, **kwargs)
+                if count_rows:
+                    try:
+                        s.add(rows=len(result))
+                    except TypeError:
+                        pass
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> Dict[str, dict]:
+    """A copy of the aggregated metrics of every stage."""
+    with _lock:
+        return {
+            name: {**values, "buckets": list(values["buckets"])}
+            for name, values in _stages.items()
+        }
+
+
+def _write(text: str, path: Optional[str]) -> str:
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
+
+
+def to_json(path: Optional[str] = None) -> str:
+    """
+    Dumps the aggregated metrics as JSON.
+
+    Parameters
+    ----------
+    path : str, optional
+        A file to write the JSON to. Default is None.
+
+    Returns
+    -------
+    str
+        The JSON document, with the histogram bucket bounds.
+    """
+    payload = {"buckets": list(BUCKETS) + ["+Inf"], "stages": snapshot()}
+    return _write(json.dumps(payload, indent=2), path)
+
+
+def to_prometheus(path: Optional[str] = None, prefix: str = "fear_greed") -> str:
+    """
+    Dumps the aggregated metrics in the Prometheus text exposition format.
+
+    Parameters
+    ----------
+    path : str, optional
+        A file to write the metrics to, e.g. for the node exporter textfile
+        collector. Default is None.
+    prefix : str, optional
+        The metric name prefix. Default is "fear_greed".
+
+    Returns
+    -------
+    str
+        The metrics text.
+    """
+    stages = snapshot()
+    lines = [
+        f"# HELP {prefix}_stage_seconds Wall time of pipeline stages.",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    for name, values in stages.items():
+        cumulative = 0
+        for bound, count in zip(list(BUCKETS) + ["+Inf"], values["buckets"]):
+            cumulative += count
+            lines.append(
+                f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}'
+            )
+        lines.append(
+            f'{prefix}_stage_seconds_sum{{stage="{name}"}} {values["seconds"]}'
+        )
+        lines.append(
+            f'{prefix}_stage_seconds_count{{stage="{name}"}} {values["count"]}'
+        )
+
+    for counter, help_text in [
+        ("rows", "Rows produced by pipeline stages."),
+        ("bytes", "Bytes transferred by pipeline stages."),
+        ("retries", "Retries performed by pipeline stages."),
+        ("errors", "Exceptions raised by pipeline stages."),
+    ]:
+        lines.append(f"# HELP {prefix}_stage_{counter}_total {help_text}")
+        lines.append(f"# TYPE {prefix}_stage_{counter}_total counter")
+        for name, values in stages.items():
+            lines.append(
+                f'{prefix}_stage_{counter}_total{{stage="{name}"}} {values[counter]}'
+            )
+
+    return _write("\n".join(lines) + "\n", path)
@@ -0,0 +1,418 @@
+"""
+Rolling kernels used by index components and backtests.
+
+Every operation has a vectorized NumPy reference implementation and a
+compiled single-pass numba version. Both share one API and are selected with
+`engine`: "auto" uses numba when available. numba is in the requirements;
+without it the NumPy references are used, which are slower and, for the
+percentile rank, O(W) per row instead of O(log U), U being the number of
+distinct values of the series.
+
+NaN values are ignored inside windows, and windows with fewer than
+min_periods valid values give NaN, like pandas rolling operations.
+"""
+
+from typing import Literal, Optional, Union
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+try:
+    import numba
+
+    HAS_NUMBA = True
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+
+Engine = Literal["auto", "numpy", "numba"]
+ArrayLike = Union[np.ndarray, pd.Series]
+
+# Rows of windows materialized at once by the NumPy references
+_BLOCK_ROWS = 4096
+# Rows sharing one centring shift in the cumulative sums of _moments_numpy
+_SUM_BLOCK_ROWS = 16384
+
+
+def _use_numba(engine: Engine) -> bool:
+    if engine == "numba" and not HAS_NUMBA:
+        raise ImportError("engine='numba' requires numba, `pip install numba`.")
+    if engine not in ("auto", "numpy", "numba"):
+        raise ValueError(f"Unknown engine '{engine}', use auto, numpy or numba.")
+    return HAS_NUMBA and engine != "numpy"
+
+
+def _wrap(values: ArrayLike, result: np.ndarray) -> ArrayLike:
+    if isinstance(values, pd.Series):
+        return pd.Series(result, index=values.index, name=values.name)
+    return result
+
+
+def _min_periods(window: int, min_periods: Optional[int]) -> int:
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    return window if min_periods is None else max(min_periods, 1)
+
+
+def _blocks(x: np.ndarray, window: int):
+    """Yields (lo, hi, windows) with windows[i] the window ending at row lo + i."""
+    padded = np.concatenate([np.full(window - 1, np.nan), x])
+    views = sliding_window_view(padded, window)
+    for lo in range(0, len(x), _BLOCK_ROWS):
+        hi = min(lo + _BLOCK_ROWS, len(x))
+        yield lo, hi, views[lo:hi]
+
+
+# ----------------------------------------------------------------
+# NumPy references
+# ----------------------------------------------------------------
+
+
+def _moments_numpy(x: np.ndarray, window: int, min_periods: int):
+    mean = np.full(len(x), np.nan)
+    std = np.full(len(x), np.nan)
+    padded = np.concatenate([np.full(window - 1, np.nan), x])
+    # Windowed sums from cumulative sums, re-centred on every block of rows
+    # so that the differences of large cumulative sums stay accurate
+    block = max(_SUM_BLOCK_ROWS, window)
+    for lo in range(0, len(x), block):
+        hi = min(lo + block, len(x))
+        segment = padded[lo : hi + window - 1]
+        valid = ~np.isnan(segment)
+        if not valid.any():
+            continue
+        shift = segment[valid].mean()
+        centred = np.where(valid, segment - shift, 0.0)
+        c1 = np.concatenate([[0.0], np.cumsum(centred)])
+        c2 = np.concatenate([[0.0], np.cumsum(centred * centred)])
+        cn = np.concatenate([[0], np.cumsum(valid)])
+        s1 = c1[window:] - c1[:-window]
+        s2 = c2[window:] - c2[:-window]
+        count = cn[window:] - cn[:-window]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m = s1 / count
+            var = np.maximum((s2 - s1 * m) / (count - 1), 0.0)
+        mean[lo:hi] = np.where(count >= min_periods, m + shift, np.nan)
+        std[lo:hi] = np.where(count >= max(min_periods, 2), np.sqrt(var), np.nan)
+    return mean, std
+
+
+def _zscore_numpy(x: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    mean, std = _moments_numpy(x, window, min_periods)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (x - mean) / std
+
+
+def _winsorize_numpy(
+    x: np.ndarray, window: int, threshold: float, min_periods: int
+) -> np.ndarray:
+    mean, std = _moments_numpy(x, window, min_periods)
+    clipped = np.clip(x, mean - threshold * std, mean + threshold * std)
+    return np.where(np.isnan(std), x, clipped)
+
+
+def _ewma_numpy(x: np.ndarray, alpha: float) -> np.ndarray:
+    valid = ~np.isnan(x)
+    out = np.full(len(x), np.nan)
+    values = x[valid]
+    if len(values):
+        smoothed, _ = lfilter(
+            [alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]]
+        )
+        out[valid] = smoothed
+        # NaN rows keep the last average
+        out = pd.Series(out).ffill().to_numpy()
+    return out
+
+
+def _percentile_rank_numpy(x: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    for lo, hi, windows in _blocks(x, window):
+        last = windows[:, -1:]
+        count = (~np.isnan(windows)).sum(axis=1)
+        less = (windows < last).sum(axis=1)
+        equal = (windows == last).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rank = (less + (equal + 1) / 2) / count
+        ok = (count >= min_periods) & ~np.isnan(last[:, 0])
+        out[lo:hi] = np.where(ok, rank, np.nan)
+    return out
+
+
+# ----------------------------------------------------------------
+# Numba kernels
+# ----------------------------------------------------------------
+
+
+def _moments_loop(x, window, min_periods):
+    n = len(x)
+    mean = np.full(n, np.nan)
+    std = np.full(n, np.nan)
+    # Sums of x - shift keep the variance accurate for large price levels
+    shift = 0.0
+    for i in range(n):
+        if not np.isnan(x[i]):
+            shift = x[i]
+            break
+    s1 = 0.0
+    s2 = 0.0
+    count = 0
+    for i in range(n):
+        v = x[i]
+        if not np.isnan(v):
+            s1 += v - shift
+            s2 += (v - shift) * (v - shift)
+            count += 1
+        if i >= window:
+            old = x[i - window]
+            if not np.isnan(old):
+                s1 -= old - shift
+                s2 -= (old - shift) * (old - shift)
+                count -= 1
+        if count >= min_periods and count > 0:
+            mean[i] = shift + s1 / count
+            if count >= 2:
+                var = (s2 - s1 * s1 / count) / (count - 1)
+                std[i] = np.sqrt(var) if var > 0.0 else 0.0
+    return mean, std
+
+
+def _zscore_loop(x, window, min_periods):
+    mean, std = _moments_loop(x, window, min_periods)
+    return (x - mean) / std
+
+
+def _winsorize_loop(x, window, threshold, min_periods):
+    mean, std = _moments_loop(x, window, min_periods)
+    out = x.copy()
+    for i in range(len(x)):
+        if not np.isnan(std[i]):
+            lower = mean[i] - threshold * std[i]
+            upper = mean[i] + threshold * std[i]
+            out[i] = min(max(x[i], lower), upper)
+    return out
+
+
+def _ewma_loop(x, alpha):
+    out = np.full(len(x), np.nan)
+    average = np.nan
+    for i in range(len(x)):
+        if not np.isnan(x[i]):
+            if np.isnan(average):
+                average = x[i]
+            else:
+                average = (1.0 - alpha) * average + alpha * x[i]
+        out[i] = average
+    return out
+
+
+def _fenwick_add(tree, i, delta):
+    i += 1
+    while i < len(tree):
+        tree[i] += delta
+        i += i & -i
+
+
+def _fenwick_prefix(tree, i):
+    """Sum of the counts of codes < i."""
+    total = 0
+    while i > 0:
+        total += tree[i]
+        i -= i & -i
+    return total
+
+
+def _percentile_rank_fenwick(codes, n_codes, window, min_periods):
+    # A Fenwick tree over the dense ranks of the values counts the window
+    # values below any code in O(log n_codes) per update and query
+    out = np.full(len(codes), np.nan)
+    tree = np.zeros(n_codes + 1, dtype=np.int64)
+    count = 0
+    for i in range(len(codes)):
+        code = codes[i]
+        if code >= 0:
+            _fenwick_add(tree, code, 1)
+            count += 1
+        if i >= window:
+            old = codes[i - window]
+            if old >= 0:
+                _fenwick_add(tree, old, -1)
+                count -= 1
+        if code >= 0 and count >= min_periods:
+            less = _fenwick_prefix(tree, code)
+            equal = _fenwick_prefix(tree, code + 1) - less
+            out[i] = (less + (equal + 1) / 2) / count
+    return out
+
+
+def _dense_codes(x: np.ndarray):
+    """Dense ranks of the values (-1 for NaN) and the number of distinct values."""
+    codes = np.full(len(x), -1, dtype=np.int64)
+    valid = ~np.isnan(x)
+    unique, inverse = np.unique(x[valid], return_inverse=True)
+    codes[valid] = inverse
+    return codes, len(unique)
+
+
+if HAS_NUMBA:
+    _jit = numba.njit(cache=True, nogil=True, error_model="numpy")
+    _moments_loop = _jit(_moments_loop)
+    _zscore_loop = _jit(_zscore_loop)
+    _winsorize_loop = _jit(_winsorize_loop)
+    _ewma_loop = _jit(_ewma_loop)
+    _fenwick_add = _jit(_fenwick_add)
+    _fenwick_prefix = _jit(_fenwick_prefix)
+    _percentile_rank_fenwick = _jit(_percentile_rank_fenwick)
+
+
+# ----------------------------------------------------------------
+# Public API
+# ----------------------------------------------------------------
+
+
+def rolling_zscore(
+    values: ArrayLike,
+    window: int,
+    min_periods: Optional[int] = None,
+    engine: Engine = "auto",
+) -> ArrayLike:
+    """
+    Rolling z-score of every value against the window ending on it.
+
+    Parameters
+    ----------
+    values : np.ndarray or pd.Series
+        The series.
+    window : int
+        The number of rows of the window.
+    min_periods : int, optional
+        The minimum number of valid values in a window. Default is window.
+    engine : str, optional
+        "auto", "numpy" or "numba". Default is "auto".
+
+    Returns
+    -------
+    np.ndarray or pd.Series
+        (x - rolling mean) / rolling std (ddof=1), same type as values.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    periods = _min_periods(window, min_periods)
+    if _use_numba(engine):
+        return _wrap(values, _zscore_loop(x, window, periods))
+    return _wrap(values, _zscore_numpy(x, window, periods))
+
+
+def rolling_winsorize(
+    values: ArrayLike,
+    window: int,
+    threshold: float = 3.0,
+    min_periods: Optional[int] = None,
+    engine: Engine = "auto",
+) -> ArrayLike:
+    """
+    Clamps every value within threshold rolling standard deviations of the rolling mean.
+
+    Parameters
+    ----------
+    values : np.ndarray or pd.Series
+        The series.
+    window : int
+        The number of rows of the window.
+    threshold : float, optional
+        The z-score beyond which values are clamped. Default is 3.0.
+    min_periods : int, optional
+        The minimum number of valid values in a window. Default is window.
+    engine : str, optional
+        "auto", "numpy" or "numba". Default is "auto".
+
+    Returns
+    -------
+    np.ndarray or pd.Series
+        The winsorized values; rows without enough history are unchanged.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    periods = _min_periods(window, min_periods)
+    if _use_numba(engine):
+        return _wrap(values, _winsorize_loop(x, window, threshold, periods))
+    return _wrap(values, _winsorize_numpy(x, window, threshold, periods))
+
+
+def ewma(
+    values: ArrayLike,
+    alpha: Optional[float] = None,
+    span: Optional[float] = None,
+    engine: Engine = "auto",
+) -> ArrayLike:
+    """
+    Exponentially weighted moving average, y_t = (1 - alpha) y_{t-1} + alpha x_t.
+
+    NaN values are skipped and their rows keep the last average, like pandas
+    ewm(alpha, adjust=False, ignore_na=True).mean().
+
+    Parameters
+    ----------
+    values : np.ndarray or pd.Series
+        The series.
+    alpha : float, optional
+        The smoothing factor in (0, 1].
+    span : float, optional
+        Alternatively, the span: alpha = 2 / (span + 1).
+    engine : str, optional
+        "auto", "numpy" or "numba". Default is "auto".
+
+    Returns
+    -------
+    np.ndarray or pd.Series
+        The averages, same type as values.
+    """
+    if (alpha is None) == (span is None):
+        raise ValueError("Pass exactly one of alpha and span")
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    if not 0.0 < alpha <= 1.0:
+        raise ValueError("alpha must be in (0, 1]")
+
+    x = np.asarray(values, dtype=np.float64)
+    if _use_numba(engine):
+        return _wrap(values, _ewma_loop(x, alpha))
+    return _wrap(values, _ewma_numpy(x, alpha))
+
+
+def rolling_percentile_rank(
+    values: ArrayLike,
+    window: int,
+    min_periods: Optional[int] = None,
+    engine: Engine = "auto",
+) -> ArrayLike:
+    """
+    Percentile rank of every value within the window ending on it.
+
+    The numba kernel keeps the window in a Fenwick tree over the dense ranks
+    of the whole series: after an O(N log N) np.unique, each row costs
+    O(log U), U being the number of distinct values (up to N), whatever the
+    window length. The NumPy reference compares every value with its whole
+    window, O(N W).
+
+    Parameters
+    ----------
+    values : np.ndarray or pd.Series
+        The series.
+    window : int
+        The number of rows of the window.
+    min_periods : int, optional
+        The minimum number of valid values in a window. Default is window.
+    engine : str, optional
+        "auto", "numpy" or "numba". Default is "auto".
+
+    Returns
+    -------
+    np.ndarray or pd.Series
+        Ranks in (0, 1] with ties averaged, like pandas rolling(window).rank(pct=True).
+    """
+    x = np.asarray(values, dtype=np.float64)
+    periods = _min_periods(window, min_periods)
+    if _use_numba(engine):
+        codes, n_codes = _dense_codes(x)
+        return _wrap(values, _percentile_rank_fenwick(codes, n_codes, window, periods))
+    return _wrap(values, _percentile_rank_numpy(x, window, periods))
@@ -0,0 +1,98 @@
+import atexit
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+import yaml
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+
+def load_logging_config(config_path: str = "config/config.yml") -> dict:
+    """
+    Reads the 'logging' section of the project configuration.
+
+    Parameters
+    ----------
+    config_path : str, optional
+        The path of the YAML configuration. Default is 'config/config.yml'.
+
+    Returns
+    -------
+    dict
+        The logging section, empty if the file or the section is missing.
+    """
+    if not os.path.exists(config_path):
+        return {}
+    with open(config_path, "r") as file:
+        config = yaml.safe_load(file) or {}
+    return config.get("logging", {}) or {}
+
+
+def configure_logging(config_path: str = "config/config.yml") -> QueueListener:
+    """
+    Routes logging through a queue to a background file writer.
+
+    Records are put on an unbounded queue by a QueueHandler on the root logger,
+    so emitting never blocks on disk I/O; a QueueListener thread writes them to
+    a rotating file. Levels and the file path come from the 'logging' section
+    of the configuration (level, log_file, max_bytes, backup_count and
+    per-logger levels under loggers). Calling it again returns the running
+    listener.
+
+    Importing the package configures nothing: entry points (scripts, servers,
+    notebooks) opt in by calling it once.
+
+    Parameters
+    ----------
+    config_path : str, optional
+        The path of the YAML configuration. Default is 'config/config.yml'.
+
+    Returns
+    -------
+    QueueListener
+        The running listener, stopped automatically at interpreter exit.
+    """
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    config = load_logging_config(config_path)
+    log_file = config.get("log_file", "./logs/app.log")
+    os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=config.get("max_bytes", 5 * 1024 * 1024),
+        backupCount=config.get("backup_count", 3),
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(config.get("level", "INFO"))
+    _handler = QueueHandler(log_queue)
+    root.addHandler(_handler)
+    for name, level in (config.get("loggers") or {}).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flushes the queued records and stops the background writer."""
+    global _listener, _handler
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,13 +1,44 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import scipy.stats as stats
+import numpy as np
 import pandas as pd
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
 from statsmodels.tsa.seasonal import seasonal_decompose
-
-
-def plot_series_analysis(series: pd.Series) -> None:
+from typing import Literal, Optional
+from .downsampling import downsample_series
+from .rolling_corr import rolling_corr
+
+# Plotly traces with more points than this are rendered with WebGL, below the
+# default point budget so that downsampled traces of long series use it too
+WEBGL_THRESHOLD = 1000
+
+
+def _sample(data, max_points: Optional[int], random_state: int = 0):
+    """Randomly sample at most max_points rows of a pd.Series or pd.DataFrame."""
+    if max_points is None or len(data) <= max_points:
+        return data
+    return data.sample(n=max_points, random_state=random_state).sort_index()
+
+
+def _scatter(
+    series: pd.Series,
+    name: str,
+    max_points: Optional[int],
+    method: Literal["lttb", "minmax"],
+):
+    """Build a line trace of a downsampled series, using WebGL for large traces."""
+    series = downsample_series(series, max_points, method)
+    trace = go.Scattergl if len(series) > WEBGL_THRESHOLD else go.Scatter
+    return trace(x=series.index, y=series, mode="lines", name=name)
+
+
+def plot_series_analysis(
+    series: pd.Series,
+    max_points: Optional[int] = 5000,
+    method: Literal["lttb", "minmax"] = "lttb",
+) -> None:
     """
     Generates a 2x2 plot matrix for a pd.Series object with the following visualizations:
     1. Time series plot
@@ -19,38 +50,50 @@ def plot_series_analysis(series: pd.Series) -> None:
     ----------
     series : pd.Series
         The input time series data to be analyzed.
+    max_points : int, optional
+        The point budget per panel, None plots every point. The time series is
+        visually downsampled, the distribution panels use a random sample and
+        the QQ plot uses evenly spaced quantiles. Default is 5000.
+    method : str, optional
+        The time series downsampling method, "lttb" or "minmax". Default is "lttb".
 
     Returns
     -------
     None
     """
+    plotted = downsample_series(series, max_points, method)
+    sampled = _sample(series, max_points)
+    if max_points is not None and len(series) > max_points:
+        quantiles = series.quantile(np.linspace(0, 1, max_points))
+    else:
+        quantiles = series
 
     # Set up the 2x2 subplot matrix
     fig, axes = plt.subplots(2, 2, figsize=(12, 10))
     fig.suptitle(f"Analysis of Series: {series.name}", fontsize=16)
 
     # 1. Time series plot (Top Left)
-    axes[0, 0].plot(series.index, series.values, label="Time Series", color="b")
+    axes[0, 0].plot(plotted.index, plotted.values, label="Time Series", color="b")
     axes[0, 0].set_title("Time Series Plot")
     axes[0, 0].set_xlabel("Time")
     axes[0, 0].set_ylabel("Values")
     axes[0, 0].grid(True)
 
     # 2. Distribution plot (Top Right: Histogram + KDE)
-    sns.histplot(series, kde=True, ax=axes[0, 1], color="g", stat="density")
+    sns.histplot(sampled, kde=True, ax=axes[0, 1], color="g", stat="density")
     axes[0, 1].set_title("Distribution (Histogram & KDE)")
     axes[0, 1].set_xlabel("Values")
     axes[0, 1].set_ylabel("Density")
     axes[0, 1].grid(True)
 
     # 3. Boxplot (Bottom Left)
-    sns.boxplot(x=series, ax=axes[1, 0], color="orange")
+    sns.boxplot(x=sampled, ax=axes[1, 0], color="orange")
     axes[1, 0].set_title("Boxplot")
     axes[1, 0].set_xlabel("Values")
     axes[1, 0].grid(True)
 
     # 4. QQ plot (Bottom Right)
-    stats.probplot(series, dist="norm", plot=axes[1, 1])
+    stats.probplot(quantiles, dist="norm", plot=axes[1, 1])
     axes[1, 1].set_title("QQ Plot")
     axes[1, 1].get_lines()[1].set_color("red")  # Set the color of the QQ line
     axes[1, 1].grid(True)
@@ -60,28 +103,68 @@ def plot_series_analysis(series: pd.Series) -> None:
     plt.show()
 
 
-def corr_heatmap(data, title):
+def corr_heatmap(
+    data,
+    title,
+    window: Optional[int] = None,
+    timestamp=None,
+    rolling: Optional[np.ndarray] = None,
+):
     """
     Generates a correlation heatmap for a given pd.DataFrame object.
 
+    By default the full-sample Kendall correlation is shown. When a window or a
+    precomputed rolling array is given, the rolling Pearson correlation of the
+    window ending at the chosen timestamp is shown instead.
+
     Parameters
     ----------
     data : pd.DataFrame
         The input data for which the correlation heatmap is generated.
     title : str
         The title of the plot.
+    window : int, optional
+        The rolling window length in rows. Default is None (full sample).
+    timestamp : optional
+        The index label of the window end, the last row at or before it is
+        used. Default is None (last row).
+    rolling : np.ndarray, optional
+        A (T, K, K) array from rolling_corr over the numerical columns of data,
+        to reuse across several timestamps. Default is None.
 
     Returns
     -------
     None
+
+    Raises
+    ------
+    ValueError :
+        If the timestamp is before the first row of data.
     """
-    corr = data.corr(method="kendall", numeric_only=True)
+    if window is None and rolling is None:
+        corr = data.corr(method="kendall", numeric_only=True)
+    else:
+        numerical = data.select_dtypes(include=[np.number])
+        if rolling is None:
+            rolling = rolling_corr(numerical, window)
+        position = len(data) - 1
+        if timestamp is not None:
+            position = data.index.searchsorted(timestamp, side="right") - 1
+            if position < 0:
+                raise ValueError(
+                    f"Timestamp {timestamp} is before the first row {data.index[0]}"
+                )
+        corr = pd.DataFrame(
+            rolling[position], index=numerical.columns, columns=numerical.columns
+        )
+        title = f"{title} ({data.index[position]})"
+
     sns.heatmap(corr, annot=True, square=True, cmap="coolwarm")
     plt.title(title)
     plt.show()
 
 
-def pairplot(data, title):
+def pairplot(data, title, max_points: Optional[int] = 5000, random_state: int = 0):
     """
     Generates a pairplot for a given pd.DataFrame object with enhanced visuals.
 
@@ -91,6 +174,11 @@ def pairplot(data, title):
         The input data for which the pairplot is generated.
     title : str
         The title of the plot.
+    max_points : int, optional
+        The number of rows randomly sampled for plotting, None plots every row.
+        Default is 5000.
+    random_state : int, optional
+        The seed of the row sample. Default is 0.
 
     Returns
     -------
@@ -98,7 +186,7 @@ def pairplot(data, title):
     """
     # Create a pairplot with a custom color palette and enhanced aesthetics
     g = sns.pairplot(
-        data,
+        _sample(data, max_points, random_state),
         diag_kind="kde",
         diag_kws={"alpha": 0.6},
         plot_kws={"alpha": 0.7, "s": 40, "edgecolor": "k"},
@@ -112,15 +200,26 @@ def pairplot(data, title):
     plt.show()
 
 
-def signal_decomp(data: pd.Series, period: int = 10, return_results: bool = False):
+def signal_decomp(
+    data: pd.Series,
+    period: int = 10,
+    return_results: bool = False,
+    max_points: Optional[int] = 5000,
+    method: Literal["lttb", "minmax"] = "minmax",
+):
     """
     Performs a seasonal decomposition on a given pd.Series object.
 
+    The decomposition uses every point; only the plotted traces are downsampled
+    to max_points, and traces above WEBGL_THRESHOLD points are drawn with WebGL.
+
     Parameters
     ----------
     data : pd.Series
     period : int, optional
     return_results : bool, optional
+    max_points : int, optional
+    method : str, optional
 
     Returns
     -------
@@ -143,41 +242,13 @@ def signal_decomp(data: pd.Series, period: int = 10, return_results: bool = Fals
         )
     )"""
 
-    fig.add_trace(
-        go.Scatter(
-            x=data.index,
-            y=data,
-            mode="lines",
-            name="Original Data",
-        )
-    )
+    fig.add_trace(_scatter(data, "Original Data", max_points, method))
 
-    fig.add_trace(
-        go.Scatter(
-            x=data.index,
-            y=result.trend,
-            mode="lines",
-            name="Trend",
-        )
-    )
+    fig.add_trace(_scatter(result.trend, "Trend", max_points, method))
 
-    fig.add_trace(
-        go.Scatter(
-            x=data.index,
-            y=result.resid,
-            mode="lines",
-            name="Residuals",
-        )
-    )
+    fig.add_trace(_scatter(result.resid, "Residuals", max_points, method))
 
-    fig.add_trace(
-        go.Scatter(
-            x=data.index,
-            y=result.seasonal,
-            mode="lines",
-            name="Seasonal",
-        )
-    )
+    fig.add_trace(_scatter(result.seasonal, "Seasonal", max_points, method))
 
     fig.update_layout(
         title=f"Signal Decomposition of: {data.name}",
@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Union
+
+
+def _pairwise_cumsums(xa: np.ndarray, ma: np.ndarray, xb: np.ndarray, mb: np.ndarray):
+    """
+    Cumulative pairwise counts and sums of two column blocks, with a leading zero row.
+
+    xa and xb are the demeaned (T, A) and (T, B) values with zeros where
+    missing, ma and mb their observation masks as floats.
+    """
+    sums = [
+        ma[:, :, None] * mb[:, None, :],  # pairwise observation counts
+        xa[:, :, None] * mb[:, None, :],  # sum of x_i where x_j is observed
+        (xa * xa)[:, :, None] * mb[:, None, :],  # sum of x_i^2 where x_j is observed
+        xa[:, :, None] * xb[:, None, :],  # sum of x_i * x_j
+        ma[:, :, None] * xb[:, None, :],  # sum of x_j where x_i is observed
+        ma[:, :, None] * (xb * xb)[:, None, :],  # sum of x_j^2 where x_i is observed
+    ]
+    zero = np.zeros((1,) + sums[0].shape[1:])
+    return [np.concatenate([zero, np.cumsum(s, axis=0)]) for s in sums]
+
+
+def _corr_from_sums(n, sx, sxx, sxy, min_periods: int, sy=None, syy=None) -> np.ndarray:
+    """
+    Pearson correlation matrices from pairwise window sums.
+
+    sy and syy default to the transposes of sx and sxx, for square sums of a
+    single block of columns.
+    """
+    if sy is None:
+        sy, syy = np.swapaxes(sx, -1, -2), np.swapaxes(sxx, -1, -2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx * sx
+        var_y = n * syy - sy * sy
+        corr = cov / np.sqrt(var_x * var_y)
+    corr = np.clip(corr, -1.0, 1.0)
+    corr[n < max(min_periods, 2)] = np.nan
+    return corr
+
+
+def rolling_corr(
+    data: Union[pd.DataFrame, np.ndarray],
+    window: int,
+    min_periods: Optional[int] = None,
+    block_size: int = 16,
+) -> np.ndarray:
+    """
+    Computes rolling Pearson correlation matrices with running sums.
+
+    Every window is obtained by differencing cumulative sums, so the cost is
+    O(T * K^2) whatever the window length. Missing values are handled
+    pairwise, like pd.DataFrame.corr. The result holds T * K^2 values; the
+    running sums are computed for one pair of column blocks at a time, so
+    they only add O(T * block_size^2) memory.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or np.ndarray
+        The (T, K) input data. Only numerical columns of a DataFrame are used.
+    window : int
+        The number of observations in each window.
+    min_periods : int, optional
+        The minimum number of pairwise observations required. Default is window.
+    block_size : int, optional
+        The number of columns per block of running sums. Default is 16.
+
+    Returns
+    -------
+    np.ndarray
+        A (T, K, K) array where element t is the correlation matrix of the
+        window ending at row t.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = data.select_dtypes(include=[np.number]).to_numpy(dtype=float)
+    values = np.asarray(data, dtype=float)
+    min_periods = window if min_periods is None else min_periods
+
+    mask = np.isfinite(values)
+    # Demeaning limits the cancellation error of differencing long running sums
+    x = np.where(mask, values - np.nanmean(values, axis=0), 0.0)
+    m = mask.astype(float)
+
+    n_rows, k = values.shape
+    ends = np.arange(1, n_rows + 1)
+    starts = np.maximum(ends - window, 0)
+    out = np.empty((n_rows, k, k))
+    blocks = [slice(lo, min(lo + block_size, k)) for lo in range(0, k, block_size)]
+    for i, a in enumerate(blocks):
+        # The matrices are symmetric: only blocks on and above the diagonal
+        for b in blocks[i:]:
+            n, sx, sxx, sxy, sy, syy = (
+                s[ends] - s[starts]
+                for s in _pairwise_cumsums(x[:, a], m[:, a], x[:, b], m[:, b])
+            )
+            out[:, a, b] = _corr_from_sums(n, sx, sxx, sxy, min_periods, sy, syy)
+            out[:, b, a] = np.swapaxes(out[:, a, b], -1, -2)
+    return out
+
+
+class RollingCorrelation:
+    """
+    Incrementally updated rolling correlation matrix for live bars.
+
+    Running sums are updated in O(K^2) per bar by adding the new row and
+    removing the one leaving the window. Values are shifted by the first
+    observation of each series and the sums are rebuilt from the window
+    buffer every `window` updates to limit floating point error.
+
+    Parameters
+    ----------
+    columns : Sequence[str]
+        The names of the K series.
+    window : int
+        The number of bars in the window.
+    min_periods : int, optional
+        The minimum number of pairwise observations required. Default is window.
+    """
+
+    def __init__(
+        self, columns: Sequence[str], window: int, min_periods: Optional[int] = None
+    ) -> None:
+        self.columns = list(columns)
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+
+        k = len(self.columns)
+        self._buffer = np.full((window, k), np.nan)
+        self._shift = np.full(k, np.nan)
+        self._count = 0
+        self._sums = [np.zeros((k, k)) for _ in range(4)]
+
+    def _row_sums(self, row: np.ndarray):
+        row = row - self._shift
+        mask = np.isfinite(row)
+        x = np.where(mask, row, 0.0)
+        m = mask.astype(float)
+        return [
+            np.outer(m, m),
+            np.outer(x, m),
+            np.outer(x * x, m),
+            np.outer(x, x),
+        ]
+
+    def _rebuild(self) -> None:
+        rows = self._buffer[: min(self._count, self.window)]
+        self._sums = [np.zeros_like(s) for s in self._sums]
+        for row in rows:
+            for total, part in zip(self._sums, self._row_sums(row)):
+                total += part
+
+    def update(self, row: Union[Sequence[float], pd.Series]) -> np.ndarray:
+        """
+        Adds one bar and returns the current (K, K) correlation matrix.
+
+        Parameters
+        ----------
+        row : Sequence[float] or pd.Series
+            The new values, ordered like columns (a pd.Series is aligned by name).
+
+        Returns
+        -------
+        np.ndarray
+            The correlation matrix of the current window.
+        """
+        if isinstance(row, pd.Series):
+            row = row.reindex(self.columns)
+        row = np.asarray(row, dtype=float)
+        first = np.isnan(self._shift) & np.isfinite(row)
+        self._shift[first] = row[first]
+
+        slot = self._count % self.window
+        if self._count >= self.window:
+            for total, part in zip(self._sums, self._row_sums(self._buffer[slot])):
+                total -= part
+        self._buffer[slot] = row
+        for total, part in zip(self._sums, self._row_sums(row)):
+            total += part
+        self._count += 1
+
+        if self._count % self.window == 0:
+            self._rebuild()
+
+        return self.corr
+
+    def update_many(self, data: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+        """Adds several bars in order and returns the last correlation matrix."""
+        if isinstance(data, pd.DataFrame):
+            data = data.reindex(columns=self.columns).to_numpy(dtype=float)
+        corr = self.corr
+        for row in np.asarray(data, dtype=float):
+            corr = self.update(row)
+        return corr
+
+    @property
+    def corr(self) -> np.ndarray:
+        """The (K, K) correlation matrix of the current window."""
+        return _corr_from_sums(*self._sums, self.min_periods)
+
+    def to_frame(self) -> pd.DataFrame:
+        """The current correlation matrix as a labelled pd.DataFrame."""
+        return pd.DataFrame(self.corr, index=self.columns, columns=self.columns)
@@ -1,6 +1,13 @@
+from collections import deque
+from typing import Iterable, Optional
+import numpy as np
 import pandas as pd
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
+from sortedcontainers import SortedList
+from .instrumentation import instrument
+from .kernels import Engine, rolling_percentile_rank
 
+@instrument("normalization")
 def z_score_normalize(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normalize numerical columns of pd.DataFrame object using Z-score normalization.
@@ -22,6 +29,7 @@ def z_score_normalize(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
+@instrument("normalization")
 def min_max_scale(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normalize numerical columns of pd.DataFrame object using Min-Max normalization.
@@ -41,4 +49,103 @@ def min_max_scale(df: pd.DataFrame) -> pd.DataFrame:
     normalized_df = pd.DataFrame(normalized_array, columns=numerical_cols, index=df.index)
     df[numerical_cols] = normalized_df
     
-    return df
\ No newline at end of file
+    return df
+
+@instrument("normalization")
+def percentile_rank_normalize(
+    df: pd.DataFrame,
+    window: int,
+    min_periods: Optional[int] = None,
+    engine: Engine = 'auto',
+) -> pd.DataFrame:
+    """
+    Normalize numerical columns of pd.DataFrame object to their rolling percentile rank.
+
+    Every value is replaced by its rank within the trailing window divided by
+    the number of observations, in (0, 1], ties averaged like
+    pd.Series.rolling(window).rank(pct=True). Unlike z-scores the result does
+    not depend on the scale or tails of the distribution. With the numba
+    engine, the default, each row costs O(log U), U being the number of
+    distinct values of the column (up to N), after an O(N log N) sort of the
+    column; the NumPy engine is O(W) per row. See RollingPercentileRank for
+    live bars.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Input data to normalize, sorted by time.
+    window : int
+        The number of rows in each window.
+    min_periods : int, optional
+        The minimum number of observations required. Default is window.
+    engine : Literal['auto', 'numba', 'numpy'], optional
+        The kernel used, see rolling_percentile_rank. Default is 'auto'.
+
+    Returns
+    -------
+    pd.DataFrame : DataFrame with percentile rank normalized numerical columns.
+    """
+    numerical_cols = df.select_dtypes(include=['number']).columns
+    for col in numerical_cols:
+        df[col] = rolling_percentile_rank(df[col], window, min_periods, engine=engine)
+
+    return df
+
+
+class RollingPercentileRank:
+    """
+    Incrementally updated rolling percentile rank of a series, for live bars.
+
+    The window values are kept in a sorted list, so each bar is inserted,
+    evicted and ranked in O(log W). The ranks match percentile_rank_normalize
+    over the same bars.
+
+    Parameters
+    ----------
+    window : int
+        The number of bars in the window.
+    min_periods : int, optional
+        The minimum number of observations required. Default is window.
+    """
+
+    def __init__(self, window: int, min_periods: Optional[int] = None) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self._bars = deque(maxlen=window)
+        self._sorted = SortedList()
+
+    def update(self, value: float) -> float:
+        """
+        Adds one bar and returns its percentile rank within the current window.
+
+        Parameters
+        ----------
+        value : float
+            The new value, NaN takes a slot of the window without being ranked.
+
+        Returns
+        -------
+        float
+            The percentile rank in (0, 1], NaN for a NaN value or while fewer
+            than min_periods values are observed.
+        """
+        value = float(value)
+        if len(self._bars) == self.window:
+            evicted = self._bars[0]
+            if not np.isnan(evicted):
+                self._sorted.remove(evicted)
+        self._bars.append(value)
+        if np.isnan(value):
+            return np.nan
+        self._sorted.add(value)
+
+        count = len(self._sorted)
+        if count < self.min_periods:
+            return np.nan
+        less = self._sorted.bisect_left(value)
+        equal = self._sorted.bisect_right(value) - less
+        return (less + (equal + 1) / 2) / count
+
+    def update_many(self, values: Iterable[float]) -> np.ndarray:
+        """Adds several bars in order and returns their percentile ranks."""
+        return np.array([self.update(value) for value in values], dtype=float)
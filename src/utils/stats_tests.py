@@ -1,6 +1,18 @@
+import hashlib
+import os
+import warnings
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-from statsmodels.tsa.stattools import adfuller
-from typing import Literal
+from statsmodels.tsa.stattools import adfuller, kpss
+from typing import Literal, Mapping, Optional, Sequence, Union
+
+# The number of results kept by the cache, least recently used ones are evicted
+MAX_CACHED_RESULTS = 100_000
+
+# Results of batch tests keyed by (series hash, test, regression)
+_RESULTS_CACHE: OrderedDict = OrderedDict()
 
 
 def adf_test(
@@ -45,3 +57,226 @@ def adf_test(
         "p-value": result[1],
         "Critical Values": result[4],
     }
+
+
+def kpss_test(
+    series: pd.Series, reg: Literal["c", "ct"] = "c", interpret: bool = True
+) -> dict:
+    """
+    Perform Kwiatkowski-Phillips-Schmidt-Shin test on a pandas Series.
+
+    Parameters
+    ----------
+    series : pd.Series
+        The time series data to test.
+
+    reg : str, optional
+        - c: the data is stationary around a constant
+        - ct: the data is stationary around a trend
+
+        Default is "c".
+
+    interpret : bool, optional
+        Whether to interpret the p-value. Default is True.
+
+    Returns
+    -------
+    dict :
+        A dictionary containing the KPSS statistic, p-value, and critical values.
+    """
+    with warnings.catch_warnings():
+        # p-values outside the lookup table are clipped by statsmodels
+        warnings.simplefilter("ignore")
+        result = kpss(series.dropna(), regression=reg, nlags="auto")
+
+    if interpret:
+        if result[1] < 0.05:
+            print("The time series is non-stationary (reject the null hypothesis).\n")
+        else:
+            print(
+                "The time series is stationary (fail to reject the null hypothesis).\n"
+            )
+    return {
+        "regression": reg,
+        "KPSS Statistic": result[0],
+        "p-value": result[1],
+        "Critical Values": result[3],
+    }
+
+
+def _series_hash(values: np.ndarray) -> str:
+    """Hash the raw values of a series for the results cache."""
+    return hashlib.sha1(np.ascontiguousarray(values).tobytes()).hexdigest()
+
+
+def _run_test(task: tuple) -> dict:
+    """
+    Run a single stationarity test without printing (process pool worker).
+
+    A series the test cannot handle, e.g. a constant one, gives a NaN row
+    with the error message instead of aborting the whole batch.
+    """
+    test, reg, values = task
+    series = pd.Series(values)
+    try:
+        if test == "adf":
+            result = adf_test(series, reg=reg, interpret=False)
+            statistic = result["ADF Statistic"]
+            stationary = result["p-value"] < 0.05
+        else:
+            result = kpss_test(series, reg=reg, interpret=False)
+            statistic = result["KPSS Statistic"]
+            stationary = result["p-value"] >= 0.05
+    except Exception as error:
+        return {
+            "statistic": np.nan,
+            "p_value": np.nan,
+            "stationary": None,
+            "error": f"{type(error).__name__}: {error}",
+        }
+    return {
+        "statistic": statistic,
+        "p_value": result["p-value"],
+        "stationary": stationary,
+        "error": None,
+    }
+
+
+def _iter_series(
+    data: Union[pd.DataFrame, Mapping[str, Union[pd.Series, pd.DataFrame]]],
+):
+    """Yield (name, column, series) for every numerical series in data."""
+    if isinstance(data, pd.DataFrame):
+        data = {None: data}
+    for name, obj in data.items():
+        if isinstance(obj, pd.Series):
+            yield name, obj.name, obj
+        else:
+            for column in obj.select_dtypes(include=[np.number]).columns:
+                yield name, column, obj[column]
+
+
+def batch_stationarity_tests(
+    data: Union[pd.DataFrame, Mapping[str, Union[pd.Series, pd.DataFrame]]],
+    tests: Sequence[Literal["adf", "kpss"]] = ("adf", "kpss"),
+    reg: Literal["c", "ct"] = "c",
+    windows: Optional[Sequence[int]] = None,
+    step: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
+    """
+    Run ADF and KPSS tests across many series and rolling windows in a process pool.
+
+    Parameters
+    ----------
+    data : pd.DataFrame or Mapping[str, pd.Series | pd.DataFrame]
+        The series to test. Every numerical column of a DataFrame is tested;
+        a mapping (e.g. one DataFrame per market) tests each of its values.
+    tests : Sequence[str], optional
+        The tests to run, any of "adf" and "kpss". Default is both.
+    reg : str, optional
+        The deterministic terms of the regression ("c" or "ct"). Default is "c".
+    windows : Sequence[int], optional
+        Rolling window lengths in observations. Default is None (full sample only).
+    step : int, optional
+        The number of observations between consecutive windows. Default is the window length.
+    max_workers : int, optional
+        The number of worker processes. Use 1 to run serially. Default is os.cpu_count().
+    use_cache : bool, optional
+        Whether to reuse and keep results of identical series tested by
+        previous calls. At most MAX_CACHED_RESULTS results are kept, the least
+        recently used first evicted. Default is True.
+
+    Returns
+    -------
+    pd.DataFrame
+        A tidy DataFrame with one row per series, window and test. Tests that
+        failed have NaN results and their message in the 'error' column.
+    """
+    rows, tasks, keys = [], [], []
+
+    for name, column, series in _iter_series(data):
+        series = series.dropna()
+        values = series.to_numpy(dtype=float)
+        index = series.index
+
+        bounds = [(0, len(values))]
+        if windows is not None:
+            bounds = [
+                (i, i + window)
+                for window in windows
+                for i in range(0, len(values) - window + 1, step or window)
+            ]
+
+        for lo, hi in bounds:
+            chunk = values[lo:hi]
+            chunk_hash = _series_hash(chunk)
+            for test in tests:
+                rows.append(
+                    {
+                        "series": name,
+                        "column": column,
+                        "window": hi - lo,
+                        "start": index[lo] if hi > lo else None,
+                        "end": index[hi - 1] if hi > lo else None,
+                        "test": test,
+                        "regression": reg,
+                    }
+                )
+                keys.append((chunk_hash, test, reg))
+                tasks.append((test, reg, chunk))
+
+    # Identical series within the batch are tested once
+    first = {}
+    for i, key in enumerate(keys):
+        first.setdefault(key, i)
+    found = {}
+    if use_cache:
+        for key in first:
+            if key in _RESULTS_CACHE:
+                _RESULTS_CACHE.move_to_end(key)
+                found[key] = _RESULTS_CACHE[key]
+    pending = [i for key, i in first.items() if key not in found]
+    if max_workers == 1 or len(pending) <= 1:
+        results = map(_run_test, (tasks[i] for i in pending))
+        found.update((keys[i], result) for i, result in zip(pending, results))
+    else:
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(pending) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                _run_test, (tasks[i] for i in pending), chunksize=chunksize
+            )
+            found.update((keys[i], result) for i, result in zip(pending, results))
+
+    if use_cache:
+        for i in pending:
+            _RESULTS_CACHE[keys[i]] = found[keys[i]]
+        while len(_RESULTS_CACHE) > MAX_CACHED_RESULTS:
+            _RESULTS_CACHE.popitem(last=False)
+
+    for row, key in zip(rows, keys):
+        row.update(found[key])
+
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "series",
+            "column",
+            "window",
+            "start",
+            "end",
+            "test",
+            "regression",
+            "statistic",
+            "p_value",
+            "stationary",
+            "error",
+        ],
+    )
+
+
+def clear_stationarity_cache() -> None:
+    """Empty the results cache used by batch_stationarity_tests."""
+    _RESULTS_CACHE.clear()
@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+
+
+def _times(df: pd.DataFrame) -> pd.DatetimeIndex:
+    """The timestamps of the rows: the 'date' column if present, else the index."""
+    if "date" in df.columns:
+        return pd.DatetimeIndex(pd.to_datetime(df["date"]))
+    return pd.DatetimeIndex(df.index)
+
+
+def sort_by_time(df: pd.DataFrame, keys: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Sorts rows by time then keys, drops duplicates and sets a DatetimeIndex.
+
+    A 'date' column is kept as is and mirrored into an unnamed index, so that
+    frames with several rows per timestamp (one per instrument) are still
+    sorted by time. Among duplicates the last row wins.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The rows to sort, timed by a 'date' column or a datetime index.
+    keys : Sequence[str], optional
+        The columns identifying an instrument, e.g. ('market', 'symbol').
+        Default is ().
+
+    Returns
+    -------
+    pd.DataFrame
+        The sorted DataFrame, unique per (time, keys).
+    """
+    if df.empty:
+        return df
+
+    times = _times(df)
+    index = times.rename(None) if "date" in df.columns else times
+    if not keys and index.is_monotonic_increasing and index.is_unique:
+        df = df.copy(deep=False)
+        df.index = index
+        return df
+
+    # np.lexsort sorts by the last key first
+    columns = [df[key].to_numpy() for key in reversed(keys)]
+    order = np.lexsort(columns + [times.asi8])
+    df = df.iloc[order].set_axis(index[order], axis=0)
+
+    duplicated = pd.DataFrame(
+        {"t": df.index.asi8, **{k: df[k].to_numpy() for k in keys}}
+    )
+    return df[~duplicated.duplicated(keep="last").to_numpy()]
+
+
+def slice_time(
+    df: pd.DataFrame, start: Optional[str] = None, end: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Selects the rows between start and end (both inclusive) by binary search.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        A DataFrame with a sorted DatetimeIndex, as returned by sort_by_time.
+    start : str, optional
+        The first timestamp to keep. Default is None (from the first row).
+    end : str, optional
+        The last timestamp to keep. Default is None (to the last row).
+
+    Returns
+    -------
+    pd.DataFrame
+        A positional slice of df, sharing its data.
+    """
+    lo = 0 if start is None else df.index.searchsorted(pd.Timestamp(start), "left")
+    hi = len(df) if end is None else df.index.searchsorted(pd.Timestamp(end), "right")
+    return df.iloc[lo:hi]
+
+
+def merge_append(
+    existing: pd.DataFrame, new: pd.DataFrame, keys: Sequence[str] = ()
+) -> pd.DataFrame:
+    """
+    Merges newly fetched rows into time-sorted rows, keeping the order.
+
+    Rows of new before or after the existing range are prepended or appended
+    as they are; only the overlapping range is re-sorted and deduplicated,
+    with the new rows winning.
+
+    Parameters
+    ----------
+    existing : pd.DataFrame
+        Rows sorted by sort_by_time.
+    new : pd.DataFrame
+        Rows sorted by sort_by_time.
+    keys : Sequence[str], optional
+        The columns identifying an instrument. Default is ().
+
+    Returns
+    -------
+    pd.DataFrame
+        The merged rows, sorted and unique per (time, keys).
+    """
+    if new.empty:
+        return existing
+    if existing.empty:
+        return new
+
+    first, last = existing.index[0], existing.index[-1]
+    lo = new.index.searchsorted(first, "left")
+    hi = new.index.searchsorted(last, "right")
+    parts = [new.iloc[:lo]]
+
+    if hi > lo:
+        overlap = new.iloc[lo:hi]
+        a = existing.index.searchsorted(overlap.index[0], "left")
+        b = existing.index.searchsorted(overlap.index[-1], "right")
+        middle = sort_by_time(pd.concat([existing.iloc[a:b], overlap]), keys)
+        parts += [existing.iloc[:a], middle, existing.iloc[b:]]
+    else:
+        parts.append(existing)
+
+    parts.append(new.iloc[hi:])
+    return pd.concat([part for part in parts if not part.empty])
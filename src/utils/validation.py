@@ -0,0 +1,273 @@
+import logging
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+from .time_index import _times
+
+validation_logger = logging.getLogger("validation_logger")
+
+RULES = [
+    "missing",
+    "duplicate",
+    "non_monotonic",
+    "gap",
+    "non_positive",
+    "negative",
+    "spike",
+]
+
+
+class ValidationReport:
+    """
+    The outcome of a validation pass over fetched market data.
+
+    Parameters
+    ----------
+    masks : pd.DataFrame
+        One boolean column per rule, aligned with the validated rows, True
+        where a row breaks the rule.
+    schema_errors : List[str]
+        The missing or non-numeric columns.
+    missing_bars : int
+        The number of bars missing inside the gaps, given a granularity.
+    """
+
+    def __init__(
+        self, masks: pd.DataFrame, schema_errors: List[str], missing_bars: int = 0
+    ) -> None:
+        self.masks = masks
+        self.schema_errors = schema_errors
+        self.missing_bars = missing_bars
+
+    @property
+    def invalid(self) -> pd.Series:
+        """Rows breaking a rule other than 'gap', which flags the row after a gap."""
+        return self.masks.drop(columns="gap").any(axis=1)
+
+    @property
+    def ok(self) -> bool:
+        return not self.schema_errors and not self.masks.to_numpy().any()
+
+    def summary(self) -> pd.DataFrame:
+        """The number and share of rows breaking each rule."""
+        counts = self.masks.sum()
+        return pd.DataFrame(
+            {"rows": counts, "share": counts / max(len(self.masks), 1)}
+        ).rename_axis("rule")
+
+    def log(self, label: str) -> None:
+        """Logs the failed rules, as a warning, or a single info line if ok."""
+        if self.ok:
+            validation_logger.info("%s: %s rows valid", label, len(self.masks))
+            return
+        if self.schema_errors:
+            validation_logger.warning(
+                "%s: schema errors %s", label, ", ".join(self.schema_errors)
+            )
+        counts = self.masks.sum()
+        failed = ", ".join(f"{rule}={n}" for rule, n in counts[counts > 0].items())
+        if failed:
+            validation_logger.warning(
+                "%s: %s of %s rows flagged (%s), %s missing bars",
+                label,
+                int(self.invalid.sum()),
+                len(self.masks),
+                failed,
+                self.missing_bars,
+            )
+
+    def __repr__(self) -> str:
+        counts = self.masks.sum()
+        failed = {rule: int(n) for rule, n in counts[counts > 0].items()}
+        return (
+            f"ValidationReport(rows={len(self.masks)}, failed={failed}, "
+            f"missing_bars={self.missing_bars}, schema_errors={self.schema_errors})"
+        )
+
+
+def validate_market_data(
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    keys: Sequence[str] = (),
+    granularity: Optional[str] = None,
+    required: Sequence[str] = (),
+    positive: Sequence[str] = (),
+    non_negative: Sequence[str] = (),
+    spikes: Optional[Dict[str, float]] = None,
+) -> ValidationReport:
+    """
+    Checks fetched rows for schema, ordering, gap, range and spike errors.
+
+    Every rule is evaluated on whole columns: instruments are told apart by
+    integer codes and consecutive bars of an instrument are compared after a
+    single stable sort, so the cost is O(N log N) with no Python loop over
+    rows or instruments. Rows are checked as fetched, before sort_by_time
+    drops duplicates and reorders them.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The rows, timed by a 'date' column or a datetime index.
+    columns : Sequence[str]
+        The columns expected, besides 'date'.
+    keys : Sequence[str], optional
+        The columns identifying an instrument, e.g. ('market', 'symbol').
+        Default is ().
+    granularity : str, optional
+        The expected bar interval, e.g. '1h'; gaps are not checked without it.
+        Default is None.
+    required : Sequence[str], optional
+        Columns that must not be NaN. Default is ().
+    positive : Sequence[str], optional
+        Columns that must be > 0 where present, e.g. prices. Default is ().
+    non_negative : Sequence[str], optional
+        Columns that must be >= 0 where present, e.g. volumes. Default is ().
+    spikes : Dict[str, float], optional
+        The maximum relative change between consecutive bars of an
+        instrument per column, e.g. {'open_interest': 0.5}. Default is None.
+
+    Returns
+    -------
+    ValidationReport
+        The masks of every rule and the schema errors.
+    """
+    n = len(df)
+    masks = pd.DataFrame(False, index=df.index, columns=RULES)
+    schema_errors = [f"missing column {c}" for c in [*keys, *columns] if c not in df]
+    if n == 0 or any(key not in df for key in keys):
+        return ValidationReport(masks, schema_errors)
+
+    numeric = [*required, *positive, *non_negative, *(spikes or {})]
+    for column in dict.fromkeys(numeric):
+        if column in df and not pd.api.types.is_numeric_dtype(df[column]):
+            schema_errors.append(f"non-numeric column {column}")
+
+    def values(column: str) -> Optional[np.ndarray]:
+        if column not in df or not pd.api.types.is_numeric_dtype(df[column]):
+            return None
+        return df[column].to_numpy(dtype=float, na_value=np.nan)
+
+    with np.errstate(invalid="ignore"):
+        for rule, cols, check in [
+            ("missing", required, np.isnan),
+            ("non_positive", positive, lambda x: x <= 0),
+            ("negative", non_negative, lambda x: x < 0),
+        ]:
+            for column in cols:
+                x = values(column)
+                if x is not None:
+                    masks[rule] |= check(x)
+
+    times = _times(df).asi8
+    if keys:
+        codes = df.groupby(list(keys), sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        codes = np.zeros(n, dtype=np.int64)
+
+    # Arrival order within each instrument: time must move one way, the
+    # direction of its first to last bar (pages may come newest first)
+    arrival = np.argsort(codes, kind="stable")
+    t, c = times[arrival], codes[arrival]
+    same = c[1:] == c[:-1]
+    starts = np.flatnonzero(np.r_[True, ~same])
+    ends = np.r_[starts[1:], n] - 1
+    direction = np.sign(t[ends] - t[starts])
+    steps = np.diff(t) * np.repeat(direction, ends - starts + 1)[1:]
+    non_monotonic = np.zeros(n, dtype=bool)
+    non_monotonic[arrival[1:][same & (steps < 0)]] = True
+    masks["non_monotonic"] = non_monotonic
+
+    # Consecutive bars of each instrument in time order
+    order = np.lexsort((times, codes))
+    same = codes[order][1:] == codes[order][:-1]
+    later = order[1:][same]
+    dt = np.diff(times[order])[same]
+
+    # The sort is stable, so among duplicates the last fetched row comes last
+    duplicate = np.zeros(n, dtype=bool)
+    duplicate[order[:-1][same][dt == 0]] = True
+    masks["duplicate"] = duplicate
+
+    missing_bars = 0
+    if granularity is not None:
+        step = pd.Timedelta(granularity).value
+        gap = dt > step
+        masks.iloc[later[gap], RULES.index("gap")] = True
+        missing_bars = int((np.ceil(dt[gap] / step) - 1).sum())
+
+    for column, max_change in (spikes or {}).items():
+        x = values(column)
+        if x is None:
+            continue
+        x = x[order]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.abs(x[1:] / x[:-1] - 1)[same]
+        spike = (change > max_change) & (x[:-1][same] > 0)
+        masks.iloc[later[spike], RULES.index("spike")] = True
+
+    return ValidationReport(masks, schema_errors, missing_bars)
+
+
+def validate_perpetuals(
+    df: pd.DataFrame, granularity: Optional[str] = None, max_oi_change: float = 0.5
+) -> ValidationReport:
+    """
+    Validates perpetuals as returned by get_historical_all_perps or get_data.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The perpetuals, one row per (date, market, symbol).
+    granularity : str, optional
+        The granularity they were fetched at. Default is None.
+    max_oi_change : float, optional
+        The maximum relative open interest change between bars. Default is 0.5.
+
+    Returns
+    -------
+    ValidationReport
+        See validate_market_data.
+    """
+    return validate_market_data(
+        df,
+        ["price", "basis", "funding", "volume", "open_interest", "long_short_ratio"],
+        keys=("market", "symbol"),
+        granularity=granularity,
+        required=["price"],
+        positive=["price"],
+        non_negative=["volume", "open_interest", "long_short_ratio"],
+        spikes={"open_interest": max_oi_change},
+    )
+
+
+def validate_futures(
+    df: pd.DataFrame, granularity: Optional[str] = None, max_oi_change: float = 0.5
+) -> ValidationReport:
+    """
+    Validates futures snapshots as returned by get_data, before process_futures.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The snapshots, one row per (date, contract).
+    granularity : str, optional
+        The bucket granularity, None for the daily midnight snapshots.
+        Default is None.
+    max_oi_change : float, optional
+        The maximum relative open interest change between bars. Default is 0.5.
+
+    Returns
+    -------
+    ValidationReport
+        See validate_market_data.
+    """
+    return validate_market_data(
+        df,
+        ["price", "open_interest", "volume", "basis"],
+        keys=("currency",),
+        granularity=granularity or "1d",
+        required=["price"],
+        positive=["price"],
+        non_negative=["open_interest", "volume"],
+        spikes={"open_interest": max_oi_change},
+    )
@@ -0,0 +1,51 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.backtesting import block_bootstrap_indices, bootstrap_confidence_intervals
+
+
+class TestBootstrap(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 3000
+        self.data = pd.DataFrame(rng.normal(size=(n, 2)), columns=["funding", "basis"])
+        self.data["returns"] = 0.3 * self.data["funding"] + rng.normal(size=n)
+        self.data.iloc[::40, 1] = np.nan
+
+    def test_block_bootstrap_indices(self):
+        """Test that resamples are made of circular blocks of rows."""
+        indices = block_bootstrap_indices(100, 5, 8, rng=1)
+        self.assertEqual(indices.shape, (5, 100))
+        steps = np.diff(indices, axis=1) % 100
+        within = np.ones(99, dtype=bool)
+        within[7::8] = False
+        self.assertTrue((steps[:, within] == 1).all())
+
+    def test_confidence_intervals(self):
+        """Test estimates against pandas and intervals around them."""
+        result = bootstrap_confidence_intervals(
+            self.data, "returns", n_resamples=500, memory_limit=2**20
+        )
+        components = self.data[["funding", "basis"]]
+        np.testing.assert_allclose(
+            result.xs("corr", level="statistic")["estimate"],
+            components.corrwith(self.data["returns"]),
+        )
+        np.testing.assert_allclose(
+            result.xs("mean", level="statistic")["estimate"], components.mean()
+        )
+        self.assertTrue((result["lower"] < result["estimate"]).all())
+        self.assertTrue((result["estimate"] < result["upper"]).all())
+        # Funding predicts returns, basis does not
+        self.assertGreater(result.loc[("funding", "corr"), "lower"], 0.2)
+        self.assertLess(result.loc[("basis", "corr"), "lower"], 0)
+        self.assertGreater(result.loc[("funding", "hit_rate"), "lower"], 0.5)
+
+        parallel = bootstrap_confidence_intervals(
+            self.data, "returns", n_resamples=500, memory_limit=2**20, max_workers=2
+        )
+        pd.testing.assert_frame_equal(result, parallel)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from src.utils import chunked
+from src.utils.chunked import process_perps_chunked, read_partitions
+from src.utils.data_fetchers import PERPS_COLUMNS
+
+
+def fake_perps(
+    currency,
+    start,
+    end,
+    granularity,
+    limit=144,
+    instruments=None,
+    failed=None,
+    markets=("binance", "bybit"),
+):
+    """Hourly rows of every market from start to end inclusive, like the API."""
+    dates = pd.date_range(start, end, freq="1h")
+    frames = [
+        pd.DataFrame(
+            {
+                "date": dates,
+                "market": market,
+                "symbol": f"{currency}USDT",
+                "price": 100.0,
+                "basis": 0.0,
+                "funding": 0.0,
+                "volume": 1.0,
+                "open_interest": 1.0,
+                "long_short_ratio": 1.0,
+            }
+        )
+        for market in markets
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestProcessPerpsChunked(unittest.TestCase):
+    start, end = "2023-01-01", "2023-02-01"
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.out_dir = self.dir.name
+        self.fetch = mock.Mock(side_effect=fake_perps)
+        self.patches = [
+            mock.patch.object(chunked, "get_historical_all_perps", self.fetch),
+            mock.patch.object(chunked, "get_instruments_data", return_value=None),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        self.dir.cleanup()
+
+    def run_chunked(self, **kwargs):
+        options = {"partition": "10D", "memory_limit": 20000}
+        options.update(kwargs)
+        return process_perps_chunked(
+            "BTC", self.start, self.end, "1h", self.out_dir, **options
+        )
+
+    def assert_complete(self):
+        df = read_partitions(self.out_dir)
+        expected = pd.date_range(self.start, self.end, freq="1h")
+        for _, rows in df.groupby("market"):
+            self.assertEqual(list(rows["date"]), list(expected))
+
+    def test_partitions_cover_range(self):
+        """Test that adapted partitions cover the range once."""
+        paths = self.run_chunked()
+        self.assertGreater(len(paths), 4)
+        self.assert_complete()
+
+    def test_resume_after_deleting_partitions(self):
+        """Test that a resumed run continues from the recorded partition bounds."""
+        paths = self.run_chunked()
+        for path in paths[len(paths) // 2 :]:
+            os.remove(path)
+        self.fetch.reset_mock()
+
+        resumed = self.run_chunked()
+        self.assertEqual(resumed[: len(paths) // 2], paths[: len(paths) // 2])
+        first = pd.Timestamp(self.fetch.call_args_list[0].args[1])
+        kept = read_partitions(self.out_dir)["date"].max()
+        self.assertGreater(first, pd.Timestamp(self.start))
+        self.assertLessEqual(first, kept)
+        self.assert_complete()
+
+    def test_resume_skips_everything(self):
+        """Test that resuming a complete run fetches nothing."""
+        paths = self.run_chunked()
+        self.fetch.reset_mock()
+        self.assertEqual(self.run_chunked(), paths)
+        self.fetch.assert_not_called()
+
+    def test_failed_partition_is_retried(self):
+        """Test that an empty partition is not written and is fetched again."""
+        calls = []
+
+        def failing(*args, **kwargs):
+            calls.append(args[1])
+            if len(calls) == 2:
+                return pd.DataFrame()
+            return fake_perps(*args, **kwargs)
+
+        self.fetch.side_effect = failing
+        paths = self.run_chunked()
+        manifest = chunked._read_manifest(self.out_dir)
+        self.assertEqual(len(manifest["failed"]), 1)
+        self.assertEqual(len(os.listdir(self.out_dir)), len(paths) + 1)
+
+        # Reads filtered by date still work with a missing partition
+        df = read_partitions(self.out_dir, start="2023-01-15")
+        self.assertTrue((df["date"] >= "2023-01-15").all())
+
+        self.fetch.reset_mock()
+        self.fetch.side_effect = fake_perps
+        self.run_chunked()
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(self.fetch.call_args.args[1], calls[1])
+        self.assertEqual(chunked._read_manifest(self.out_dir)["failed"], [])
+        self.assert_complete()
+
+    def test_partial_partition_is_retried(self):
+        """Test that a partition missing a failed perpetual is refetched."""
+        calls = []
+
+        def partial(*args, failed=None, **kwargs):
+            calls.append(args[1])
+            if len(calls) == 2:
+                failed.append(("bybit", "BTCUSDT"))
+                return fake_perps(*args, markets=("binance",), **kwargs)
+            return fake_perps(*args, **kwargs)
+
+        self.fetch.side_effect = partial
+        paths = self.run_chunked()
+        manifest = chunked._read_manifest(self.out_dir)
+        partials = [p for p in manifest["partitions"] if p.get("missing")]
+        self.assertEqual(len(partials), 1)
+        self.assertEqual(partials[0]["missing"], [["bybit", "BTCUSDT"]])
+        self.assertEqual(len(paths), len(manifest["partitions"]))
+
+        self.fetch.reset_mock()
+        self.fetch.side_effect = fake_perps
+        self.assertEqual(self.run_chunked(), paths)
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(self.fetch.call_args.args[1], calls[1])
+        manifest = chunked._read_manifest(self.out_dir)
+        self.assertFalse(any(p.get("missing") for p in manifest["partitions"]))
+        self.assert_complete()
+
+    def test_no_data(self):
+        """Test that a run without any data writes no partition."""
+        self.fetch.side_effect = lambda *args, **kwargs: pd.DataFrame()
+        self.assertEqual(self.run_chunked(), [])
+        df = read_partitions(self.out_dir, start="2023-01-15")
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), PERPS_COLUMNS)
+
+    def test_longer_end(self):
+        """Test that extending the end refetches the closed last partition only."""
+        self.end = "2023-01-20"
+        self.run_chunked()
+        self.end = "2023-02-01"
+        self.run_chunked()
+        self.assert_complete()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+from src.utils import downsample_series
+from src.utils.downsampling import lttb_indices, minmax_indices
+from src.utils import plotting
+
+
+class TestDownsampling(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        index = pd.date_range("2023-01-01", periods=10_007, freq="min")
+        self.series = pd.Series(rng.normal(size=10_007).cumsum(), index=index)
+
+    def test_lttb_hand_computed(self):
+        """Test LTTB against a small case computed by hand."""
+        x = np.arange(7)
+        y = np.array([0, 2, 1, 4, 0, 3, 0])
+        # Buckets [1, 2] and [3, 4, 5]: point 1 makes the largest triangle with
+        # (0, 0) and the mean (4, 7/3) of the next bucket, then point 3 with
+        # (1, 2) and the last point (6, 0)
+        np.testing.assert_array_equal(lttb_indices(x, y, 4), [0, 1, 3, 6])
+        np.testing.assert_array_equal(
+            lttb_indices(x[:5], [0, 1, 5, 1, 0], 3), [0, 2, 4]
+        )
+
+    def test_endpoints_and_budget(self):
+        """Test that both methods keep the first and last points within budget."""
+        for method in ["lttb", "minmax"]:
+            for max_points in [3, 10, 999, 5000]:
+                with self.subTest(method=method, max_points=max_points):
+                    result = downsample_series(self.series, max_points, method)
+                    self.assertLessEqual(len(result), max_points)
+                    self.assertEqual(result.index[0], self.series.index[0])
+                    self.assertEqual(result.index[-1], self.series.index[-1])
+                    self.assertTrue(result.index.is_monotonic_increasing)
+                    self.assertTrue(result.index.is_unique)
+
+    def test_minmax_keeps_bucket_extremes(self):
+        """Test that minmax keeps the minimum and maximum of every bucket."""
+        y = self.series.to_numpy()
+        n_out = 100
+        kept = set(minmax_indices(y, n_out))
+        # Buckets split the points between the first and the last one
+        size = int(np.ceil((len(y) - 2) / ((n_out - 2) // 2)))
+        for lo in range(1, len(y) - 1, size):
+            bucket = y[lo : min(lo + size, len(y) - 1)]
+            self.assertIn(lo + int(np.argmin(bucket)), kept)
+            self.assertIn(lo + int(np.argmax(bucket)), kept)
+
+    def test_within_budget(self):
+        """Test that series fitting the budget, or without one, are kept as is."""
+        short = self.series[:100]
+        self.assertIs(downsample_series(short, 100), short)
+        self.assertIs(downsample_series(self.series, None), self.series)
+
+    def test_non_numeric_index(self):
+        """Test that LTTB uses positions when the index is neither numeric nor time."""
+        series = self.series.reset_index(drop=True)
+        series.index = series.index.astype(str)
+        result = downsample_series(series, 500)
+        expected = downsample_series(self.series, 500)
+        np.testing.assert_array_equal(result.to_numpy(), expected.to_numpy())
+
+
+class TestScatterTrace(unittest.TestCase):
+    def test_webgl_with_default_budget(self):
+        """Test that a long series downsampled to the default budget uses WebGL."""
+        series = pd.Series(np.arange(20_000.0))
+        self.assertIsInstance(
+            plotting._scatter(series, "s", 5000, "lttb"), go.Scattergl
+        )
+        short = pd.Series(np.arange(500.0))
+        self.assertIsInstance(plotting._scatter(short, "s", 5000, "lttb"), go.Scatter)
+
+
+if __name__ == "__main__":
+    unittest.main()
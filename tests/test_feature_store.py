@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.calculators import FeatureDefinition, FeatureStore, default_features
+from src.utils import sort_by_time
+
+
+class Source:
+    """Minimal market-data object exposing historical_data."""
+
+    def __init__(self, historical_data: pd.DataFrame) -> None:
+        self.historical_data = historical_data
+
+
+def perpetuals(dates: pd.DatetimeIndex, rng: np.random.Generator) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "date": dates.repeat(2),
+            "market": ["binance", "deribit"] * len(dates),
+            "symbol": "BTC-PERPETUAL",
+            "funding": rng.normal(0, 1e-4, 2 * len(dates)),
+            "open_interest": rng.uniform(1e8, 2e8, 2 * len(dates)),
+        }
+    )
+    return sort_by_time(df, ("market", "symbol"))
+
+
+class TestFeatureStore(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        dates = pd.date_range("2024-01-01", periods=200, freq="D")
+        self.perps = perpetuals(dates, rng)
+        self.futures = pd.DataFrame(
+            {"annualized_basis": rng.normal(0.1, 0.02, len(dates))},
+            index=pd.Index(dates, name="date"),
+        )
+
+    def store(self, n_dates: int) -> FeatureStore:
+        cutoff = self.futures.index[n_dates - 1]
+        return FeatureStore(
+            {
+                "perpetuals": Source(self.perps[self.perps.index <= cutoff]),
+                "futures": Source(self.futures[self.futures.index <= cutoff]),
+            },
+            default_features(zscore_window=20),
+        )
+
+    def test_incremental_matches_full(self):
+        """Test that refreshing after new rows equals a full computation."""
+        store = self.store(120)
+        store.refresh()
+        store.sources["perpetuals"].historical_data = self.perps
+        store.sources["futures"].historical_data = self.futures
+        added = store.refresh()
+
+        full = self.store(200)
+        full.refresh()
+        self.assertEqual(added["basis_zscore"], 80)
+        for name in full.features:
+            pd.testing.assert_frame_equal(store.get(name), full.get(name))
+
+    def test_dependencies(self):
+        """Test that features are refreshed after their dependencies."""
+        store = self.store(50)
+        store.register(
+            FeatureDefinition(
+                "basis_zscore_change",
+                lambda df: df["basis_zscore"].diff(),
+                ["basis_zscore"],
+                1,
+            )
+        )
+        self.assertEqual(
+            store.dependencies("basis_zscore_change"),
+            ["annualized_basis", "basis_zscore"],
+        )
+        self.assertEqual(store.last_timestamp("basis_zscore_change"), None)
+        store.refresh("basis_zscore_change")
+        self.assertEqual(
+            store.last_timestamp("basis_zscore_change"), self.futures.index[49]
+        )
+        self.assertIsNone(store.last_timestamp("oi_change"))
+
+
+if __name__ == "__main__":
+    unittest.main()
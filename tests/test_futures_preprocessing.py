@@ -0,0 +1,121 @@
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.marketdata.futures_data import FuturesData
+from src.utils import constant_maturity_basis, process_futures_term_structure
+
+
+class TestConstantMaturityBasis(unittest.TestCase):
+    def setUp(self):
+        dates = pd.to_datetime(["2023-01-01"] * 3 + ["2023-01-02"] * 2)
+        expiries = pd.to_datetime(
+            ["2023-01-05", "2023-01-31", "2023-04-01", "2023-01-31", "2023-04-01"]
+        )
+        self.df = pd.DataFrame(
+            {
+                "date": dates,
+                "expiry": expiries,
+                "annualized_basis": [4.0, 10.0, 20.0, 12.0, 18.0],
+            }
+        )
+
+    def test_exact_and_interpolated_tenors(self):
+        """Test that tenors matching an expiry are exact and others are linear."""
+        result = constant_maturity_basis(self.df, tenors=(30, 60))
+        first = result.loc["2023-01-01"]
+        self.assertAlmostEqual(first["annualized_basis_30d"], 10.0)
+        # 60 days sits between 30d (10.0) and 90d (20.0)
+        self.assertAlmostEqual(first["annualized_basis_60d"], 15.0)
+
+    def test_out_of_range_tenors_are_nan(self):
+        """Test that tenors shorter than the front expiry are not extrapolated."""
+        result = constant_maturity_basis(self.df, tenors=(7, 180))
+        self.assertAlmostEqual(
+            result.loc["2023-01-01", "annualized_basis_7d"], 4.0 + 3 * 6.0 / 26
+        )
+        self.assertTrue(np.isnan(result.loc["2023-01-02", "annualized_basis_7d"]))
+        self.assertTrue(result["annualized_basis_180d"].isna().all())
+
+    def test_unsorted_input(self):
+        """Test that the row order of the input does not change the result."""
+        expected = constant_maturity_basis(self.df)
+        shuffled = constant_maturity_basis(self.df.sample(frac=1, random_state=0))
+        pd.testing.assert_frame_equal(expected, shuffled)
+
+    def test_process_futures_term_structure(self):
+        """Test the full pipeline from raw futures documents."""
+        futures = pd.DataFrame(
+            {
+                "date": ["2023-01-01", "2023-01-01", "2023-01-01"],
+                "currency": ["btc-31jan23", "btc-31jan23", "btc-1apr23"],
+                "basis": [1.0, 3.0, 5.0],
+            }
+        )
+        result = process_futures_term_structure(futures, tenors=(30,))
+        # Duplicated quotes are averaged: basis 2.0 over 30 days
+        self.assertAlmostEqual(
+            result.loc["2023-01-01", "annualized_basis_30d"], 2.0 * 365 / 30
+        )
+
+    def test_intraday_tenors(self):
+        """Test that intraday rows use whole days to expiry, like the annualization."""
+        futures = pd.DataFrame(
+            {
+                "date": ["2023-01-01 12:00", "2023-01-01 12:00"],
+                "currency": ["btc-31jan23", "btc-1apr23"],
+                "basis": [2.0, 5.0],
+            }
+        )
+        # 29.5 days to the January expiry, annualized over 29 whole days
+        result = process_futures_term_structure(futures, tenors=(29,))
+        self.assertAlmostEqual(
+            result.loc["2023-01-01 12:00", "annualized_basis_29d"], 2.0 * 365 / 29
+        )
+
+
+def fake_snapshots(coin, type, start, end, granularity=None, as_frame=False):
+    """Daily snapshots of two contracts between start and end, like get_data."""
+    dates = pd.date_range(start, end, freq="1D")
+    return pd.DataFrame(
+        {
+            "_id": range(2 * len(dates)),
+            "date": dates.repeat(2),
+            "currency": ["btc-31mar23", "btc-30jun23"] * len(dates),
+            "price": 100.0,
+            "open_interest": 1.0,
+            "volume": 1.0,
+            "basis": [1.0, 3.0] * len(dates),
+            "yield": 0.0,
+        }
+    )
+
+
+@mock.patch("src.marketdata.futures_data.get_data", side_effect=fake_snapshots)
+class TestFuturesDataTermStructure(unittest.TestCase):
+    def test_no_query(self, get_data):
+        """Test that the term structure is built from the loaded data only."""
+        futures = FuturesData("BTC", "2023-01-01", "2023-01-10", validate=False)
+        result = futures.term_structure(tenors=(90,))
+        get_data.assert_called_once()
+        expected = process_futures_term_structure(
+            fake_snapshots("BTC", "futures", "2023-01-01", "2023-01-10"), (90,)
+        )
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_follows_range(self, get_data):
+        """Test that trimming and extending the range update the term structure."""
+        futures = FuturesData("BTC", "2023-01-05", "2023-01-10", validate=False)
+        futures.start = "2023-01-07"
+        self.assertEqual(futures.term_structure().index[0], pd.Timestamp("2023-01-07"))
+        futures.start = "2023-01-01"
+        futures.end = "2023-01-12"
+        result = futures.term_structure()
+        self.assertEqual(
+            list(result.index), list(pd.date_range("2023-01-01", "2023-01-12"))
+        )
+        self.assertFalse(result["annualized_basis_90d"].isna().any())
+
+
+if __name__ == "__main__":
+    unittest.main()
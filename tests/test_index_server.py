@@ -0,0 +1,80 @@
+import io
+import json
+import unittest
+import urllib.error
+import urllib.request
+import numpy as np
+import pandas as pd
+from src.services import IndexServer
+
+
+class TestIndexServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(0)
+        dates = pd.date_range("2024-01-01", periods=100, freq="D", name="date")
+        cls.history = pd.DataFrame(
+            {
+                "value": rng.uniform(0, 100, len(dates)),
+                "funding": rng.uniform(0, 100, len(dates)),
+                "basis": rng.uniform(0, 100, len(dates)),
+            },
+            index=dates,
+        )
+        cls.server = IndexServer().start()
+        cls.server.cache.publish("BTC", cls.history)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def get(self, path: str, headers: dict = None):
+        request = urllib.request.Request(
+            self.server.base_url + path, headers=headers or {}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+
+    def test_latest_with_etag(self):
+        """Test the latest value and that a matching ETag is answered with 304."""
+        status, headers, body = self.get("/v1/index/btc/latest")
+        latest = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertAlmostEqual(latest["value"], self.history["value"].iloc[-1])
+        self.assertEqual(set(latest["components"]), {"funding", "basis"})
+
+        status, _, body = self.get(
+            "/v1/index/btc/latest", {"If-None-Match": headers["ETag"]}
+        )
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
+    def test_history_formats(self):
+        """Test history ranges in CSV and Arrow."""
+        path = "/v1/index/BTC/history?start=2024-02-01&end=2024-02-10"
+        status, headers, body = self.get(path + "&format=csv")
+        csv = pd.read_csv(io.BytesIO(body), parse_dates=["date"])
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["Content-Type"], "text/csv")
+        self.assertEqual(len(csv), 10)
+
+        try:
+            import pyarrow as pa
+        except ImportError:
+            self.skipTest("pyarrow is not installed")
+        status, _, body = self.get(path + "&format=arrow")
+        table = pa.ipc.open_stream(body).read_all()
+        self.assertEqual(table.num_rows, 10)
+        self.assertEqual(table.column_names, ["date", "value", "funding", "basis"])
+
+    def test_unknown(self):
+        """Test unknown currencies and formats."""
+        self.assertEqual(self.get("/v1/index/ETH/latest")[0], 404)
+        self.assertEqual(self.get("/v1/index/BTC/history?format=xml")[0], 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
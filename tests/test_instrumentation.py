@@ -0,0 +1,122 @@
+import json
+import unittest
+from unittest import mock
+from benchmarks.replay_server import ReplayConfig, ReplayServer
+from src.utils import data_fetchers, instrumentation
+from src.utils.instrumentation import BUCKETS, instrument, record, stage
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_counts(self):
+        """Test that observations add up their counts, timings and counters."""
+        record("fetch", 0.5, rows=10, bytes=100)
+        record("fetch", 1.5, rows=5, retries=2)
+        metrics = instrumentation.snapshot()["fetch"]
+        self.assertEqual(metrics["count"], 2)
+        self.assertAlmostEqual(metrics["seconds"], 2.0)
+        self.assertAlmostEqual(metrics["max_seconds"], 1.5)
+        self.assertEqual(
+            (metrics["rows"], metrics["bytes"], metrics["retries"]), (15, 100, 2)
+        )
+        self.assertEqual(metrics["errors"], 0)
+
+    def test_histogram_buckets(self):
+        """Test that timings fall in the first bucket whose bound they do not exceed."""
+        for seconds in [0.001, 0.003, 0.003, 100.0]:
+            record("stage", seconds)
+        buckets = instrumentation.snapshot()["stage"]["buckets"]
+        self.assertEqual(len(buckets), len(BUCKETS) + 1)
+        self.assertEqual(buckets[0], 1)
+        self.assertEqual(buckets[BUCKETS.index(0.005)], 2)
+        self.assertEqual(buckets[-1], 1)
+        self.assertEqual(sum(buckets), 4)
+
+    def test_errors(self):
+        """Test that raised and flagged failures are both counted as errors."""
+        with self.assertRaises(RuntimeError):
+            with stage("load"):
+                raise RuntimeError
+        with stage("load") as metrics:
+            metrics.error = True
+        with stage("load") as metrics:
+            metrics.add(rows=3)
+        metrics = instrumentation.snapshot()["load"]
+        self.assertEqual((metrics["count"], metrics["errors"]), (3, 2))
+        self.assertEqual(metrics["rows"], 3)
+
+    def test_disabled(self):
+        """Test that nothing is recorded while metrics are disabled."""
+        instrumentation.disable()
+        with stage("load") as metrics:
+            metrics.add(rows=1)
+            metrics.error = True
+        self.assertFalse(metrics.error)
+        instrument("decorated")(len)([1, 2])
+        self.assertEqual(instrumentation.snapshot(), {})
+
+    def test_instrument(self):
+        """Test that decorated calls are timed with len() of their result as rows."""
+        double = instrument("double")(lambda items: items * 2)
+        double([1, 2])
+        double([3])
+        metrics = instrumentation.snapshot()["double"]
+        self.assertEqual((metrics["count"], metrics["rows"]), (2, 6))
+
+    def test_to_prometheus(self):
+        """Test the text exposition: cumulative buckets, sum, count and counters."""
+        record("fetch", 0.003, rows=10)
+        record("fetch", 100.0, error=True)
+        lines = instrumentation.to_prometheus(prefix="fg").splitlines()
+        self.assertIn("# TYPE fg_stage_seconds histogram", lines)
+        self.assertIn('fg_stage_seconds_bucket{stage="fetch",le="0.001"} 0', lines)
+        self.assertIn('fg_stage_seconds_bucket{stage="fetch",le="0.005"} 1', lines)
+        self.assertIn('fg_stage_seconds_bucket{stage="fetch",le="60.0"} 1', lines)
+        self.assertIn('fg_stage_seconds_bucket{stage="fetch",le="+Inf"} 2', lines)
+        self.assertIn('fg_stage_seconds_sum{stage="fetch"} 100.003', lines)
+        self.assertIn('fg_stage_seconds_count{stage="fetch"} 2', lines)
+        self.assertIn("# TYPE fg_stage_rows_total counter", lines)
+        self.assertIn('fg_stage_rows_total{stage="fetch"} 10', lines)
+        self.assertIn('fg_stage_errors_total{stage="fetch"} 1', lines)
+
+    def test_to_json(self):
+        """Test that the JSON dump holds the bucket bounds and every stage."""
+        record("fetch", 0.2)
+        payload = json.loads(instrumentation.to_json())
+        self.assertEqual(payload["buckets"][-1], "+Inf")
+        self.assertEqual(payload["stages"]["fetch"]["count"], 1)
+
+
+class TestFetcherErrors(unittest.TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_failed_page(self):
+        """Test that a page failing after its retry is counted as an error."""
+        with ReplayServer(config=ReplayConfig(error_rate=1.0)) as server:
+            with mock.patch.object(
+                data_fetchers, "base_url", server.base_url
+            ), mock.patch.object(data_fetchers, "sleep", lambda s: None):
+                page = data_fetchers.get_historical_perps_page(
+                    "binance", "BTCUSDT", "2024-01-01", "2024-01-02", "1h"
+                )
+        self.assertIsNone(page)
+        metrics = instrumentation.snapshot()["api_page_fetch"]
+        self.assertEqual((metrics["count"], metrics["errors"]), (1, 1))
+        self.assertEqual(metrics["retries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils import kernels
+
+
+class TestKernels(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        values = 60000 + rng.normal(size=2000).cumsum() * 50
+        values[rng.integers(0, 2000, 40)] = np.nan
+        values[100:103] = values[99]  # ties
+        self.series = pd.Series(values)
+        self.window = 50
+
+    def engines(self):
+        return ["numpy", "numba"] if kernels.HAS_NUMBA else ["numpy"]
+
+    def test_rolling_zscore(self):
+        """Test rolling z-scores against pandas rolling mean and std."""
+        rolling = self.series.rolling(self.window, min_periods=10)
+        expected = (self.series - rolling.mean()) / rolling.std()
+        for engine in self.engines():
+            result = kernels.rolling_zscore(self.series, self.window, 10, engine)
+            pd.testing.assert_series_equal(result, expected, rtol=1e-6)
+
+    def test_rolling_winsorize(self):
+        """Test that values are clamped within the rolling bands."""
+        rolling = self.series.rolling(self.window)
+        mean, std = rolling.mean(), rolling.std()
+        expected = self.series.clip(mean - 1.5 * std, mean + 1.5 * std)
+        expected = expected.where(std.notna(), self.series)
+        for engine in self.engines():
+            result = kernels.rolling_winsorize(
+                self.series, self.window, 1.5, engine=engine
+            )
+            pd.testing.assert_series_equal(result, expected, rtol=1e-6)
+
+    def test_ewma(self):
+        """Test the EWMA against pandas ewm(adjust=False, ignore_na=True)."""
+        expected = self.series.ewm(span=20, adjust=False, ignore_na=True).mean()
+        for engine in self.engines():
+            result = kernels.ewma(self.series, span=20, engine=engine)
+            pd.testing.assert_series_equal(result, expected, rtol=1e-9)
+
+    def test_rolling_percentile_rank(self):
+        """Test percentile ranks against pandas rolling rank."""
+        expected = self.series.rolling(self.window, min_periods=5).rank(pct=True)
+        expected[self.series.isna()] = np.nan
+        for engine in self.engines():
+            result = kernels.rolling_percentile_rank(
+                self.series, self.window, 5, engine
+            )
+            pd.testing.assert_series_equal(result, expected, rtol=1e-12)
+
+    def test_engines_agree(self):
+        """Test that the numba kernels match the NumPy references on arrays."""
+        if not kernels.HAS_NUMBA:
+            self.skipTest("numba is not installed")
+        values = self.series.to_numpy()
+        for func, args in [
+            (kernels.rolling_zscore, (self.window,)),
+            (kernels.rolling_winsorize, (self.window, 2.0)),
+            (kernels.rolling_percentile_rank, (self.window,)),
+        ]:
+            np.testing.assert_allclose(
+                func(values, *args, engine="numba"),
+                func(values, *args, engine="numpy"),
+                rtol=1e-6,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+import mongomock
+from pymongo.errors import AutoReconnect, ServerSelectionTimeoutError
+from src.services import live_feed
+from src.services.live_feed import LiveFeed
+
+
+class _Stream:
+    """Fake change stream: runs a script of try_next outcomes."""
+
+    def __init__(self, script, token):
+        self.script = list(script)
+        self.token = token
+        self.resume_token = None
+        self.alive = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def try_next(self):
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        # The post-batch resume token of the server
+        self.resume_token = self.token
+        if callable(outcome):
+            return outcome(self)
+        return outcome
+
+
+class TestLiveFeedBuffer(unittest.TestCase):
+    def test_offsets(self):
+        """Test that incremental reads return every document once."""
+        feed = LiveFeed(transforms={})
+        feed._publish("futures", [{"v": 0}, {"v": 1}])
+        items, offset = feed.read()
+        self.assertEqual([item["v"] for item in items], [0, 1])
+        self.assertEqual(offset, 2)
+        self.assertEqual(items[0]["collection"], "futures")
+
+        feed._publish("perpetuals", [{"v": 2}])
+        items, offset = feed.read(offset)
+        self.assertEqual(
+            [(i["v"], i["collection"]) for i in items], [(2, "perpetuals")]
+        )
+        self.assertEqual((offset, feed.offset), (3, 3))
+        self.assertEqual(feed.read(offset), ([], 3))
+
+    def test_eviction(self):
+        """Test that evicted offsets are skipped while offsets keep increasing."""
+        feed = LiveFeed(buffer_size=3, transforms={})
+        feed._publish("futures", [{"v": v} for v in range(5)])
+        items, offset = feed.read(0)
+        self.assertEqual([item["v"] for item in items], [2, 3, 4])
+        self.assertEqual(offset, 5)
+        items, _ = feed.read(3)
+        self.assertEqual([item["v"] for item in items], [3, 4])
+
+    def test_transforms(self):
+        """Test that documents are transformed per collection."""
+        feed = LiveFeed(transforms={"futures": lambda doc: {"x": doc["v"] * 2}})
+        feed._publish("futures", [{"v": 1}])
+        feed._publish("perpetuals", [{"v": 1}])
+        items, _ = feed.read()
+        self.assertEqual(items[0], {"x": 2, "collection": "futures"})
+        self.assertEqual(items[1], {"v": 1, "collection": "perpetuals"})
+
+    def test_read_timeout(self):
+        """Test that read returns empty once the timeout expires."""
+        self.assertEqual(LiveFeed(transforms={}).read(0, timeout=0.01), ([], 0))
+
+
+class TestLiveFeedFollowers(unittest.TestCase):
+    def test_follower_error(self):
+        """Test that the error of a follower thread is raised by read and stop."""
+        error = ServerSelectionTimeoutError("no server")
+        with mock.patch.object(live_feed, "get_client", side_effect=error):
+            feed = LiveFeed(transforms={}).start()
+            with self.assertRaises(ServerSelectionTimeoutError):
+                feed.read(0, timeout=5)
+            with self.assertRaises(ServerSelectionTimeoutError):
+                feed.stop(timeout=5)
+
+    def test_resume_before_first_event(self):
+        """Test that an interrupted stream resumes from its last empty batch."""
+        feed = LiveFeed(transforms={}, poll_interval=0.01)
+        collection = mock.Mock()
+
+        def publish_and_stop(stream):
+            feed._stop.set()
+            return {"fullDocument": {"v": 1}}
+
+        collection.watch.side_effect = [
+            _Stream([None, AutoReconnect("interrupted")], "token-1"),
+            _Stream([publish_and_stop], "token-2"),
+        ]
+        feed._watch("futures", collection)
+
+        resume_after = [
+            c.kwargs["resume_after"] for c in collection.watch.call_args_list
+        ]
+        self.assertEqual(resume_after, [None, "token-1"])
+        items, _ = feed.read()
+        self.assertEqual([item["v"] for item in items], [1])
+
+
+class TestLiveFeedPolling(unittest.TestCase):
+    def test_date_watermark_within_date(self):
+        """Test that date polling sends every document of a date split by a batch."""
+        collection = mongomock.MongoClient()["laevitas"]["futures"]
+        dates = [datetime(2024, 1, 1), datetime(2024, 1, 2)]
+        collection.insert_many(
+            [{"date": date, "contract": c} for date in dates for c in range(3)]
+        )
+        feed = LiveFeed(watermark="date", batch_size=4, transforms={})
+
+        seen, high = [], None
+        for _ in range(3):
+            documents, high = feed._poll_batch(collection, {}, high)
+            seen += [(doc["date"], doc["contract"]) for doc in documents]
+        self.assertEqual(seen, [(date, c) for date in dates for c in range(3)])
+
+        # A late document on the high date and a later date are both sent
+        collection.insert_many(
+            [{"date": dates[1], "contract": 3}, {"date": datetime(2024, 1, 3)}]
+        )
+        documents, _ = feed._poll_batch(collection, {}, high)
+        self.assertEqual(
+            [(doc["date"], doc.get("contract")) for doc in documents],
+            [(dates[1], 3), (datetime(2024, 1, 3), None)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import pickle
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+import pandas as pd
+from src.marketdata import loader
+from src.marketdata.loader import PendingLoad
+from src.marketdata.perpetuals_data import PerpetualsData
+
+
+def fake_perps(currency, start, end, granularity, **kwargs):
+    """Hourly rows of one instrument between start and end, like the API."""
+    dates = pd.date_range(start, end, freq="1h")
+    return pd.DataFrame(
+        {
+            "date": dates,
+            "market": "binance",
+            "symbol": f"{currency}USDT",
+            "price": 100.0,
+            "basis": 0.0,
+            "funding": 0.0,
+            "volume": 1.0,
+            "open_interest": 1.0,
+            "long_short_ratio": 1.0,
+        }
+    )
+
+
+class _BusyPool:
+    """A single-worker pool held busy until released, so submissions wait queued."""
+
+    def __enter__(self):
+        self.gate = threading.Event()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.executor.submit(self.gate.wait)
+        self.patch = mock.patch.object(
+            loader, "get_executor", return_value=self.executor
+        )
+        self.patch.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.patch.stop()
+        self.gate.set()
+        self.executor.shutdown()
+
+
+class TestPendingLoad(unittest.TestCase):
+    def test_lazy(self):
+        """Test that a lazy call runs once, on the first result()."""
+        fn = mock.Mock(return_value=42)
+        pending = PendingLoad(fn, 1, 2)
+        fn.assert_not_called()
+        self.assertFalse(pending.done)
+        self.assertEqual(pending.result(), 42)
+        self.assertEqual(pending.result(), 42)
+        fn.assert_called_once_with(1, 2)
+        self.assertTrue(pending.done)
+
+    def test_prefetch(self):
+        """Test that a prefetch runs in the background before result() is called."""
+        started = threading.Event()
+
+        def fetch():
+            started.set()
+            return "data"
+
+        pending = PendingLoad(fetch, prefetch=True)
+        self.assertTrue(started.wait(5))
+        self.assertEqual(pending.result(), "data")
+
+    def test_cancel_then_result(self):
+        """Test that a cancelled queued prefetch runs in the caller on result()."""
+        fn = mock.Mock(return_value="data")
+        with _BusyPool():
+            pending = PendingLoad(fn, prefetch=True)
+            pending.cancel()
+            self.assertFalse(pending.done)
+            self.assertEqual(pending.result(), "data")
+        fn.assert_called_once_with()
+
+    def test_pickle(self):
+        """Test that pickling waits for the result and keeps only the result."""
+        pending = PendingLoad(lambda: [1, 2, 3])
+        restored = pickle.loads(pickle.dumps(pending))
+        self.assertTrue(restored.done)
+        self.assertEqual(restored.result(), [1, 2, 3])
+
+
+@mock.patch(
+    "src.marketdata.perpetuals_data.get_historical_all_perps", side_effect=fake_perps
+)
+class TestLazyPerpetuals(unittest.TestCase):
+    def test_lazy(self, fetch):
+        """Test that a lazy object fetches on the first access to historical_data."""
+        perps = PerpetualsData("BTC", "2024-01-01", "2024-01-02", "1h", lazy=True)
+        fetch.assert_not_called()
+        self.assertFalse(perps.loaded)
+        self.assertEqual(len(perps.historical_data), 25)
+        self.assertTrue(perps.loaded)
+        fetch.assert_called_once_with(
+            "BTC", "2024-01-01", "2024-01-02", "1h", dedupe=False
+        )
+
+    def test_prefetch(self, fetch):
+        """Test that a prefetched object gives the same data as an eager one."""
+        eager = PerpetualsData("BTC", "2024-01-01", "2024-01-02", "1h")
+        perps = PerpetualsData("BTC", "2024-01-01", "2024-01-02", "1h", prefetch=True)
+        pd.testing.assert_frame_equal(perps.historical_data, eager.historical_data)
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_cancel_then_refetch(self, fetch):
+        """Test that changing the range of a pending object fetches the new range."""
+        with _BusyPool() as pool:
+            perps = PerpetualsData(
+                "BTC", "2024-01-01", "2024-01-03", "1h", prefetch=True
+            )
+            perps.start = "2024-01-02"
+            # The first prefetch was cancelled in the queue, the new one runs
+            pool.gate.set()
+            data = perps.historical_data
+        fetch.assert_called_once_with(
+            "BTC", "2024-01-02", "2024-01-03", "1h", dedupe=False
+        )
+        self.assertEqual(data.index[0], pd.Timestamp("2024-01-02"))
+        self.assertEqual(len(data), 25)
+
+    def test_superseded_running_prefetch(self, fetch):
+        """Test that a running prefetch finishing after a newer load changes nothing."""
+        running, release = threading.Event(), threading.Event()
+
+        def slow_first(currency, start, end, granularity, **kwargs):
+            if start == "2024-01-01":
+                running.set()
+                release.wait(5)
+            return fake_perps(currency, start, end, granularity)
+
+        fetch.side_effect = slow_first
+        perps = PerpetualsData("BTC", "2024-01-01", "2024-01-03", "1h", prefetch=True)
+        self.assertTrue(running.wait(5))
+        stale = perps._PerpetualsData__pending
+        perps.start = "2024-01-02"
+        data = perps.historical_data
+        validation = perps.validation
+
+        release.set()
+        stale.result()
+        self.assertIs(perps.validation, validation)
+        self.assertEqual(len(perps.validation.masks), len(data))
+        self.assertEqual(len(perps.historical_data), 25)
+
+    def test_pickle_pending(self, fetch):
+        """Test that a pending object is pickled with its fetched data."""
+        perps = PerpetualsData("BTC", "2024-01-01", "2024-01-02", "1h", lazy=True)
+        restored = pickle.loads(pickle.dumps(perps))
+        fetch.assert_called_once()
+        self.assertTrue(restored.loaded)
+        pd.testing.assert_frame_equal(restored.historical_data, perps.historical_data)
+        self.assertEqual(fetch.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import logging
+import os
+import tempfile
+import unittest
+from logging.handlers import QueueHandler
+import yaml
+from src.utils import logging_setup
+from src.utils.logging_setup import configure_logging, stop_logging
+
+
+class TestConfigureLogging(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.dir.name, "logs", "app.log")
+        self.config_path = os.path.join(self.dir.name, "config.yml")
+        config = {
+            "logging": {
+                "level": "INFO",
+                "log_file": self.log_file,
+                "loggers": {"test_quiet_logger": "ERROR"},
+            }
+        }
+        with open(self.config_path, "w") as file:
+            yaml.safe_dump(config, file)
+        root = logging.getLogger()
+        self.addCleanup(root.setLevel, root.level)
+        self.addCleanup(self.dir.cleanup)
+        self.addCleanup(stop_logging)
+
+    def queue_handlers(self):
+        return [h for h in logging.getLogger().handlers if isinstance(h, QueueHandler)]
+
+    def test_import_configures_nothing(self):
+        """Test that importing the package installs no handler."""
+        self.assertIsNone(logging_setup._listener)
+        self.assertEqual(self.queue_handlers(), [])
+
+    def test_installed_once(self):
+        """Test that a second call returns the running listener without a new handler."""
+        listener = configure_logging(self.config_path)
+        self.assertIs(configure_logging(self.config_path), listener)
+        self.assertEqual(len(self.queue_handlers()), 1)
+        stop_logging()
+        self.assertEqual(self.queue_handlers(), [])
+
+    def test_records_reach_file(self):
+        """Test that records go through the queue listener to the configured file."""
+        configure_logging(self.config_path)
+        logging.getLogger("test_logger").info("fetched %d pages", 3)
+        logging.getLogger("test_logger").debug("below the root level")
+        logging.getLogger("test_quiet_logger").warning("below its own level")
+        stop_logging()  # flushes the queue
+
+        with open(self.log_file) as file:
+            lines = file.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].endswith("test_logger - INFO - fetched 3 pages"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,268 @@
+import unittest
+from unittest import mock
+import bson
+import mongomock
+import numpy as np
+import pandas as pd
+from src.services import mongodb_service
+from src.services.mongodb_service import (
+    FUTURES_FIELDS,
+    POINT_FIELDS,
+    _decode,
+    get_data,
+    save_perpetuals,
+    transform_data,
+)
+
+
+def encode_batches(documents, batch_size):
+    """Raw BSON batches of documents, as returned by the *_raw_batches reads."""
+    documents = list(documents)
+    return [
+        b"".join(bson.encode(doc) for doc in documents[lo : lo + batch_size])
+        for lo in range(0, len(documents), batch_size)
+    ]
+
+
+class _RawCursor:
+    """A mongomock cursor iterated as raw BSON batches."""
+
+    def __init__(self, cursor, batch_size):
+        self.cursor = cursor
+        self.batch_size = batch_size
+
+    def sort(self, *args):
+        self.cursor = self.cursor.sort(*args)
+        return self
+
+    def limit(self, limit):
+        self.cursor = self.cursor.limit(limit)
+        return self
+
+    def __iter__(self):
+        return iter(encode_batches(self.cursor, self.batch_size))
+
+
+class RawCollection:
+    """A mongomock collection with the raw-batch reads of pymongo."""
+
+    def __init__(self, collection, batch_size=3):
+        self.collection = collection
+        self.batch_size = batch_size
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+    def find_raw_batches(self, *args, **kwargs):
+        return _RawCursor(self.collection.find(*args, **kwargs), self.batch_size)
+
+    def aggregate_raw_batches(self, pipeline, **kwargs):
+        return encode_batches(self.collection.aggregate(pipeline), self.batch_size)
+
+
+class MongoTestCase(unittest.TestCase):
+    """Runs get_data and save_perpetuals against an in-memory `laevitas` database."""
+
+    def setUp(self):
+        db = mongomock.MongoClient()["laevitas"]
+        self.client = {
+            "laevitas": {
+                name: RawCollection(db[name])
+                for name in ["futures", "options", "perpetuals"]
+            }
+        }
+        patch = mock.patch.object(
+            mongodb_service, "get_client", return_value=self.client
+        )
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.addCleanup(setattr, mongodb_service, "_perpetuals_indexed", None)
+
+
+def perps_frame(symbol="BTCUSDT", price=100.0):
+    dates = pd.date_range("2024-01-01", periods=4, freq="1h")
+    return pd.DataFrame(
+        {
+            "date": np.repeat(dates, 2),
+            "market": ["binance", "bybit"] * 4,
+            "symbol": symbol,
+            "price": price,
+            "basis": 0.01,
+            "funding": [0.0001, np.nan] * 4,
+            "volume": 1.0,
+            "open_interest": 2.0,
+            "long_short_ratio": 1.5,
+        }
+    )
+
+
+class TestSavePerpetuals(MongoTestCase):
+    def test_round_trip(self):
+        """Test that saved rows are read back unchanged, with NaN stored as null."""
+        df = perps_frame()
+        self.assertEqual(save_perpetuals(df, "BTC", batch_size=3), len(df))
+        read = get_data("BTC", "perpetuals", as_frame=True)
+        pd.testing.assert_frame_equal(read, df, check_dtype=False)
+        stored = self.client["laevitas"]["perpetuals"].find_one({"market": "bybit"})
+        self.assertIsNone(stored["funding"])
+        self.assertEqual(stored["currency"], "BTC")
+
+    def test_idempotent(self):
+        """Test that re-saving rows writes nothing and changed rows are updated."""
+        df = perps_frame()
+        save_perpetuals(df, "BTC")
+        self.assertEqual(save_perpetuals(df, "BTC"), 0)
+        collection = self.client["laevitas"]["perpetuals"]
+        self.assertEqual(collection.count_documents({}), len(df))
+
+        self.assertEqual(save_perpetuals(perps_frame(price=101.0), "BTC"), len(df))
+        self.assertEqual(collection.count_documents({}), len(df))
+        read = get_data("BTC", "perpetuals", as_frame=True)
+        self.assertTrue((read["price"] == 101.0).all())
+
+    def test_index_created_once(self):
+        """Test that the unique key index is created on the first save only."""
+        collection = self.client["laevitas"]["perpetuals"]
+        with mock.patch.object(
+            collection, "create_index", wraps=collection.collection.create_index
+        ) as create_index:
+            save_perpetuals(perps_frame(), "BTC")
+            save_perpetuals(perps_frame(), "BTC")
+        create_index.assert_called_once()
+        unique = [
+            index["key"]
+            for index in collection.index_information().values()
+            if index.get("unique")
+        ]
+        self.assertEqual(unique, [[("date", 1), ("market", 1), ("symbol", 1)]])
+
+    def test_currency_matched_exactly(self):
+        """Test that a coin does not match currencies merely containing it."""
+        save_perpetuals(perps_frame(), "BTC")
+        save_perpetuals(perps_frame(symbol="WBTCUSDT"), "WBTC")
+        read = get_data("btc", "perpetuals", as_frame=True)
+        self.assertEqual(set(read["symbol"]), {"BTCUSDT"})
+        both = get_data(["BTC", "WBTC"], "perpetuals", as_frame=True)
+        self.assertEqual(len(both), 16)
+        self.assertEqual(set(both["currency"]), {"BTC", "WBTC"})
+
+
+class TestBucketedFutures(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        rng = np.random.default_rng(0)
+        # Irregular snapshots, several per bucket with some buckets empty
+        offsets = np.sort(rng.choice(24 * 60, size=120, replace=False))
+        self.snapshots = pd.DataFrame(
+            {
+                "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(offsets, "min"),
+                "price": rng.normal(100, 1, 120),
+                "open_interest": rng.uniform(1, 2, 120),
+                "volume": rng.uniform(0, 5, 120),
+                "basis": rng.normal(0, 0.01, 120),
+                "yield": rng.normal(0, 0.1, 120),
+            }
+        )
+        documents = [
+            {
+                "date": row["date"].to_pydatetime(),
+                "currency": currency,
+                "points": {"0": {key: row[f] for f, key in POINT_FIELDS.items()}},
+            }
+            for currency in ["BTC", "ETH"]
+            for row in self.snapshots.to_dict("records")
+        ]
+        self.client["laevitas"]["futures"].insert_many(documents)
+
+    def test_buckets_match_resample(self):
+        """Test that each bucket holds the first snapshot like a pandas resample."""
+        for granularity, rule in [("5m", "5min"), ("1h", "1h"), ("4h", "4h")]:
+            with self.subTest(granularity=granularity):
+                df = get_data(
+                    "BTC",
+                    "futures",
+                    "2024-01-01",
+                    "2024-01-02",
+                    granularity=granularity,
+                    as_frame=True,
+                )
+                expected = (
+                    self.snapshots.set_index("date").resample(rule).first().dropna()
+                )
+                self.assertEqual(list(df["date"]), list(expected.index))
+                self.assertTrue((df["currency"] == "BTC").all())
+                pd.testing.assert_frame_equal(
+                    df.set_index("date")[expected.columns],
+                    expected,
+                    check_dtype=False,
+                    check_freq=False,
+                )
+
+    def test_currencies_sorted_per_bucket(self):
+        """Test that several currencies give one row each per bucket, by date."""
+        df = get_data(["BTC", "ETH"], "futures", granularity="1h", as_frame=True)
+        buckets = self.snapshots["date"].dt.floor("1h").nunique()
+        self.assertEqual(len(df), 2 * buckets)
+        self.assertTrue(df["date"].is_monotonic_increasing)
+        self.assertEqual(list(df["currency"][:2]), ["BTC", "ETH"])
+        self.assertFalse(df.duplicated(["date", "currency"]).any())
+
+
+class TestDecode(MongoTestCase):
+    def setUp(self):
+        super().setUp()
+        dates = pd.date_range("2024-01-01", periods=6, freq="1D")
+        points = [
+            {"p": 100.0, "oi": 1.0, "v": 5.0, "b": 0.01, "y": 0.1},
+            {"p": 101.0, "oi": 1.5, "v": 4.0, "b": 0.02},  # no yield
+            {"p": 102.0, "oi": 2.0},  # no volume, basis or yield
+            {"p": 103.0, "oi": 2.5, "v": 3.0, "b": 0.03, "y": 0.3},
+            {},
+            {"p": 105.0, "oi": 3.5, "v": 1.0, "b": 0.05, "y": 0.5},
+        ]
+        self.collection = self.client["laevitas"]["futures"]
+        self.collection.insert_many(
+            [
+                {"date": d.to_pydatetime(), "currency": "BTC", "points": {"0": p}}
+                for d, p in zip(dates, points)
+            ]
+        )
+
+    def cursor_frame(self):
+        """The rows of the plain cursor path: find() and transform_data per document."""
+        query = {"currency": "BTC", "$expr": {"$eq": [{"$hour": "$date"}, 0]}}
+        return pd.DataFrame(
+            [transform_data(doc) for doc in self.collection.find(query)],
+            columns=FUTURES_FIELDS,
+        )
+
+    def test_matches_cursor_path(self):
+        """Test that decoded raw batches give the frame of the cursor path."""
+        expected = self.cursor_frame()
+        for batch_size in [1, 2, 10]:
+            with self.subTest(batch_size=batch_size):
+                self.collection.batch_size = batch_size
+                df = get_data("BTC", "futures", as_frame=True)
+                pd.testing.assert_frame_equal(df, expected)
+                self.assertEqual(df["date"].dtype, "datetime64[ns]")
+                self.assertEqual(
+                    list(df["yield"].isna()), [False, True, True, False, True, False]
+                )
+
+    def test_documents(self):
+        """Test that without as_frame the decoded documents are the flat rows."""
+        documents = get_data("BTC", "futures")
+        self.assertEqual(
+            [doc["date"] for doc in documents], list(self.cursor_frame()["date"])
+        )
+        self.assertNotIn("volume", documents[2])
+
+    def test_empty(self):
+        """Test that no batch gives an empty frame with the requested columns."""
+        df = _decode(iter([]), FUTURES_FIELDS, as_frame=True)
+        self.assertTrue(df.empty)
+        self.assertEqual(list(df.columns), FUTURES_FIELDS)
+
+
+if __name__ == "__main__":
+    unittest.main()
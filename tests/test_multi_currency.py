@@ -0,0 +1,115 @@
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.marketdata import MultiCurrencyData
+from src.utils import process_futures, rolling_percentile_rank
+
+
+def futures_snapshots(coins, start, end):
+    """Raw futures documents of two contracts per coin, as get_data returns them."""
+    rng = np.random.default_rng(0)
+    dates = pd.date_range(start, end, freq="D")
+    frames = []
+    for coin in coins:
+        for contract in (f"{coin.lower()}-31mar23", f"{coin.lower()}-30jun23"):
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "date": dates,
+                        "currency": contract,
+                        "price": rng.uniform(1e3, 3e4, len(dates)),
+                        "open_interest": rng.uniform(1.4e8, 1.6e8, len(dates)),
+                        "volume": rng.uniform(1e6, 2e6, len(dates)),
+                        "basis": rng.normal(0.01, 0.002, len(dates)),
+                    }
+                )
+            )
+    return pd.concat(frames, ignore_index=True)
+
+
+class TestMultiCurrencyData(unittest.TestCase):
+    def setUp(self):
+        self.snapshots = futures_snapshots(["BTC", "ETH"], "2023-01-01", "2023-02-28")
+        patch = mock.patch(
+            "src.marketdata.multi_currency.get_data",
+            return_value=self.snapshots.copy(),
+        )
+        self.get_data = patch.start()
+        self.addCleanup(patch.stop)
+        self.data = MultiCurrencyData(["BTC", "ETH"], "2023-01-01", "2023-02-28")
+
+    def test_single_query_matches_per_currency(self):
+        """Test that stacked processing equals processing each currency alone."""
+        self.get_data.assert_called_once()
+        self.assertEqual(self.get_data.call_args.args[0], ["BTC", "ETH"])
+        self.assertTrue(self.data.validation.ok)
+
+        for coin in ["BTC", "ETH"]:
+            alone = process_futures(
+                self.snapshots[self.snapshots["currency"].str.startswith(coin.lower())]
+            )
+            stacked = self.data.xs(coin)
+            np.testing.assert_allclose(
+                stacked[alone.columns].to_numpy(), alone.to_numpy()
+            )
+
+        array = self.data.to_array(["price", "annualized_basis"])
+        self.assertEqual(array.shape, (59, 2, 2))
+        np.testing.assert_allclose(
+            array[:, 1, 0], self.data.xs("ETH")["price"].to_numpy()
+        )
+
+    def test_cleaning_and_normalization(self):
+        """Test that grouped cleaning and normalization act per currency."""
+        normalized = self.data.normalize("z_score")
+        means = normalized.groupby("currency")["price"].mean()
+        np.testing.assert_allclose(means, 0, atol=1e-12)
+
+        ranks = self.data.normalize("percentile_rank", window=10)
+        self.assertTrue(ranks["volume"].dropna().between(0, 1).all())
+        is_eth = ranks["currency"].to_numpy() == "ETH"
+        np.testing.assert_allclose(
+            ranks.loc[is_eth, "volume"].to_numpy(),
+            rolling_percentile_rank(self.data.xs("ETH")["volume"], 10).to_numpy(),
+        )
+
+        eth = self.data.xs("ETH")["price"].copy()
+        self.data.z_score_cleaning(threshold=1.0)
+        cleaned = self.data.xs("ETH")["price"]
+        bound = eth.mean() + eth.std()
+        self.assertAlmostEqual(cleaned.max(), min(bound, eth.max()))
+
+
+class TestMultiCurrencyEmpty(unittest.TestCase):
+    @mock.patch("src.marketdata.multi_currency.get_data", return_value=pd.DataFrame())
+    def test_no_data(self, get_data):
+        """Test that currencies without any data give an empty, usable frame."""
+        for type in ["perpetual", "futures"]:
+            data = MultiCurrencyData(
+                ["BTC", "ETH"], "2023-01-01", "2023-01-02", type=type
+            )
+            self.assertTrue(data.xs("BTC").empty)
+            self.assertTrue(data.aligned().empty)
+            self.assertIn("currency", data.historical_data.columns)
+
+    @mock.patch(
+        "src.marketdata.multi_currency.get_historical_all_perps",
+        return_value=pd.DataFrame(),
+    )
+    @mock.patch(
+        "src.marketdata.multi_currency.get_instruments_data",
+        return_value=pd.DataFrame(columns=["currency", "market", "instrument"]),
+    )
+    def test_no_data_from_api(self, get_instruments_data, get_historical_all_perps):
+        """Test that perpetuals fetched from the API without any data stay usable."""
+        data = MultiCurrencyData(
+            ["BTC", "ETH"], "2023-01-01", "2023-01-02", "perpetual", "1h", "api"
+        )
+        self.assertEqual(get_historical_all_perps.call_count, 2)
+        self.assertTrue(data.xs("ETH").empty)
+        self.assertTrue(data.aligned(["price"]).empty)
+
+
+if __name__ == "__main__":
+    unittest.main()
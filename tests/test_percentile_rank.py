@@ -0,0 +1,39 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils import RollingPercentileRank, percentile_rank_normalize
+
+
+class TestPercentileRank(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        # Rounded so windows contain ties
+        funding = rng.normal(size=1000).round(1)
+        funding[[10, 500, 501]] = np.nan
+        self.df = pd.DataFrame(
+            {"funding": funding, "market": "binance"},
+            index=pd.date_range("2024-01-01", periods=1000, freq="h"),
+        )
+        self.window = 48
+
+    def test_percentile_rank_normalize(self):
+        """Test the batch normalizer against pandas rolling rank."""
+        series = self.df["funding"]
+        expected = series.rolling(self.window, min_periods=10).rank(pct=True)
+        expected[series.isna()] = np.nan
+
+        result = percentile_rank_normalize(self.df.copy(), self.window, 10)
+        pd.testing.assert_series_equal(result["funding"], expected)
+        self.assertTrue((result["market"] == "binance").all())
+
+    def test_live_matches_batch(self):
+        """Test that updating bar by bar gives the batch ranks."""
+        expected = percentile_rank_normalize(self.df.copy(), self.window, 10)
+        live = RollingPercentileRank(self.window, 10)
+        ranks = live.update_many(self.df["funding"].iloc[:600])
+        ranks = np.append(ranks, [live.update(v) for v in self.df["funding"][600:]])
+        np.testing.assert_allclose(ranks, expected["funding"].to_numpy(), rtol=1e-12)
+
+
+if __name__ == "__main__":
+    unittest.main()
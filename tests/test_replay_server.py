@@ -0,0 +1,79 @@
+import threading
+import unittest
+from unittest import mock
+from benchmarks.replay_server import ReplayConfig, ReplayServer
+from benchmarks.synthetic import perps_items, perps_pages
+from src.utils import data_fetchers
+
+
+class TestReplayServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ReplayServer().start()
+        cls.patches = [
+            mock.patch.object(data_fetchers, "base_url", cls.server.base_url),
+            mock.patch.object(data_fetchers, "sleep", lambda s: None),
+        ]
+        for patch in cls.patches:
+            patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        for patch in cls.patches:
+            patch.stop()
+        cls.server.stop()
+
+    def test_page_meta(self):
+        """Test that page meta counts the items of the page like perps_pages."""
+        expected = perps_pages(perps_items(49, "2024-01-01", "1h"), limit=20)
+        for page in [1, 3]:
+            response = data_fetchers.get_historical_perps_page(
+                "BINANCE", "BTCUSDT", "2024-01-01", "2024-01-03", "1h", 20, page
+            )
+            self.assertEqual(response["meta"], expected[page - 1]["meta"])
+            self.assertEqual(response["meta"]["items"], len(response["items"]))
+        self.assertEqual(response["meta"]["items"], 9)
+
+    def test_futures_items(self):
+        """Test that the futures endpoint serves futures-shaped items on every page."""
+        df = data_fetchers.get_historical_futures(
+            "DERIBIT", "BTC-29MAR24", "2024-01-01", "2024-01-03", "1h", limit=20
+        )
+        self.assertEqual(len(df), 49)
+        self.assertTrue({"price", "basis", "yield", "open_interest"} <= set(df))
+        self.assertNotIn("funding", df)
+
+    def test_options_items(self):
+        """Test that the options endpoint serves options-shaped items."""
+        df = data_fetchers.get_historical_options(
+            "DERIBIT", "BTC-29MAR24-50000-C", "2024-01-01", "2024-01-03", "1h", 20
+        )
+        self.assertEqual(len(df), 49)
+        self.assertTrue({"mark_price", "mark_iv", "underlying_price"} <= set(df))
+        self.assertNotIn("funding", df)
+
+
+class TestReplayConfig(unittest.TestCase):
+    def test_concurrent_draws(self):
+        """Test that draws from concurrent handler threads are those of a serial run."""
+        serial = ReplayConfig(jitter_ms=10, error_rate=0.5, seed=1)
+        expected = sorted(serial.draw() for _ in range(8 * 500))
+
+        config = ReplayConfig(jitter_ms=10, error_rate=0.5, seed=1)
+        draws, lock = [], threading.Lock()
+
+        def handler():
+            local = [config.draw() for _ in range(500)]
+            with lock:
+                draws.extend(local)
+
+        threads = [threading.Thread(target=handler) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(draws), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
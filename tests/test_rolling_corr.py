@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils import corr_heatmap, rolling_corr, RollingCorrelation
+
+
+class TestRollingCorr(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.window = 50
+        self.data = pd.DataFrame(
+            rng.normal(size=(400, 3)).cumsum(axis=0) + 60000, columns=["a", "b", "c"]
+        )
+        self.data.iloc[rng.integers(0, 400, 20), 1] = np.nan
+
+    def test_matches_pandas(self):
+        """Test that the running-sum engine matches pandas rolling correlations."""
+        result = rolling_corr(self.data, self.window)
+        expected = self.data.rolling(self.window).corr()
+        self.assertEqual(result.shape, (400, 3, 3))
+        for t in [self.window - 1, 200, 399]:
+            np.testing.assert_allclose(
+                result[t], expected.loc[t].to_numpy(), atol=1e-6, equal_nan=True
+            )
+
+    def test_min_periods(self):
+        """Test that windows with too few observations are NaN."""
+        result = rolling_corr(self.data, self.window)
+        self.assertTrue(np.isnan(result[: self.window - 1]).all())
+
+    def test_column_blocks(self):
+        """Test that running sums computed per column block give the same matrices."""
+        whole = rolling_corr(self.data, self.window)
+        blocked = rolling_corr(self.data, self.window, block_size=2)
+        np.testing.assert_allclose(blocked, whole, atol=1e-12, equal_nan=True)
+        for t in [self.window - 1, 399]:
+            np.testing.assert_allclose(blocked[t], blocked[t].T, equal_nan=True)
+
+    def test_heatmap_timestamp_before_data(self):
+        """Test that corr_heatmap rejects a timestamp before the first row."""
+        data = self.data.set_index(pd.date_range("2024-01-01", periods=400, freq="h"))
+        with self.assertRaises(ValueError):
+            corr_heatmap(data, "t", window=self.window, timestamp="2023-12-31")
+
+    def test_incremental_matches_batch(self):
+        """Test that incremental updates reproduce the batch computation."""
+        batch = rolling_corr(self.data, self.window)
+        engine = RollingCorrelation(self.data.columns, self.window)
+        for t, (_, row) in enumerate(self.data.iterrows()):
+            corr = engine.update(row)
+            if t >= self.window - 1:
+                np.testing.assert_allclose(corr, batch[t], atol=1e-8, equal_nan=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.marketdata.crypto_market_data import CryptoMarketData
+
+
+class Frame(CryptoMarketData):
+    def __init__(self, historical_data: pd.DataFrame) -> None:
+        self.historical_data = historical_data
+        super().__init__()
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.data = Frame(
+            pd.DataFrame(rng.normal(size=(1000, 2)), columns=["price", "volume"])
+        )
+
+    def test_snapshot_shares_buffers(self):
+        """Test that a snapshot shares every column until it is modified."""
+        with pd.option_context("mode.copy_on_write", True):
+            snap = self.data.snapshot()
+            report = self.data.memory_report(snap)
+        self.assertIsNot(snap.historical_data, self.data.historical_data)
+        self.assertEqual(report["shared"].sum(), report["bytes"].sum())
+
+    def test_write_copies_only_modified_column(self):
+        """Test that writing to a snapshot leaves the original untouched."""
+        with pd.option_context("mode.copy_on_write", True):
+            snap = self.data.copy()
+            first = self.data.historical_data["price"].iloc[0]
+            snap.historical_data.loc[0, "price"] = 1e6
+            report = self.data.memory_report(snap)
+
+        self.assertEqual(self.data.historical_data["price"].iloc[0], first)
+        self.assertEqual(report.loc["price", "shared"], 0)
+        self.assertEqual(report.loc["volume", "shared"], report.loc["volume", "bytes"])
+
+    def test_deep_copy_without_copy_on_write(self):
+        """Test that snapshots are deep copies unless copy-on-write is enabled."""
+        # Importing the package must not enable copy-on-write globally
+        self.assertFalse(pd.get_option("mode.copy_on_write"))
+        snap = self.data.snapshot()
+        first = self.data.historical_data["price"].iloc[0]
+        snap.historical_data.loc[0, "price"] = 1e6
+
+        report = self.data.memory_report(snap)
+        self.assertEqual(self.data.historical_data["price"].iloc[0], first)
+        self.assertEqual(report["shared"].sum(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from src.utils import (
+    adf_test,
+    batch_stationarity_tests,
+    clear_stationarity_cache,
+    kpss_test,
+)
+from src.utils import stats_tests
+
+
+class TestBatchStationarityTests(unittest.TestCase):
+    def setUp(self):
+        clear_stationarity_cache()
+        rng = np.random.default_rng(0)
+        index = pd.date_range("2023-01-01", periods=300, freq="h")
+        self.data = pd.DataFrame(
+            {
+                "funding": rng.normal(size=300),
+                "price": rng.normal(size=300).cumsum() + 100,
+                "market": "binance",
+            },
+            index=index,
+        )
+
+    def tearDown(self):
+        clear_stationarity_cache()
+
+    def test_matches_single_tests(self):
+        """Test that batch results match adf_test and kpss_test on each column."""
+        result = batch_stationarity_tests(self.data, max_workers=1)
+        self.assertEqual(len(result), 4)
+        self.assertEqual(set(result["column"]), {"funding", "price"})
+        self.assertTrue(result["error"].isna().all())
+        for column in ["funding", "price"]:
+            adf = adf_test(self.data[column], interpret=False)
+            kpss = kpss_test(self.data[column], interpret=False)
+            rows = result[result["column"] == column].set_index("test")
+            self.assertAlmostEqual(rows.loc["adf", "p_value"], adf["p-value"])
+            self.assertAlmostEqual(rows.loc["kpss", "p_value"], kpss["p-value"])
+            self.assertAlmostEqual(rows.loc["adf", "statistic"], adf["ADF Statistic"])
+
+    def test_windows(self):
+        """Test that rolling windows are split by length and step with their dates."""
+        result = batch_stationarity_tests(
+            self.data["funding"].to_frame(),
+            tests=("adf",),
+            windows=[100, 150],
+            step=50,
+            max_workers=1,
+        )
+        # 5 windows of 100 rows and 4 of 150 rows
+        self.assertEqual(result["window"].value_counts().to_dict(), {100: 5, 150: 4})
+        first = result.iloc[0]
+        self.assertEqual(first["start"], self.data.index[0])
+        self.assertEqual(first["end"], self.data.index[99])
+        last = result[result["window"] == 150].iloc[-1]
+        self.assertEqual(last["end"], self.data.index[299])
+
+    def test_constant_series(self):
+        """Test that a constant series gives a NaN row instead of failing the batch."""
+        data = self.data.assign(funding=0.0)
+        result = batch_stationarity_tests(data, tests=("adf",), max_workers=1)
+        rows = result.set_index("column")
+        self.assertTrue(np.isnan(rows.loc["funding", "p_value"]))
+        self.assertIn("constant", rows.loc["funding", "error"])
+        self.assertFalse(np.isnan(rows.loc["price", "p_value"]))
+        self.assertIsNone(rows.loc["price", "error"])
+
+    def test_cache(self):
+        """Test that identical series are tested once and reused across calls."""
+        data = {"a": self.data, "b": self.data}
+        with patch.object(stats_tests, "_run_test", wraps=stats_tests._run_test) as run:
+            first = batch_stationarity_tests(data, max_workers=1)
+            self.assertEqual(run.call_count, 4)
+            self.assertEqual(len(first), 8)
+            second = batch_stationarity_tests(data, max_workers=1)
+            self.assertEqual(run.call_count, 4)
+            batch_stationarity_tests(data, max_workers=1, use_cache=False)
+            self.assertEqual(run.call_count, 8)
+        self.assertEqual(len(stats_tests._RESULTS_CACHE), 4)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_no_cache_does_not_write(self):
+        """Test that use_cache=False neither reads nor fills the cache."""
+        result = batch_stationarity_tests(self.data, max_workers=1, use_cache=False)
+        self.assertEqual(len(stats_tests._RESULTS_CACHE), 0)
+        self.assertTrue(result["error"].isna().all())
+
+    def test_cache_lru_eviction(self):
+        """Test that the cache keeps the most recently used results only."""
+        funding = self.data[["funding"]]
+        price = self.data[["price"]]
+        with patch.object(stats_tests, "MAX_CACHED_RESULTS", 2):
+            with patch.object(
+                stats_tests, "_run_test", wraps=stats_tests._run_test
+            ) as run:
+                batch_stationarity_tests(funding, max_workers=1)
+                # Reading funding adf makes funding kpss the least recently used
+                batch_stationarity_tests(funding, tests=("adf",), max_workers=1)
+                batch_stationarity_tests(price, tests=("adf",), max_workers=1)
+                self.assertEqual(run.call_count, 3)
+                self.assertEqual(len(stats_tests._RESULTS_CACHE), 2)
+                batch_stationarity_tests(funding, tests=("adf",), max_workers=1)
+                self.assertEqual(run.call_count, 3)
+                batch_stationarity_tests(funding, tests=("kpss",), max_workers=1)
+                self.assertEqual(run.call_count, 4)
+                # Price adf was then the least recently used and was evicted
+                batch_stationarity_tests(price, tests=("adf",), max_workers=1)
+                self.assertEqual(run.call_count, 5)
+
+    def test_process_pool(self):
+        """Test that the process pool gives the same results as a serial run."""
+        serial = batch_stationarity_tests(self.data, windows=[100], max_workers=1)
+        clear_stationarity_cache()
+        parallel = batch_stationarity_tests(self.data, windows=[100], max_workers=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import asyncio
+import unittest
+from unittest import mock
+import pandas as pd
+from benchmarks.replay_server import ReplayServer
+from src.utils import data_fetchers
+
+
+class TestStreamingFetchers(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ReplayServer().start()
+        cls.patches = [
+            mock.patch.object(data_fetchers, "base_url", cls.server.base_url),
+            mock.patch.object(data_fetchers, "sleep", lambda s: None),
+        ]
+        for patch in cls.patches:
+            patch.start()
+        cls.instruments = data_fetchers.get_instruments_data("BTC", "perpetual")[:2]
+
+    @classmethod
+    def tearDownClass(cls):
+        for patch in cls.patches:
+            patch.stop()
+        cls.server.stop()
+
+    def stream(self, **kwargs) -> list:
+        return list(
+            data_fetchers.iter_historical_all_perps(
+                "BTC",
+                "2024-01-01",
+                "2024-01-05",
+                "1h",
+                limit=24,
+                instruments=self.instruments,
+                **kwargs,
+            )
+        )
+
+    def test_pages_as_chunks(self):
+        """Test that chunks are single pages covering the whole history."""
+        chunks = self.stream()
+        self.assertEqual(len(chunks), 2 * 5)
+        self.assertTrue(all(len(chunk) <= 24 for chunk in chunks))
+        combined = pd.concat(chunks)
+        self.assertEqual(list(combined.columns), data_fetchers.PERPS_COLUMNS)
+        self.assertEqual(
+            combined.groupby("market")["date"].nunique().tolist(), [97, 97]
+        )
+
+    def test_newest_first(self):
+        """Test that recent windows come first and windows do not overlap."""
+        chunks = self.stream(newest_first=True)
+        self.assertEqual(chunks[0]["date"].max(), pd.Timestamp("2024-01-05"))
+        firsts = [chunk["date"].min() for chunk in chunks[::2]]
+        self.assertEqual(firsts, sorted(firsts, reverse=True))
+
+        combined = pd.concat(chunks)
+        self.assertFalse(combined.duplicated(["date", "market", "symbol"]).any())
+        expected = pd.concat(self.stream())
+        self.assertEqual(
+            sorted(combined["date"].unique()), sorted(expected["date"].unique())
+        )
+
+    def test_async_iterator(self):
+        """Test that the async iterator yields the same chunks."""
+
+        async def collect():
+            return [
+                chunk
+                async for chunk in data_fetchers.aiter_historical_all_perps(
+                    "BTC",
+                    "2024-01-01",
+                    "2024-01-05",
+                    "1h",
+                    limit=24,
+                    instruments=self.instruments,
+                )
+            ]
+
+        chunks = asyncio.run(collect())
+        self.assertEqual([len(c) for c in chunks], [len(c) for c in self.stream()])
+
+    def test_failed_pages_reported(self):
+        """Test that perpetuals with a page that failed are reported as failed."""
+        page_fetch = data_fetchers.get_historical_perps_page
+        market, symbol = self.instruments.iloc[0][["market", "instrument"]]
+
+        def failing(*args):
+            if args[:2] == (market, symbol) and args[6:] == (3,):
+                return None
+            return page_fetch(*args)
+
+        failed = []
+        with mock.patch.object(
+            data_fetchers, "get_historical_perps_page", side_effect=failing
+        ):
+            df = data_fetchers.get_historical_all_perps(
+                "BTC",
+                "2024-01-01",
+                "2024-01-05",
+                "1h",
+                limit=24,
+                instruments=self.instruments,
+                failed=failed,
+            )
+        self.assertEqual(failed, [(market, symbol)])
+        counts = df.groupby(["market", "symbol"])["date"].nunique()
+        self.assertEqual(counts[(market, symbol)], 97 - 24)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+import pandas as pd
+from src.utils import merge_append, slice_time, sort_by_time
+
+
+def perps(start, end, markets=("binance", "deribit")):
+    dates = pd.date_range(start, end, freq="1h")
+    return pd.DataFrame(
+        {
+            "date": dates.repeat(len(markets)),
+            "market": list(markets) * len(dates),
+            "symbol": "BTC-PERPETUAL",
+            "close": range(len(dates) * len(markets)),
+        }
+    )
+
+
+class TestTimeIndex(unittest.TestCase):
+    def test_sort_by_time(self):
+        """Rows are sorted by date then instrument and duplicates dropped."""
+        df = perps("2024-01-01", "2024-01-02")
+        shuffled = pd.concat([df, df.iloc[:5]]).sample(frac=1, random_state=0)
+        result = sort_by_time(shuffled, ("market", "symbol"))
+
+        self.assertEqual(len(result), len(df))
+        self.assertTrue(result.index.is_monotonic_increasing)
+        self.assertTrue((result.index == result["date"]).all())
+        self.assertFalse(result.duplicated(["date", "market"]).any())
+
+    def test_slice_time(self):
+        """start and end are both inclusive."""
+        df = sort_by_time(perps("2024-01-01", "2024-01-03"), ("market", "symbol"))
+        result = slice_time(df, "2024-01-01 12:00", "2024-01-02")
+
+        self.assertEqual(result["date"].min(), pd.Timestamp("2024-01-01 12:00"))
+        self.assertEqual(result["date"].max(), pd.Timestamp("2024-01-02"))
+        self.assertEqual(len(result), 2 * 13)
+
+    def test_merge_append(self):
+        """Extending on both sides keeps rows sorted and unique."""
+        keys = ("market", "symbol")
+        existing = sort_by_time(perps("2024-01-02", "2024-01-03"), keys)
+        before = sort_by_time(perps("2024-01-01", "2024-01-02"), keys)
+        after = sort_by_time(perps("2024-01-03", "2024-01-04"), keys)
+        result = merge_append(merge_append(existing, after, keys), before, keys)
+        expected = sort_by_time(perps("2024-01-01", "2024-01-04"), keys)
+
+        self.assertTrue(result.index.is_monotonic_increasing)
+        self.assertEqual(len(result), len(expected))
+        self.assertTrue(
+            (result["date"].to_numpy() == expected["date"].to_numpy()).all()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
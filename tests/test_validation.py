@@ -0,0 +1,105 @@
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.marketdata.perpetuals_data import PerpetualsData
+from src.utils import data_fetchers, validate_perpetuals
+
+
+class TestValidation(unittest.TestCase):
+    def setUp(self):
+        dates = pd.date_range("2024-01-01", periods=48, freq="1h")
+        frames = []
+        for market, symbol in [("BINANCE", "BTCUSDT"), ("BYBIT", "BTCUSDT")]:
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "date": dates,
+                        "market": market,
+                        "symbol": symbol,
+                        "price": 60000.0,
+                        "basis": 0.01,
+                        "funding": 0.0001,
+                        "volume": 1e6,
+                        "open_interest": 1e9,
+                        "long_short_ratio": 1.0,
+                    }
+                )
+            )
+        self.df = pd.concat(frames, ignore_index=True)
+
+    def test_clean_data(self):
+        """Test that clean data, even newest first, passes every rule."""
+        report = validate_perpetuals(self.df.iloc[::-1], "1h")
+        self.assertTrue(report.ok, report)
+        self.assertEqual(report.missing_bars, 0)
+
+    def test_rules(self):
+        """Test that every kind of bad row is flagged where it is."""
+        df = self.df.copy()
+        df.loc[3, "price"] = 0.0
+        df.loc[5, "volume"] = -1.0
+        df.loc[7, "price"] = np.nan
+        df.loc[60, "open_interest"] = 3e9
+        df.loc[[10, 11], "date"] = df.loc[[11, 10], "date"].to_numpy()
+        df = pd.concat([df, df.iloc[[20]]], ignore_index=True)
+        df = df.drop(index=[30, 31, 32])
+
+        report = validate_perpetuals(df, "1h")
+        flagged = {
+            rule: list(report.masks.index[report.masks[rule]])
+            for rule in report.masks
+            if report.masks[rule].any()
+        }
+        self.assertEqual(
+            flagged,
+            {
+                "missing": [7],
+                "duplicate": [20],
+                # The re-sent row also arrives out of order
+                "non_monotonic": [11, 96],
+                "gap": [33],
+                "non_positive": [3],
+                "negative": [5],
+                # The jump up and back down
+                "spike": [60, 61],
+            },
+        )
+        self.assertEqual(report.missing_bars, 3)
+        self.assertFalse(report.invalid[33])
+        self.assertEqual(report.summary().loc["spike", "rows"], 2)
+
+        report = validate_perpetuals(df.drop(columns="funding"), "1h")
+        self.assertEqual(report.schema_errors, ["missing column funding"])
+
+    def test_pages_validated_before_dedupe(self):
+        """Test that a row re-sent on a later API page is flagged in PerpetualsData."""
+        pages = {
+            market: rows.drop(columns=["market", "symbol"])
+            for market, rows in self.df.groupby("market")
+        }
+        # The last row of the first page comes again on the next page
+        pages["BINANCE"] = pd.concat(
+            [pages["BINANCE"].iloc[:24], pages["BINANCE"].iloc[23:]],
+            ignore_index=True,
+        )
+        instruments = pd.DataFrame(
+            {"market": ["BINANCE", "BYBIT"], "instrument": ["BTCUSDT", "BTCUSDT"]}
+        )
+        with mock.patch.object(
+            data_fetchers, "get_instruments_data", return_value=instruments
+        ), mock.patch.object(
+            data_fetchers,
+            "get_historical_perps",
+            side_effect=lambda market, *args: pages[market].copy(),
+        ):
+            perps = PerpetualsData("BTC", "2024-01-01", "2024-01-03", "1h")
+
+        masks = perps.validation.masks
+        self.assertEqual(len(masks), 97)
+        self.assertEqual(masks["duplicate"].sum(), 1)
+        self.assertEqual(len(perps.historical_data), 96)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+import pandas as pd
+from src.backtesting import walk_forward_folds, walk_forward_validation
+
+
+class TestWalkForward(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        n = 600
+        funding = rng.normal(size=n)
+        noise = rng.normal(size=n)
+        self.data = pd.DataFrame(
+            {
+                "funding": funding,
+                "basis": noise,
+                "returns": -0.5 * funding + rng.normal(size=n),
+            },
+            index=pd.date_range("2023-01-01", periods=n, freq="D"),
+        )
+
+    def test_folds(self):
+        """Test rolling and expanding fold bounds with a gap."""
+        self.assertEqual(
+            walk_forward_folds(10, 4, 2, gap=1),
+            [(0, 4, 5, 7), (2, 6, 7, 9)],
+        )
+        self.assertEqual(
+            walk_forward_folds(10, 4, 3, step=2, expanding=True),
+            [(0, 4, 4, 7), (0, 6, 6, 9)],
+        )
+
+    def test_parallel_matches_serial(self):
+        """Test that the process pool gives the serial results."""
+        serial = walk_forward_validation(self.data, "returns", 200, 50, max_workers=1)
+        parallel = walk_forward_validation(self.data, "returns", 200, 50, max_workers=2)
+        self.assertEqual(len(serial), 8)
+        self.assertEqual(serial["test_start"].iloc[0], self.data.index[200])
+
+        columns = ["ic", "corr", "hit_rate", "weight_funding", "weight_basis"]
+        pd.testing.assert_frame_equal(serial[columns], parallel[columns])
+        # The index follows funding, which predicts lower returns
+        self.assertTrue((serial["weight_funding"] < -0.5).all())
+        self.assertGreater(serial["ic"].mean(), 0.2)
+
+
+if __name__ == "__main__":
+    unittest.main()